@@ -13,6 +13,7 @@ from datetime import datetime
 
 # Import your existing modules
 from core.dynamic_alpha_discovery import discover_dynamic_alpha_opportunities
+from core.live_quote_stream import live_quote_streamer
 from core.catalyst_discovery_engine import discover_real_catalyst_opportunities
 from feeds.fda_scraper import get_fda_catalysts
 from feeds.sec_monitor import get_sec_catalysts
@@ -277,21 +278,64 @@ async def get_sec_catalysts_api():
     except Exception as e:
         return {"catalysts": [], "error": str(e)}
 
+@app.on_event("startup")
+async def start_live_quote_stream():
+    """Open the upstream quote stream for held positions"""
+    held_symbols = []
+    try:
+        portfolio_data = await portfolio.get_live_portfolio()
+        if portfolio_data and portfolio_data.holdings:
+            held_symbols = [holding.symbol for holding in portfolio_data.holdings]
+    except Exception as e:
+        print(f"⚠️ Could not load holdings for live quotes: {e}")
+    await live_quote_streamer.start(held_symbols)
+
+@app.on_event("shutdown")
+async def stop_live_quote_stream():
+    await live_quote_streamer.stop()
+
+@app.get("/api/stream/quotes")
+async def get_live_quotes():
+    """Latest streamed trade/quote state for held and watched symbols"""
+    return {
+        "quotes": live_quote_streamer.get_snapshot(),
+        "stream": live_quote_streamer.get_stream_stats(),
+        "lastUpdated": datetime.now().isoformat()
+    }
+
 # WebSocket for real-time updates
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Pushes throttled 'stock_update' diffs from the live quote stream
+
+    Clients may send {"action": "subscribe", "symbols": [...]} to watch more
+    symbols; a heartbeat still goes out after 30s without client messages.
+    """
     await websocket.accept()
+    await live_quote_streamer.connect_client(websocket)
     try:
         while True:
-            # Send periodic updates
-            update = {
-                "type": "heartbeat",
-                "timestamp": datetime.now().isoformat()
-            }
-            await websocket.send_text(json.dumps(update))
-            await asyncio.sleep(30)  # Send update every 30 seconds
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), timeout=30)
+            except asyncio.TimeoutError:
+                update = {
+                    "type": "heartbeat",
+                    "timestamp": datetime.now().isoformat()
+                }
+                await websocket.send_text(json.dumps(update))
+                continue
+            
+            try:
+                request = json.loads(message)
+            except ValueError:
+                continue
+            if request.get("action") == "subscribe":
+                await live_quote_streamer.watch(request.get("symbols", []))
     except:
         pass
+    finally:
+        live_quote_streamer.disconnect_client(websocket)
 
 if __name__ == "__main__":
     import uvicorn
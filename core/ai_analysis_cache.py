@@ -2,13 +2,26 @@
 """
 AI Analysis Cache System
 Prevents repeated API calls and backend crashes during scheduled analysis periods
+
+Entries live in a SQLite (WAL) table keyed by symbol/analysis type, each with
+its own expiry. Reads and writes touch a single row; expired rows are dropped
+lazily and the table is kept under entry/byte limits by LRU eviction. Hits
+record their access time in memory; it's written in bulk every few minutes
+and before an eviction pass, so reads don't commit.
+
+get_or_compute adds single-flight coalescing and stale-while-revalidate for
+async callers: concurrent requests for one key share a single computation,
+and recently expired entries are served while one background refresh runs.
+get_or_compute_many does the same for a batch computed in one call.
 """
 
+import asyncio
 import json
 import time
 import os
+import sqlite3
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
 import threading
 from pathlib import Path
 
@@ -18,36 +31,100 @@ class AIAnalysisCache:
     Only refreshes during scheduled periods or when forced
     """
     
-    def __init__(self, cache_dir: str = "cache"):
+    def __init__(self, cache_dir: str = "cache", max_entries: int = 5000,
+                 max_bytes: int = 100 * 1024 * 1024):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
-        self.cache_file = self.cache_dir / "ai_analysis_cache.json"
+        self.db_path = self.cache_dir / "ai_analysis_cache.db"
+        self.legacy_cache_file = self.cache_dir / "ai_analysis_cache.json"
         self.lock = threading.Lock()
         
-        # Load existing cache
-        self.cache = self._load_cache()
-        
         # Cache settings
-        self.cache_duration_minutes = 30  # Cache valid for 30 minutes
+        self.cache_duration_minutes = 30  # Default TTL: cache valid for 30 minutes
         self.scheduled_refresh_hours = [5, 9, 13, 17]  # 5:30am, 9:30am, 1:30pm, 5:30pm PT
+        self.stale_while_revalidate_minutes = 60  # Expired entries served stale for up to an hour
+        self.access_flush_seconds = 300  # Buffered last_access times are written at most this often
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
         
-    def _load_cache(self) -> Dict[str, Any]:
-        """Load cache from disk"""
-        try:
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading cache: {e}")
-        return {}
+        # Counters since process start
+        self.counters = {'hits': 0, 'misses': 0, 'expired': 0, 'sets': 0, 'evictions': 0,
+                         'stale_hits': 0, 'coalesced': 0, 'refreshes': 0}
+        
+        # In-flight computations keyed like cache entries (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._batches: set = set()  # Running get_or_compute_many batches (keeps them referenced)
+        
+        # last_access times of hits not yet written (for LRU eviction)
+        self._pending_access: Dict[str, float] = {}
+        self._last_access_flush = time.time()
+        
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._setup_database()
+        self._migrate_legacy_cache()
+    
+    def _setup_database(self):
+        """Initialize SQLite cache table"""
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                analysis_type TEXT NOT NULL,
+                purchase_price REAL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size_bytes INTEGER NOT NULL
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access
+            ON analysis_cache(last_access)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analysis_cache_expires_at
+            ON analysis_cache(expires_at)
+        ''')
+        
+        self.conn.commit()
     
-    def _save_cache(self):
-        """Save cache to disk"""
+    def _migrate_legacy_cache(self):
+        """Import entries from the old single-file JSON cache once"""
+        if not self.legacy_cache_file.exists():
+            return
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with open(self.legacy_cache_file, 'r') as f:
+                legacy = json.load(f)
+            
+            ttl = self.cache_duration_minutes * 60
+            with self.lock:
+                for cache_key, entry in legacy.items():
+                    try:
+                        created_at = datetime.fromisoformat(entry['timestamp']).timestamp()
+                    except Exception:
+                        continue
+                    payload = json.dumps(entry['data'])
+                    self.conn.execute('''
+                        INSERT OR IGNORE INTO analysis_cache
+                        (cache_key, symbol, analysis_type, purchase_price, data,
+                         created_at, expires_at, last_access, size_bytes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (cache_key, entry.get('symbol', ''), entry.get('analysis_type', ''),
+                          entry.get('purchase_price'), payload, created_at, created_at + ttl,
+                          created_at, len(payload)))
+                self.conn.commit()
+            
+            self.legacy_cache_file.rename(self.legacy_cache_file.with_suffix('.json.migrated'))
+            print(f"🎯 Migrated {len(legacy)} entries from legacy JSON cache")
         except Exception as e:
-            print(f"Error saving cache: {e}")
+            print(f"Error migrating legacy cache: {e}")
     
     def _get_cache_key(self, symbol: str, analysis_type: str, purchase_price: float = None) -> str:
         """Generate cache key for analysis"""
@@ -56,15 +133,6 @@ class AIAnalysisCache:
             key += f"_{purchase_price}"
         return key
     
-    def _is_cache_valid(self, timestamp: str) -> bool:
-        """Check if cache entry is still valid"""
-        try:
-            cache_time = datetime.fromisoformat(timestamp)
-            expiry_time = cache_time + timedelta(minutes=self.cache_duration_minutes)
-            return datetime.now() < expiry_time
-        except:
-            return False
-    
     def _is_scheduled_refresh_time(self) -> bool:
         """Check if current time is within scheduled refresh window"""
         now = datetime.now()
@@ -76,6 +144,16 @@ class AIAnalysisCache:
                 return True
         return False
     
+    def _predates_refresh_window(self, created_at: float) -> bool:
+        """True if we're in a scheduled refresh window and the entry was cached before it opened"""
+        if not self._is_scheduled_refresh_time():
+            return False
+        window_start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        return created_at < window_start.timestamp()
+    
+    def _stale_window_seconds(self) -> float:
+        return self.stale_while_revalidate_minutes * 60
+    
     def get_analysis(self, symbol: str, analysis_type: str, purchase_price: float = None) -> Optional[Dict[str, Any]]:
         """
         Get cached analysis if available and valid
@@ -84,28 +162,40 @@ class AIAnalysisCache:
             symbol: Stock symbol
             analysis_type: Type of analysis (full, collaborative, etc.)
             purchase_price: Purchase price for position analysis
-            
+        
         Returns:
             Cached analysis dict or None if not available/expired
         """
+        cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
+        now = time.time()
+        
         with self.lock:
-            cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
+            row = self.conn.execute(
+                'SELECT data, created_at, expires_at FROM analysis_cache WHERE cache_key = ?',
+                (cache_key,)
+            ).fetchone()
             
-            if cache_key in self.cache:
-                entry = self.cache[cache_key]
-                if self._is_cache_valid(entry['timestamp']):
-                    print(f"🎯 Cache HIT: {symbol} {analysis_type} (cached at {entry['timestamp']})")
-                    return entry['data']
-                else:
-                    print(f"🎯 Cache EXPIRED: {symbol} {analysis_type}")
-                    # Remove expired entry
-                    del self.cache[cache_key]
-                    self._save_cache()
+            if row is not None:
+                data, created_at, expires_at = row
+                if now < expires_at:
+                    self._touch(cache_key, now)
+                    self.counters['hits'] += 1
+                    print(f"🎯 Cache HIT: {symbol} {analysis_type} (cached at {datetime.fromtimestamp(created_at).isoformat()})")
+                    return json.loads(data)
+                
+                print(f"🎯 Cache EXPIRED: {symbol} {analysis_type}")
+                # Lazy expiry: drop just this row once it can no longer be served stale
+                if now >= expires_at + self._stale_window_seconds():
+                    self.conn.execute('DELETE FROM analysis_cache WHERE cache_key = ?', (cache_key,))
+                    self.conn.commit()
+                    self.counters['expired'] += 1
             
+            self.counters['misses'] += 1
             print(f"🎯 Cache MISS: {symbol} {analysis_type}")
             return None
     
-    def set_analysis(self, symbol: str, analysis_type: str, data: Dict[str, Any], purchase_price: float = None):
+    def set_analysis(self, symbol: str, analysis_type: str, data: Dict[str, Any], purchase_price: float = None,
+                     ttl_minutes: Optional[float] = None):
         """
         Cache analysis result
         
@@ -114,22 +204,75 @@ class AIAnalysisCache:
             analysis_type: Type of analysis
             data: Analysis result to cache
             purchase_price: Purchase price for position analysis
+            ttl_minutes: Entry lifetime (defaults to cache_duration_minutes)
         """
+        cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
+        ttl = (ttl_minutes if ttl_minutes is not None else self.cache_duration_minutes) * 60
+        payload = json.dumps(data, default=str)
+        now = time.time()
+        
         with self.lock:
-            cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
-            
-            entry = {
-                'timestamp': datetime.now().isoformat(),
-                'data': data,
-                'symbol': symbol,
-                'analysis_type': analysis_type,
-                'purchase_price': purchase_price
-            }
-            
-            self.cache[cache_key] = entry
-            self._save_cache()
+            self.conn.execute('''
+                INSERT OR REPLACE INTO analysis_cache
+                (cache_key, symbol, analysis_type, purchase_price, data,
+                 created_at, expires_at, last_access, size_bytes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (cache_key, symbol, analysis_type, purchase_price, payload,
+                  now, now + ttl, now, len(payload)))
+            self._evict_if_needed(now)
+            self.conn.commit()
+            self.counters['sets'] += 1
             
-            print(f"🎯 Cached: {symbol} {analysis_type} at {entry['timestamp']}")
+            print(f"🎯 Cached: {symbol} {analysis_type} at {datetime.fromtimestamp(now).isoformat()}")
+    
+    def _touch(self, cache_key: str, now: float):
+        """Record a hit's access time; buffered writes go out once access_flush_seconds have passed (lock held)"""
+        self._pending_access[cache_key] = now
+        if now - self._last_access_flush >= self.access_flush_seconds:
+            self._flush_access(now)
+            self.conn.commit()
+    
+    def _flush_access(self, now: float):
+        """Write buffered last_access times without committing (lock held)"""
+        if self._pending_access:
+            self.conn.executemany(
+                'UPDATE analysis_cache SET last_access = MAX(last_access, ?) WHERE cache_key = ?',
+                [(accessed, cache_key) for cache_key, accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._last_access_flush = now
+    
+    def _evict_if_needed(self, now: float):
+        """Drop expired rows, then least recently used rows, until under the limits (lock held)"""
+        count, total_bytes = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM analysis_cache'
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        
+        removed = self.conn.execute(
+            'DELETE FROM analysis_cache WHERE expires_at <= ?', (now - self._stale_window_seconds(),)
+        ).rowcount
+        self.counters['expired'] += removed
+        count -= removed
+        
+        if count > self.max_entries or total_bytes > self.max_bytes:
+            # LRU order needs the buffered access times
+            self._flush_access(now)
+            evicted = 0
+            total_bytes = self.conn.execute(
+                'SELECT COALESCE(SUM(size_bytes), 0) FROM analysis_cache'
+            ).fetchone()[0]
+            for cache_key, size_bytes in self.conn.execute(
+                'SELECT cache_key, size_bytes FROM analysis_cache ORDER BY last_access ASC'
+            ).fetchall():
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM analysis_cache WHERE cache_key = ?', (cache_key,))
+                count -= 1
+                total_bytes -= size_bytes
+                evicted += 1
+            self.counters['evictions'] += evicted
     
     def should_refresh_analysis(self, symbol: str, analysis_type: str, purchase_price: float = None) -> bool:
         """
@@ -138,47 +281,258 @@ class AIAnalysisCache:
         Returns True if:
         - No cached data exists
         - Cached data is expired
-        - Currently in scheduled refresh window
+        - Currently in scheduled refresh window and the data predates it
         """
+        cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
+        
         with self.lock:
-            cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
+            row = self.conn.execute(
+                'SELECT created_at, expires_at FROM analysis_cache WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+        
+        # No cache = refresh
+        if row is None:
+            return True
+        
+        # Expired cache = refresh
+        created_at, expires_at = row
+        if time.time() >= expires_at:
+            return True
+        
+        # During scheduled refresh window = refresh once per window
+        if self._predates_refresh_window(created_at):
+            return True
+        
+        return False
+    
+    def _lookup(self, cache_key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Read an entry for get_or_compute
+        
+        Returns:
+            (data, state) where state is 'fresh', 'stale' or None (missing)
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT data, created_at, expires_at FROM analysis_cache WHERE cache_key = ?',
+                (cache_key,)
+            ).fetchone()
+            if row is None or now >= row[2] + self._stale_window_seconds():
+                self.counters['misses'] += 1
+                return None, None
             
-            # No cache = refresh
-            if cache_key not in self.cache:
-                return True
-                
-            # Expired cache = refresh
-            if not self._is_cache_valid(self.cache[cache_key]['timestamp']):
-                return True
-                
-            # During scheduled refresh window = refresh
-            if self._is_scheduled_refresh_time():
-                return True
-                
-            return False
+            data, created_at, expires_at = row
+            self._touch(cache_key, now)
+            if now < expires_at and not self._predates_refresh_window(created_at):
+                self.counters['hits'] += 1
+                return json.loads(data), 'fresh'
+            self.counters['stale_hits'] += 1
+            return json.loads(data), 'stale'
+    
+    async def get_or_compute(self, symbol: str, analysis_type: str,
+                             compute: Callable[[], Awaitable[Any]],
+                             purchase_price: float = None, ttl_minutes: Optional[float] = None,
+                             force_refresh: bool = False,
+                             cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get cached analysis, computing it at most once across concurrent callers
+        
+        - Fresh entry: returned as-is
+        - Stale entry (expired less than stale_while_revalidate_minutes ago, or
+          cached before the current scheduled refresh window): returned
+          immediately while one background refresh runs
+        - Missing entry: every caller awaits the same in-flight computation
+        
+        Args:
+            symbol: Stock symbol
+            analysis_type: Type of analysis
+            compute: Zero-argument coroutine function producing the analysis
+            purchase_price: Purchase price for position analysis
+            ttl_minutes: Entry lifetime for the computed result
+            force_refresh: Skip the cache lookup (still coalesced)
+            cache_if: Predicate deciding whether a result is cached (default: not None)
+        
+        Returns:
+            The analysis; exceptions from compute propagate to every waiter
+        """
+        cache_key = self._get_cache_key(symbol, analysis_type, purchase_price)
+        
+        if not force_refresh:
+            data, state = self._lookup(cache_key)
+            if state == 'fresh':
+                print(f"🎯 Cache HIT: {symbol} {analysis_type}")
+                return data
+            if state == 'stale':
+                print(f"🎯 Cache STALE: {symbol} {analysis_type} (serving while refreshing)")
+                self._start_computation(cache_key, symbol, analysis_type, compute,
+                                        purchase_price, ttl_minutes, cache_if, background=True)
+                return data
+        
+        task = self._start_computation(cache_key, symbol, analysis_type, compute,
+                                       purchase_price, ttl_minutes, cache_if)
+        # Shielded so one caller disconnecting doesn't cancel the shared work
+        return await asyncio.shield(task)
+    
+    def _start_computation(self, cache_key: str, symbol: str, analysis_type: str,
+                           compute: Callable[[], Awaitable[Any]], purchase_price: Optional[float],
+                           ttl_minutes: Optional[float], cache_if: Optional[Callable[[Any], bool]],
+                           background: bool = False) -> asyncio.Future:
+        """Join the in-flight computation for cache_key, or start one"""
+        task = self._inflight.get(cache_key)
+        if task is not None and not task.done():
+            self.counters['coalesced'] += 1
+            print(f"🎯 Coalesced: {symbol} {analysis_type} (joining in-flight analysis)")
+            return task
+        
+        async def run():
+            try:
+                result = await compute()
+                should_cache = cache_if(result) if cache_if else result is not None
+                if should_cache:
+                    self.set_analysis(symbol, analysis_type, result, purchase_price, ttl_minutes=ttl_minutes)
+                return result
+            finally:
+                if self._inflight.get(cache_key) is task:
+                    del self._inflight[cache_key]
+        
+        task = asyncio.ensure_future(run())
+        self._inflight[cache_key] = task
+        self.counters['refreshes'] += 1
+        if background:
+            task.add_done_callback(self._log_background_failure)
+        return task
+    
+    async def get_or_compute_many(self, symbols: Iterable[str], analysis_type: str,
+                                  compute_many: Callable[[List[str]], AsyncIterator[Tuple[str, Any]]],
+                                  ttl_minutes: Optional[float] = None,
+                                  cache_if: Optional[Callable[[Any], bool]] = None) -> AsyncIterator[Any]:
+        """
+        get_or_compute for many symbols, yielding each analysis as it's ready
+        
+        Fresh and stale entries are yielded first (stale ones are refreshed in
+        the background); symbols already being computed, e.g. by a
+        single-symbol request, join that computation; the rest are computed
+        together by one compute_many call. Each symbol's share of the batch is
+        registered as its in-flight computation, so single-symbol requests
+        arriving meanwhile join the batch instead of starting their own.
+        
+        Args:
+            symbols: Stock symbols
+            analysis_type: Type of analysis
+            compute_many: Called with the symbols to compute; async-iterates
+                          (symbol, analysis) pairs as they finish
+            ttl_minutes: Entry lifetime for the computed results
+            cache_if: Predicate deciding whether a result is cached (default: not None)
+        
+        Yields:
+            Analyses in completion order; symbols whose computation fails are skipped
+        """
+        loop = asyncio.get_running_loop()
+        cached, waiting = [], []
+        slots: Dict[str, asyncio.Future] = {}
+        
+        # Register every computation before yielding, so a consumer that stops
+        # early can't leave registered computations without a batch to feed them
+        for symbol in dict.fromkeys(symbols):
+            cache_key = self._get_cache_key(symbol, analysis_type)
+            data, state = self._lookup(cache_key)
+            if state is not None:
+                cached.append(data)
+                if state == 'fresh':
+                    continue
+            task = self._inflight.get(cache_key)
+            if task is not None and not task.done():
+                self.counters['coalesced'] += 1
+            else:
+                slot = slots[symbol] = loop.create_future()
+                task = self._start_computation(cache_key, symbol, analysis_type, lambda slot=slot: slot,
+                                               None, ttl_minutes, cache_if, background=state == 'stale')
+            if state is None:
+                waiting.append(task)
+        
+        if slots:
+            batch = asyncio.ensure_future(self._run_batch(slots, compute_many))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+        
+        for data in cached:
+            yield data
+        for next_done in asyncio.as_completed(waiting):
+            try:
+                result = await next_done
+            except Exception as e:
+                print(f"🎯 Batch analysis failed: {e}")
+                continue
+            if result is not None:
+                yield result
+    
+    @staticmethod
+    async def _run_batch(slots: Dict[str, asyncio.Future],
+                         compute_many: Callable[[List[str]], AsyncIterator[Tuple[str, Any]]]):
+        """Feed compute_many's results to the per-symbol computations waiting on them"""
+        error: BaseException = RuntimeError("No result from batch computation")
+        try:
+            async for symbol, analysis in compute_many(list(slots)):
+                slot = slots.get(symbol)
+                if slot is not None and not slot.done():
+                    slot.set_result(analysis)
+        except Exception as e:
+            error = e
+        finally:
+            for slot in slots.values():
+                if not slot.done():
+                    slot.set_exception(error)
+    
+    @staticmethod
+    def _log_background_failure(task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"🎯 Background refresh failed: {task.exception()}")
     
     def clear_cache(self):
         """Clear all cached analysis"""
         with self.lock:
-            self.cache = {}
-            self._save_cache()
+            self.conn.execute('DELETE FROM analysis_cache')
+            self.conn.commit()
+            self._pending_access.clear()
             print("🎯 Cache cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        now = time.time()
         with self.lock:
-            total_entries = len(self.cache)
-            valid_entries = sum(1 for entry in self.cache.values() 
-                              if self._is_cache_valid(entry['timestamp']))
-            
-            return {
-                'total_entries': total_entries,
-                'valid_entries': valid_entries,
-                'expired_entries': total_entries - valid_entries,
-                'cache_duration_minutes': self.cache_duration_minutes,
-                'scheduled_refresh_hours': self.scheduled_refresh_hours,
-                'next_scheduled_refresh': self._get_next_refresh_time()
-            }
+            total_entries, valid_entries, total_bytes = self.conn.execute('''
+                SELECT COUNT(*),
+                       COALESCE(SUM(CASE WHEN expires_at > ? THEN 1 ELSE 0 END), 0),
+                       COALESCE(SUM(size_bytes), 0)
+                FROM analysis_cache
+            ''', (now,)).fetchone()
+            counters = dict(self.counters)
+        
+        served = counters['hits'] + counters['stale_hits']
+        lookups = served + counters['misses']
+        return {
+            'total_entries': total_entries,
+            'valid_entries': valid_entries,
+            'expired_entries': total_entries - valid_entries,
+            'size_bytes': total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'expired': counters['expired'],
+            'evictions': counters['evictions'],
+            'sets': counters['sets'],
+            'stale_hits': counters['stale_hits'],
+            'coalesced': counters['coalesced'],
+            'refreshes': counters['refreshes'],
+            'in_flight': len(self._inflight),
+            'hit_rate': round(served / lookups, 3) if lookups else 0.0,
+            'cache_duration_minutes': self.cache_duration_minutes,
+            'stale_while_revalidate_minutes': self.stale_while_revalidate_minutes,
+            'scheduled_refresh_hours': self.scheduled_refresh_hours,
+            'next_scheduled_refresh': self._get_next_refresh_time()
+        }
     
     def _get_next_refresh_time(self) -> str:
         """Get next scheduled refresh time"""
@@ -6,11 +6,18 @@ Tracks usage and costs across all APIs to monitor daily/weekly/monthly spending
 
 import json
 import os
+import time
+import atexit
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import sqlite3
 from dataclasses import dataclass, asdict
 
+# Periods (days) whose summaries are kept materialized for the dashboard
+SUMMARY_PERIODS = (1, 7, 30)
+
 @dataclass
 class APICall:
     """Single API call record"""
@@ -23,12 +30,36 @@ class APICall:
     success: bool = True
 
 class APIcostTracker:
-    """Track API usage and costs across all services"""
+    """
+    Track API usage and costs across all services
+    
+    log_api_call() only appends to an in-memory buffer; a background writer
+    commits buffered calls in one transaction every flush_interval seconds
+    (or at max_buffer calls) over a single long-lived WAL connection. The
+    same transaction rolls the calls into per-day/per-API totals and
+    rewrites the materialized 1/7/30-day summaries, so a summary read is a
+    single-row lookup instead of an aggregate over raw calls.
+    """
     
-    def __init__(self, db_path: str = "api_costs.db"):
+    def __init__(self, db_path: str = "api_costs.db", flush_interval: float = 2.0, max_buffer: int = 500):
         self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        
+        self.lock = threading.Lock()          # guards the connection
+        self.buffer_lock = threading.Lock()   # guards the pending-call buffer
+        self._buffer: List[APICall] = []
+        self._recent_calls = deque(maxlen=10)
+        self._wakeup = threading.Event()
+        self.stats = {'logged': 0, 'flushes': 0, 'rows_written': 0, 'summary_reads': 0}
+        
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.setup_database()
         
+        self._writer = threading.Thread(target=self._writer_loop, name="api-cost-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+        
         # API cost estimates (per request unless noted)
         self.api_costs = {
             "openrouter": {"base_cost": 0.002, "per_token": 0.000001},  # ~$0.002 per request
@@ -49,8 +80,9 @@ class APIcostTracker:
     
     def setup_database(self):
         """Initialize SQLite database for cost tracking"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS api_calls (
@@ -75,12 +107,56 @@ class APIcostTracker:
             ON api_calls(api_name)
         ''')
         
-        conn.commit()
-        conn.close()
+        # Rolling per-day/per-API totals (successful calls only, as in the summaries)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_daily_usage (
+                day TEXT NOT NULL,
+                api_name TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                failed_calls INTEGER NOT NULL DEFAULT 0,
+                cost REAL NOT NULL DEFAULT 0,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, api_name)
+            )
+        ''')
+        
+        # Materialized get_usage_summary() results, rewritten on every flush
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_cost_summary (
+                period_days INTEGER PRIMARY KEY,
+                as_of_day TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        
+        # Backfill the daily totals once from calls logged before they existed
+        cursor.execute('SELECT 1 FROM api_daily_usage LIMIT 1')
+        if cursor.fetchone() is None:
+            cursor.execute('''
+                INSERT INTO api_daily_usage (day, api_name, calls, failed_calls, cost, tokens)
+                SELECT substr(timestamp, 1, 10), api_name,
+                       SUM(success = 1), SUM(success != 1),
+                       SUM(CASE WHEN success = 1 THEN cost ELSE 0 END),
+                       SUM(CASE WHEN success = 1 THEN tokens_used ELSE 0 END)
+                FROM api_calls
+                GROUP BY substr(timestamp, 1, 10), api_name
+            ''')
+        
+        self.conn.commit()
+        
+        cursor.execute('''
+            SELECT timestamp, api_name, endpoint, cost FROM api_calls
+            WHERE success = 1 ORDER BY timestamp DESC LIMIT 10
+        ''')
+        for timestamp, api_name, endpoint, cost in reversed(cursor.fetchall()):
+            self._recent_calls.append({"timestamp": timestamp, "api": api_name,
+                                       "endpoint": endpoint, "cost": round(cost, 4)})
+        self._materialize_summaries()
     
     def log_api_call(self, api_name: str, endpoint: str, tokens_used: int = 0, 
                      request_type: str = "GET", success: bool = True) -> float:
-        """Log an API call and return estimated cost"""
+        """Log an API call and return estimated cost (buffered; no disk I/O on the caller's thread)"""
         cost = self.calculate_cost(api_name, tokens_used)
         
         call = APICall(
@@ -93,62 +169,93 @@ class APIcostTracker:
             success=success
         )
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO api_calls 
-            (timestamp, api_name, endpoint, cost, tokens_used, request_type, success)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (call.timestamp, call.api_name, call.endpoint, call.cost, 
-              call.tokens_used, call.request_type, call.success))
-        
-        conn.commit()
-        conn.close()
+        with self.buffer_lock:
+            self._buffer.append(call)
+            self.stats['logged'] += 1
+            if len(self._buffer) >= self.max_buffer:
+                self._wakeup.set()
         
         return cost
     
-    def calculate_cost(self, api_name: str, tokens_used: int = 0) -> float:
-        """Calculate estimated cost for an API call"""
-        api_name = api_name.lower()
-        
-        if api_name not in self.api_costs:
-            return 0.001  # Default small cost for unknown APIs
-        
-        config = self.api_costs[api_name]
-        base_cost = config.get("base_cost", 0.001)
-        
-        if "per_token" in config and tokens_used > 0:
-            token_cost = config["per_token"] * tokens_used
-            return base_cost + token_cost
-        
-        return base_cost
+    def _writer_loop(self):
+        """Background writer: flush buffered calls every flush_interval seconds"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ API cost tracker flush failed: {e}")
     
-    def get_usage_summary(self, days: int = 1) -> Dict:
-        """Get usage summary for specified time period"""
-        start_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def flush(self):
+        """Commit buffered calls, roll them into the daily totals and refresh the summaries"""
+        with self.lock:
+            with self.buffer_lock:
+                calls, self._buffer = self._buffer, []
+            if not calls:
+                return
+            
+            daily: Dict[tuple, List] = {}
+            for call in calls:
+                totals = daily.setdefault((call.timestamp[:10], call.api_name), [0, 0, 0.0, 0])
+                if call.success:
+                    totals[0] += 1
+                    totals[2] += call.cost
+                    totals[3] += call.tokens_used or 0
+                else:
+                    totals[1] += 1
+            
+            try:
+                cursor = self.conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO api_calls 
+                    (timestamp, api_name, endpoint, cost, tokens_used, request_type, success)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(c.timestamp, c.api_name, c.endpoint, c.cost, c.tokens_used,
+                       c.request_type, c.success) for c in calls])
+                cursor.executemany('''
+                    INSERT INTO api_daily_usage (day, api_name, calls, failed_calls, cost, tokens)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(day, api_name) DO UPDATE SET
+                        calls = calls + excluded.calls,
+                        failed_calls = failed_calls + excluded.failed_calls,
+                        cost = cost + excluded.cost,
+                        tokens = tokens + excluded.tokens
+                ''', [(day, api_name, *totals) for (day, api_name), totals in daily.items()])
+                
+                for call in calls:
+                    if call.success:
+                        self._recent_calls.append({"timestamp": call.timestamp, "api": call.api_name,
+                                                   "endpoint": call.endpoint, "cost": round(call.cost, 4)})
+                self._materialize_summaries(commit=False)
+                self.conn.commit()
+                self.stats['flushes'] += 1
+                self.stats['rows_written'] += len(calls)
+            except Exception:
+                # Keep the calls for the next attempt rather than dropping them
+                self.conn.rollback()
+                with self.buffer_lock:
+                    self._buffer = calls + self._buffer
+                raise
+    
+    def _build_summary(self, days: int, cursor: sqlite3.Cursor) -> Dict:
+        """Summary for the last `days` calendar days (today included) from the daily totals"""
+        start_day = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
         
-        # Total costs by API
         cursor.execute('''
-            SELECT api_name, 
-                   COUNT(*) as calls,
-                   SUM(cost) as total_cost,
-                   SUM(tokens_used) as total_tokens
-            FROM api_calls 
-            WHERE timestamp >= ? AND success = 1
+            SELECT api_name, SUM(calls), SUM(cost), SUM(tokens)
+            FROM api_daily_usage
+            WHERE day >= ?
             GROUP BY api_name
-            ORDER BY total_cost DESC
-        ''', (start_date,))
+            HAVING SUM(calls) > 0
+            ORDER BY SUM(cost) DESC
+        ''', (start_day,))
         
         api_breakdown = {}
         total_cost = 0
         total_calls = 0
         
-        for row in cursor.fetchall():
-            api_name, calls, cost, tokens = row
+        for api_name, calls, cost, tokens in cursor.fetchall():
             api_breakdown[api_name] = {
                 "calls": calls,
                 "cost": round(cost, 4),
@@ -158,26 +265,7 @@ class APIcostTracker:
             total_cost += cost
             total_calls += calls
         
-        # Recent activity
-        cursor.execute('''
-            SELECT timestamp, api_name, endpoint, cost
-            FROM api_calls 
-            WHERE timestamp >= ? AND success = 1
-            ORDER BY timestamp DESC
-            LIMIT 10
-        ''', (start_date,))
-        
-        recent_calls = []
-        for row in cursor.fetchall():
-            timestamp, api_name, endpoint, cost = row
-            recent_calls.append({
-                "timestamp": timestamp,
-                "api": api_name,
-                "endpoint": endpoint,
-                "cost": round(cost, 4)
-            })
-        
-        conn.close()
+        recent_calls = [c for c in reversed(self._recent_calls) if c["timestamp"][:10] >= start_day]
         
         return {
             "period_days": days,
@@ -188,6 +276,65 @@ class APIcostTracker:
             "estimated_monthly": round(total_cost * (30 / days), 2) if days > 0 else 0
         }
     
+    def _materialize_summaries(self, commit: bool = True):
+        """Rewrite the stored summary rows (caller holds self.lock or is still initializing)"""
+        cursor = self.conn.cursor()
+        today = datetime.now().strftime('%Y-%m-%d')
+        now = time.time()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO api_cost_summary (period_days, as_of_day, summary, updated_at)
+            VALUES (?, ?, ?, ?)
+        ''', [(days, today, json.dumps(self._build_summary(days, cursor)), now) for days in SUMMARY_PERIODS])
+        if commit:
+            self.conn.commit()
+    
+    def calculate_cost(self, api_name: str, tokens_used: int = 0) -> float:
+        """Calculate estimated cost for an API call"""
+        api_name = api_name.lower()
+        
+        if api_name not in self.api_costs:
+            return 0.001  # Default small cost for unknown APIs
+        
+        config = self.api_costs[api_name]
+        base_cost = config.get("base_cost", 0.001)
+        
+        if "per_token" in config and tokens_used > 0:
+            token_cost = config["per_token"] * tokens_used
+            return base_cost + token_cost
+        
+        return base_cost
+    
+    def get_usage_summary(self, days: int = 1) -> Dict:
+        """
+        Get usage summary for the last `days` calendar days (today included)
+        
+        The 1/7/30-day summaries are served from the materialized table; other
+        periods aggregate the (small) daily totals table.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        self.stats['summary_reads'] += 1
+        
+        with self.lock:
+            cursor = self.conn.cursor()
+            if days in SUMMARY_PERIODS:
+                cursor.execute(
+                    'SELECT as_of_day, summary FROM api_cost_summary WHERE period_days = ?', (days,)
+                )
+                row = cursor.fetchone()
+                if row and row[0] == today:
+                    return json.loads(row[1])
+                # First read after midnight: roll the windows forward
+                self._materialize_summaries()
+                cursor.execute('SELECT summary FROM api_cost_summary WHERE period_days = ?', (days,))
+                return json.loads(cursor.fetchone()[0])
+            return self._build_summary(max(days, 1), cursor)
+    
+    def get_tracker_stats(self) -> Dict:
+        """Writer and buffer statistics"""
+        with self.buffer_lock:
+            buffered = len(self._buffer)
+        return {**self.stats, 'buffered': buffered}
+    
     def get_cost_alerts(self) -> List[Dict]:
         """Check for cost alerts and spending patterns"""
         alerts = []
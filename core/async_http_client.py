@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Async HTTP Client
+Shared pooled aiohttp session for backend endpoints: keep-alive connections,
+per-host connection limits and per-host default timeouts
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_scan_pipeline import loop_local
+
+logger = logging.getLogger(__name__)
+
+# Concurrent connections allowed per upstream host
+HOST_CONNECTION_LIMITS = {
+    "paper-api.alpaca.markets": 10,
+    "api.alpaca.markets": 10,
+    "data.alpaca.markets": 10,
+    "openrouter.ai": 8,
+    "hooks.slack.com": 4,
+    "api.polygon.io": 10,
+    "www.sec.gov": 8,
+    "data.sec.gov": 8,
+}
+DEFAULT_HOST_LIMIT = 10
+
+# Default total timeout (seconds) per upstream host
+HOST_TIMEOUTS = {
+    "paper-api.alpaca.markets": 10,
+    "api.alpaca.markets": 10,
+    "data.alpaca.markets": 10,
+    "openrouter.ai": 30,
+    "hooks.slack.com": 10,
+    "api.polygon.io": 15,
+    "www.sec.gov": 10,
+    "data.sec.gov": 10,
+}
+DEFAULT_TIMEOUT = 15
+
+
+class HTTPResponse:
+    """Fully-read response with the parts of the requests.Response API the backend uses"""
+
+    def __init__(self, status_code: int, text: str, headers: Dict[str, str], url: str):
+        self.status_code = status_code
+        self.text = text
+        # Case-insensitive like requests' headers; servers vary in how they spell ETag etc.
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class AsyncHTTPClient:
+    """
+    One keep-alive connection pool shared by every endpoint
+
+    Sessions are created lazily, one per running event loop (aiohttp
+    sessions cannot cross loops; the discovery worker has its own loop), and
+    closed from the app's shutdown hook.
+    """
+
+    def __init__(self, total_connections: int = 100, keepalive_timeout: float = 30.0):
+        self.total_connections = total_connections
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._host_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.total_connections,
+                limit_per_host=DEFAULT_HOST_LIMIT,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            session = self._sessions[loop] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+            )
+            self._host_semaphores[loop] = {}
+        return session
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphores = loop_local(self._host_semaphores, dict)
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(
+                HOST_CONNECTION_LIMITS.get(host, DEFAULT_HOST_LIMIT)
+            )
+        return semaphores[host]
+
+    async def request(self, method: str, url: str, *, headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, Any]] = None, json: Any = None,
+                      data: Any = None, timeout: Optional[float] = None) -> HTTPResponse:
+        """
+        Send a request and read the whole body
+
+        Args:
+            timeout: Total seconds for this call; defaults to the host's entry in HOST_TIMEOUTS
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError on connection failures,
+            like requests raises on network errors
+        """
+        session = self._get_session()
+        host = urlparse(url).hostname or ""
+        if timeout is None:
+            timeout = HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+
+        async with self._host_semaphore(host):
+            async with session.request(
+                method, url, headers=headers, params=params, json=json, data=data,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                text = await response.text()
+                return HTTPResponse(response.status, text, response.headers, str(response.url))
+
+    async def get(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self):
+        """Close the running loop's pooled session"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+# Global instance
+http_client = AsyncHTTPClient()
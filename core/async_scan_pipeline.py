@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Async Scan Pipeline
+Bounded-concurrency scanning with per-provider token-bucket rate limits,
+jittered retry backoff and results streamed as they complete
+"""
+
+import asyncio
+import random
+import time
+import logging
+import threading
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def loop_local(store: "weakref.WeakKeyDictionary", factory: Callable[[], T]) -> T:
+    """
+    Per-event-loop instance of a loop-bound object (lock, semaphore, session)
+
+    The API loop and the discovery worker loop run side by side, so shared
+    services keep one such object per running loop instead of swapping a
+    single one back and forth.
+    """
+    loop = asyncio.get_running_loop()
+    value = store.get(loop)
+    if value is None:
+        value = store[loop] = factory()
+    return value
+
+
+def joinable(task: Optional[asyncio.Future]) -> bool:
+    """Whether an in-flight single-flight task can be awaited from the running loop"""
+    return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        # Token accounting is shared across loops/threads; the asyncio lock keeps each loop's waiters FIFO
+        self._state_lock = threading.Lock()
+        self._locks: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them"""
+        async with loop_local(self._locks, asyncio.Lock):
+            while True:
+                with self._state_lock:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait = (tokens - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def acquire_blocking(self, tokens: float = 1.0):
+        """acquire() for worker threads (e.g. the bar store's downloads), sharing the same tokens"""
+        while True:
+            with self._state_lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Requests per second per data provider (conservative free-tier limits)
+PROVIDER_RATE_LIMITS = {
+    "yfinance": {"rate": 8.0, "capacity": 16},
+    "polygon": {"rate": 5.0, "capacity": 5},
+    "alphavantage": {"rate": 0.08, "capacity": 1},
+    "finnhub": {"rate": 1.0, "capacity": 5},
+    "fmp": {"rate": 2.0, "capacity": 5},
+    "sec": {"rate": 8.0, "capacity": 10},
+    "openai": {"rate": 2.0, "capacity": 4},
+}
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """Get the shared token bucket for a data provider"""
+    if provider not in _rate_limiters:
+        limits = PROVIDER_RATE_LIMITS.get(provider, {"rate": 5.0, "capacity": 5})
+        _rate_limiters[provider] = TokenBucket(limits["rate"], limits["capacity"])
+    return _rate_limiters[provider]
+
+
+async def retry_with_backoff(func: Callable[..., Awaitable[R]], *args, retries: int = 3,
+                             base_delay: float = 0.5, max_delay: float = 8.0, **kwargs) -> R:
+    """
+    Await func(*args, **kwargs), retrying failures with full-jitter exponential backoff
+
+    The final failure is re-raised to the caller.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            logger.debug(f"Retry {attempt + 1}/{retries} after {delay:.2f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+async def call_blocking(provider: str, func: Callable[..., R], *args, retries: int = 2, **kwargs) -> R:
+    """Run a blocking provider call in a worker thread under that provider's rate limit"""
+    limiter = get_rate_limiter(provider)
+
+    async def attempt():
+        await limiter.acquire()
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return await retry_with_backoff(attempt, retries=retries)
+
+
+class AsyncScanner:
+    """Runs an async worker over many items with bounded concurrency"""
+
+    def __init__(self, concurrency: int = 16):
+        self.concurrency = concurrency
+        self.stats = {"scanned": 0, "failed": 0, "results": 0, "elapsed_seconds": 0.0}
+
+    async def stream(self, items: Iterable[T], worker: Callable[[T], Awaitable[Optional[R]]]) -> AsyncIterator[R]:
+        """
+        Yield non-None worker results in completion order
+
+        Worker exceptions are logged and counted, never propagated, so one bad
+        symbol cannot abort a universe scan.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def run(item: T) -> Optional[R]:
+            async with semaphore:
+                try:
+                    return await worker(item)
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    logger.debug(f"Scan worker failed for {item}: {e}")
+                    return None
+                finally:
+                    self.stats["scanned"] += 1
+
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result is not None:
+                    self.stats["results"] += 1
+                    yield result
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            self.stats["elapsed_seconds"] = round(time.monotonic() - started, 2)
+
+    async def collect(self, items: Iterable[T], worker: Callable[[T], Awaitable[Optional[R]]]) -> list:
+        """Run the scan to completion and return all results"""
+        return [result async for result in self.stream(items, worker)]
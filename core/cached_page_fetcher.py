@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Cached Page Fetcher
+Async HTML fetching for scrapers: bounded concurrency, ETag/Last-Modified
+revalidation, and parse results memoized by content hash so unchanged pages
+are never re-parsed
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_http_client import http_client
+from async_scan_pipeline import joinable, loop_local
+
+logger = logging.getLogger(__name__)
+
+# lxml is several times faster than html.parser when it's installed
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
+
+
+@dataclass
+class FetchedPage:
+    """One page body with how it was obtained"""
+    url: str
+    status_code: int
+    text: Optional[str]
+    content_hash: Optional[str]
+    not_modified: bool = False  # Server answered 304; text is the stored copy
+    changed: bool = True        # Body differs from the previous fetch
+
+    @property
+    def ok(self) -> bool:
+        return self.text is not None and self.status_code in (200, 304)
+
+
+class CachedPageFetcher:
+    """
+    Conditional-GET page cache with per-page parse memoization
+
+    The latest body, validators and parse results for each URL are persisted
+    under cache_dir. Concurrent requests for one URL share a fetch, and a page
+    fetched within reuse_seconds is served without another request, so
+    several parsers can read the same page during one sweep.
+    """
+
+    def __init__(self, cache_dir: str = "cache/pages", concurrency: int = 4,
+                 parser: Optional[str] = None, reuse_seconds: float = 60.0):
+        self.cache_dir = Path(cache_dir)
+        self.bodies_dir = self.cache_dir / "bodies"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "index.json"
+        self.memo_file = self.cache_dir / "parsed.json"
+        self.parser = parser or DEFAULT_HTML_PARSER
+        self.reuse_seconds = reuse_seconds
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.concurrency = concurrency
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._recent: Dict[str, FetchedPage] = {}
+        self.index: Dict[str, Dict[str, Any]] = self._load_json(self.index_file)
+        self.memo: Dict[str, Dict[str, Any]] = self._load_json(self.memo_file)
+        self.stats = {'requests': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0,
+                      'errors': 0, 'parses': 0, 'memo_hits': 0}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        return loop_local(self._semaphores, lambda: asyncio.Semaphore(self.concurrency))
+
+    # Fetching
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchedPage:
+        """Fetch a page, revalidating the stored copy when there is one"""
+        recent = self._recent.get(url)
+        if recent is not None and time.time() - self.index.get(url, {}).get('fetched_at', 0) < self.reuse_seconds:
+            return recent
+
+        task = self._inflight.get(url)
+        if not joinable(task):
+            task = asyncio.ensure_future(self._fetch(url, headers or {}))
+            self._inflight[url] = task
+        return await asyncio.shield(task)
+
+    async def fetch_all(self, urls: Iterable[str], headers: Optional[Dict[str, str]] = None) -> Dict[str, FetchedPage]:
+        urls = list(dict.fromkeys(urls))
+        pages = await asyncio.gather(*(self.fetch(url, headers) for url in urls))
+        return dict(zip(urls, pages))
+
+    async def _fetch(self, url: str, headers: Dict[str, str]) -> FetchedPage:
+        entry = self.index.get(url, {})
+        stored_text = self._read_body(url) if entry.get('content_hash') else None
+        request_headers = dict(headers)
+        if stored_text is not None:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            async with self._get_semaphore():
+                self.stats['requests'] += 1
+                response = await http_client.get(url, headers=request_headers)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"Error fetching {url}: {e}")
+            return FetchedPage(url, 0, None, None)
+
+        if response.status_code == 304 and stored_text is not None:
+            self.stats['not_modified'] += 1
+            page = FetchedPage(url, 304, stored_text, entry['content_hash'], not_modified=True, changed=False)
+        elif response.status_code == 200:
+            content_hash = hashlib.sha256(response.text.encode()).hexdigest()
+            changed = content_hash != entry.get('content_hash')
+            self.stats['changed' if changed else 'unchanged'] += 1
+            if changed:
+                self._write_body(url, response.text)
+            entry = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash,
+            }
+            page = FetchedPage(url, 200, response.text, content_hash, changed=changed)
+        else:
+            self.stats['errors'] += 1
+            return FetchedPage(url, response.status_code, None, None)
+
+        entry['fetched_at'] = time.time()
+        self.index[url] = entry
+        self._recent[url] = page
+        self._save_json(self.index_file, self.index)
+        return page
+
+    # Parsing
+
+    def soup(self, page: FetchedPage) -> BeautifulSoup:
+        return BeautifulSoup(page.text, self.parser)
+
+    async def memoized(self, key: str, page: FetchedPage, parse: Callable[[FetchedPage], Any],
+                       version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Results of parse(page), reused while the page content, parser and
+        version are unchanged
+
+        parse may be a plain or async function and must return JSON-serializable
+        data. version identifies anything else the parse depends on (e.g. the
+        ticker extractor's version), so results are re-parsed when it changes.
+        Each key keeps only the results for its latest content.
+        """
+        memo = self.memo.get(key)
+        if (memo and memo.get('content_hash') == page.content_hash and memo.get('parser') == self.parser
+                and memo.get('version') == version):
+            self.stats['memo_hits'] += 1
+            return memo['results']
+
+        results = parse(page)
+        if asyncio.iscoroutine(results):
+            results = await results
+        self.stats['parses'] += 1
+        self.memo[key] = {'content_hash': page.content_hash, 'parser': self.parser, 'version': version,
+                          'parsed_at': time.time(), 'results': results}
+        self._save_json(self.memo_file, self.memo)
+        return results
+
+    # Storage
+
+    def _body_path(self, url: str) -> Path:
+        return self.bodies_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.html"
+
+    def _read_body(self, url: str) -> Optional[str]:
+        try:
+            return self._body_path(url).read_text()
+        except OSError:
+            return None
+
+    def _write_body(self, url: str, text: str):
+        try:
+            self._body_path(url).write_text(text)
+        except OSError as e:
+            logger.warning(f"Error caching page body for {url}: {e}")
+
+    @staticmethod
+    def _load_json(path: Path) -> Dict[str, Any]:
+        try:
+            if path.exists():
+                with open(path) as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading {path}: {e}")
+        return {}
+
+    @staticmethod
+    def _save_json(path: Path, payload: Dict[str, Any]):
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Error saving {path}: {e}")
+
+    def get_fetcher_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'parser': self.parser, 'pages': len(self.index), 'memoized': len(self.memo)}
+
+
+# Global instance
+page_fetcher = CachedPageFetcher()
@@ -4,12 +4,81 @@ Collaborative AI Trading System
 Claude, ChatGPT, and Grok have actual conversations about explosive opportunities
 """
 
-import requests
 import json
 import asyncio
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional
 import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_http_client import http_client
+from async_scan_pipeline import AsyncScanner
+
+# Section header the batched prompts ask every model to emit per ticker
+SYMBOL_SECTION_PATTERN = re.compile(r'^\s*=+\s*SYMBOL:\s*([A-Z][A-Z0-9.\-]*)\s*=+\s*$', re.MULTILINE)
+
+
+@dataclass
+class AnalysisStep:
+    """One node of the conversation graph"""
+    name: str
+    agent: str
+    role: str
+    run: Callable[[Dict[str, Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+    depends_on: List[str] = field(default_factory=list)
+    deadline: float = 30.0
+
+
+async def run_step_graph(steps: List[AnalysisStep]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run steps as soon as their dependencies finish
+
+    Independent steps run concurrently. A step that fails or misses its
+    deadline yields a low-confidence placeholder instead of raising, so
+    dependents still run on whatever partial results exist.
+
+    Returns:
+        Results keyed by step name
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def execute(step: AnalysisStep) -> Dict[str, Any]:
+        if step.depends_on:
+            await asyncio.gather(*(tasks[dep] for dep in step.depends_on))
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(step.run(results), timeout=step.deadline)
+        except asyncio.TimeoutError:
+            result = {
+                "agent": step.agent,
+                "reasoning": f"{step.agent} analysis timed out after {step.deadline:.0f}s",
+                "confidence": 0.2,
+                "timestamp": datetime.now().isoformat(),
+                "source": "Timeout"
+            }
+        except Exception as e:
+            result = {
+                "agent": step.agent,
+                "reasoning": f"{step.agent} analysis failed - {str(e)}",
+                "confidence": 0.2,
+                "timestamp": datetime.now().isoformat(),
+                "source": "Exception"
+            }
+        result["elapsed_seconds"] = round(time.monotonic() - started, 2)
+        results[step.name] = result
+        return result
+
+    # Steps must be listed after their dependencies
+    for step in steps:
+        tasks[step.name] = asyncio.ensure_future(execute(step))
+    await asyncio.gather(*tasks.values())
+    return results
+
 
 class CollaborativeAISystem:
     """AI models have structured conversations about explosive trading opportunities"""
@@ -25,35 +94,53 @@ class CollaborativeAISystem:
         }
         
         self.conversation_history = []
+        
+        # Per-step deadlines (seconds); a late step falls back to a placeholder
+        self.step_deadlines = {
+            "claude": 25.0,
+            "grok": 20.0,
+            "chatgpt": 20.0,
+            "consensus": 25.0
+        }
     
     async def run_collaborative_analysis(self, symbol: str, context: str = "") -> Dict[str, Any]:
         """Run full collaborative analysis with AI models discussing together"""
         
         print(f"🎯 Starting collaborative AI analysis for {symbol}")
         
-        # Step 1: Claude provides catalyst analysis
-        claude_analysis = await self.get_claude_catalyst_analysis(symbol, context)
-        
-        # Step 2: Grok verifies Claude's data
-        grok_verification = await self.get_grok_verification(symbol, claude_analysis)
+        # Grok's fact-check and ChatGPT's technical read only need Claude,
+        # so they run side by side; the consensus waits for all three
+        steps = [
+            AnalysisStep("claude", "Claude", "Catalyst Intelligence",
+                         lambda r: self.get_claude_catalyst_analysis(symbol, context),
+                         deadline=self.step_deadlines["claude"]),
+            AnalysisStep("grok", "Grok", "Data Verification",
+                         lambda r: self.get_grok_verification(symbol, r["claude"]),
+                         depends_on=["claude"], deadline=self.step_deadlines["grok"]),
+            AnalysisStep("chatgpt", "ChatGPT", "Technical Execution",
+                         lambda r: self.get_chatgpt_technical_validation(symbol, r["claude"]),
+                         depends_on=["claude"], deadline=self.step_deadlines["chatgpt"]),
+            AnalysisStep("consensus", "Team Consensus", "Collaborative Consensus",
+                         lambda r: self.get_collaborative_consensus(symbol, r["claude"], r["grok"], r["chatgpt"]),
+                         depends_on=["claude", "grok", "chatgpt"], deadline=self.step_deadlines["consensus"]),
+        ]
         
-        # Step 3: ChatGPT provides technical validation based on Claude + Grok
-        chatgpt_technical = await self.get_chatgpt_technical_validation(symbol, claude_analysis, grok_verification)
-        
-        # Step 4: Final collaborative consensus
-        consensus = await self.get_collaborative_consensus(symbol, claude_analysis, grok_verification, chatgpt_technical)
+        started = time.monotonic()
+        results = await run_step_graph(steps)
+        consensus = results["consensus"]
         
         # Compile full conversation
         conversation_result = {
             "symbol": symbol,
             "context": context,
             "conversation_flow": [
-                {"step": 1, "agent": "Claude", "role": "Catalyst Intelligence", "analysis": claude_analysis},
-                {"step": 2, "agent": "Grok", "role": "Data Verification", "analysis": grok_verification},
-                {"step": 3, "agent": "ChatGPT", "role": "Technical Execution", "analysis": chatgpt_technical},
-                {"step": 4, "agent": "Team", "role": "Collaborative Consensus", "analysis": consensus}
+                {"step": i + 1, "agent": "Team" if step.name == "consensus" else step.agent,
+                 "role": step.role, "analysis": results[step.name]}
+                for i, step in enumerate(steps)
             ],
             "final_recommendation": consensus,
+            "partial": any(result.get("source") != "OpenRouter API" for result in results.values()),
+            "elapsed_seconds": round(time.monotonic() - started, 2),
             "conversation_timestamp": datetime.now().isoformat(),
             "source": "Real Collaborative AI Analysis"
         }
@@ -63,6 +150,218 @@ class CollaborativeAISystem:
         
         return conversation_result
     
+    async def stream_batch_collaborative_analysis(self, symbols: List[str], context: str = "",
+                                                  symbol_contexts: Optional[Dict[str, str]] = None,
+                                                  symbols_per_prompt: int = 4,
+                                                  concurrency: int = 3) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Collaborative analysis for many symbols, yielding each result as its group finishes
+        
+        Symbols are packed symbols_per_prompt at a time into one four-step
+        conversation, so the shared system prompt and market context are sent
+        once per group instead of once per symbol. Groups run with bounded
+        concurrency. Each yielded result has the same shape as
+        run_collaborative_analysis.
+        
+        Args:
+            symbols: Tickers to analyze
+            context: Market context shared by every symbol
+            symbol_contexts: Optional per-symbol notes (position size, P&L, catalyst)
+            symbols_per_prompt: Tickers packed into each model call (1 = unbatched)
+            concurrency: Groups in flight at once
+        """
+        symbol_contexts = symbol_contexts or {}
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        size = max(1, symbols_per_prompt)
+        groups = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+        
+        print(f"🎯 Starting batched collaborative AI analysis for {len(symbols)} symbols in {len(groups)} groups")
+        
+        async def analyze_group(group: List[str]) -> List[Dict[str, Any]]:
+            if len(group) == 1:
+                return [await self.run_collaborative_analysis(group[0], self._symbol_context(group[0], context, symbol_contexts))]
+            return await self._run_group_analysis(group, context, symbol_contexts)
+        
+        scanner = AsyncScanner(concurrency=concurrency)
+        async for group_results in scanner.stream(groups, analyze_group):
+            for result in group_results:
+                yield result
+    
+    async def run_batch_collaborative_analysis(self, symbols: List[str], context: str = "",
+                                               **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Run the batched analysis to completion; results keyed by symbol"""
+        return {
+            result["symbol"]: result
+            async for result in self.stream_batch_collaborative_analysis(symbols, context, **kwargs)
+        }
+    
+    async def _run_group_analysis(self, symbols: List[str], context: str,
+                                  symbol_contexts: Dict[str, str]) -> List[Dict[str, Any]]:
+        """One packed four-step conversation covering several symbols"""
+        
+        tickers = ", ".join(symbols)
+        notes = "\n".join(f"- {s}: {symbol_contexts[s]}" for s in symbols if symbol_contexts.get(s))
+        shared = f"Context: {context}" + (f"\n\nPer-ticker notes:\n{notes}" if notes else "")
+        response_format = (
+            "RESPONSE FORMAT: answer for EVERY ticker, each in its own section that starts with a "
+            "header line exactly like\n=== SYMBOL: TICKER ===\nand contains nothing about other tickers."
+        )
+        max_tokens = min(700 * len(symbols), 3500)
+        
+        def call(model: str, agent: str, prompt: str, step: str):
+            return self.call_ai_model(model, agent, prompt, max_tokens=max_tokens,
+                                      timeout=self.step_deadlines[step] * 2)
+        
+        def claude_prompt(r):
+            return call("anthropic/claude-3-sonnet", "Claude", f"""
+CLAUDE - CATALYST INTELLIGENCE OFFICER
+
+You are in a collaborative trading discussion with ChatGPT and Grok.
+
+MISSION: Analyze each of these tickers for EXPLOSIVE catalyst opportunities only: {tickers}
+
+FORBIDDEN: Do NOT recommend any large-cap stocks: AAPL, TSLA, NVDA, MSFT, GOOGL, AMZN, META, etc.
+
+FOR EACH TICKER:
+1. CATALYST IDENTIFICATION: specific upcoming catalyst, exact timeline (14-30 days), historical success rate
+2. EXPLOSIVE POTENTIAL: expected upside (minimum 20%), catalyst probability score (1-10, need 7+)
+3. RISK ASSESSMENT: failure scenario, major downside, risk mitigation
+4. RECOMMENDATION TO TEAM: BUY/SELL/AVOID with conviction, position size (3-15%), entry timing
+
+{shared}
+
+{response_format}
+            """, "claude")
+        
+        def grok_prompt(r):
+            return call("x-ai/grok-beta", "Grok", f"""
+GROK - DATA VERIFICATION & ACCURACY OFFICER
+
+You are reviewing Claude's catalyst analysis for {tickers}.
+
+CLAUDE'S ANALYSIS:
+{r["claude"].get('reasoning', 'No analysis provided')}
+
+FOR EACH TICKER:
+1. DATA VERIFICATION STATUS: ✅ CONFIRMED / ⚠️ CORRECTIONS NEEDED
+2. FACTUAL CORRECTIONS: errors in numbers, dates or probabilities
+3. MISSING INFORMATION and RISK GAPS
+4. RECOMMENDATION: APPROVE / REVISE / REJECT Claude's analysis
+
+{response_format}
+            """, "grok")
+        
+        def chatgpt_prompt(r):
+            return call("openai/gpt-4", "ChatGPT", f"""
+CHATGPT - TECHNICAL EXECUTION ANALYST
+
+You are reviewing the catalyst opportunities for {tickers} after Claude's analysis.
+
+CLAUDE'S CATALYST ANALYSIS:
+{r["claude"].get('reasoning', '')}
+
+FOR EACH TICKER:
+1. CHART SETUP: pattern, support/resistance, volume trend
+2. EXECUTION STRATEGY: entry, stop loss, profit targets
+3. SQUEEZE POTENTIAL: short interest, float, options activity
+4. POSITION MANAGEMENT: allocation (3-15%), risk-adjusted size
+5. FINAL TECHNICAL VERDICT: EXECUTE / WAIT / AVOID with confidence (1-10)
+
+{response_format}
+            """, "chatgpt")
+        
+        def consensus_prompt(r):
+            return call("anthropic/claude-3-sonnet", "Team Consensus", f"""
+COLLABORATIVE AI CONSENSUS for {tickers}
+
+CLAUDE (Catalyst Intelligence):
+{r["claude"].get('reasoning', '')}
+
+GROK (Data Verification):
+{r["grok"].get('reasoning', '')}
+
+CHATGPT (Technical Execution):
+{r["chatgpt"].get('reasoning', '')}
+
+FOR EACH TICKER give the unified recommendation (catalyst, event date, probability,
+expected upside, technical levels, risk factors, position size, entry and exit plan),
+DATA VERIFICATION status, TEAM CONSENSUS (APPROVED / NEEDS REVISION / REJECT),
+CONFIDENCE LEVEL (1-10) and implementation timeline.
+
+Only approve 70%+ catalyst probability, 20%+ upside, strong technical confirmation and
+verified data. Reject any large-cap recommendations.
+
+{response_format}
+            """, "consensus")
+        
+        steps = [
+            AnalysisStep("claude", "Claude", "Catalyst Intelligence", claude_prompt,
+                         deadline=self.step_deadlines["claude"] * 2),
+            AnalysisStep("grok", "Grok", "Data Verification", grok_prompt,
+                         depends_on=["claude"], deadline=self.step_deadlines["grok"] * 2),
+            AnalysisStep("chatgpt", "ChatGPT", "Technical Execution", chatgpt_prompt,
+                         depends_on=["claude"], deadline=self.step_deadlines["chatgpt"] * 2),
+            AnalysisStep("consensus", "Team Consensus", "Collaborative Consensus", consensus_prompt,
+                         depends_on=["claude", "grok", "chatgpt"], deadline=self.step_deadlines["consensus"] * 2),
+        ]
+        
+        started = time.monotonic()
+        results = await run_step_graph(steps)
+        elapsed = round(time.monotonic() - started, 2)
+        sections = {name: self._split_symbol_sections(result, symbols) for name, result in results.items()}
+        
+        conversations = []
+        for symbol in symbols:
+            flow = [
+                {"step": i + 1, "agent": "Team" if step.name == "consensus" else step.agent,
+                 "role": step.role, "analysis": sections[step.name][symbol]}
+                for i, step in enumerate(steps)
+            ]
+            conversation_result = {
+                "symbol": symbol,
+                "context": self._symbol_context(symbol, context, symbol_contexts),
+                "conversation_flow": flow,
+                "final_recommendation": sections["consensus"][symbol],
+                "partial": any(entry["analysis"].get("source") != "OpenRouter API" for entry in flow),
+                "elapsed_seconds": elapsed,
+                "batch_group": symbols,
+                "conversation_timestamp": datetime.now().isoformat(),
+                "source": "Real Collaborative AI Analysis (batched)"
+            }
+            self.conversation_history.append(conversation_result)
+            conversations.append(conversation_result)
+        
+        return conversations
+    
+    def _split_symbol_sections(self, result: Dict[str, Any], symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Split a packed model response into one agent result per symbol"""
+        text = result.get("reasoning", "")
+        headers = list(SYMBOL_SECTION_PATTERN.finditer(text))
+        bodies = {}
+        for i, match in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+            bodies.setdefault(match.group(1).upper(), text[match.end():end].strip())
+        
+        per_symbol = {}
+        for symbol in symbols:
+            # Fallback/timeout placeholders apply to every symbol as-is
+            entry = dict(result)
+            if result.get("source") == "OpenRouter API":
+                if symbol in bodies:
+                    entry["reasoning"] = bodies[symbol]
+                    entry["confidence"] = self._estimate_confidence(bodies[symbol])
+                else:
+                    entry["reasoning"] = f"{result.get('agent', 'Agent')} returned no section for {symbol}"
+                    entry["confidence"] = 0.2
+                    entry["source"] = "Batch Parse Error"
+            per_symbol[symbol] = entry
+        return per_symbol
+    
+    @staticmethod
+    def _symbol_context(symbol: str, context: str, symbol_contexts: Dict[str, str]) -> str:
+        note = symbol_contexts.get(symbol)
+        return f"{context}\n\n{note}" if note else context
+    
     async def get_claude_catalyst_analysis(self, symbol: str, context: str) -> Dict[str, Any]:
         """Claude analyzes for explosive catalyst opportunities"""
         
@@ -150,23 +449,31 @@ Be thorough and critical. Only approve high-quality explosive opportunities.
         
         return await self.call_ai_model("x-ai/grok-beta", "Grok", prompt)
     
-    async def get_chatgpt_technical_validation(self, symbol: str, claude_analysis: Dict[str, Any], grok_verification: Dict[str, Any]) -> Dict[str, Any]:
-        """ChatGPT validates technical execution strategy"""
+    async def get_chatgpt_technical_validation(self, symbol: str, claude_analysis: Dict[str, Any],
+                                               grok_verification: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        ChatGPT validates technical execution strategy
+        
+        The collaborative graph runs this alongside Grok's verification, so
+        grok_verification is optional and only included when already known.
+        """
         
         claude_reasoning = claude_analysis.get('reasoning', '')
-        grok_reasoning = grok_verification.get('reasoning', '')
+        grok_section = ""
+        if grok_verification:
+            grok_section = f"""
+GROK'S VERIFICATION:
+{grok_verification.get('reasoning', '')}
+"""
         
         prompt = f"""
 CHATGPT - TECHNICAL EXECUTION ANALYST
 
-You are reviewing the catalyst opportunity for {symbol} after Claude and Grok's analysis.
+You are reviewing the catalyst opportunity for {symbol} after Claude's analysis.
 
 CLAUDE'S CATALYST ANALYSIS:
 {claude_reasoning}
-
-GROK'S VERIFICATION:
-{grok_reasoning}
-
+{grok_section}
 YOUR TECHNICAL VALIDATION MISSION:
 1. Assess technical setup and chart patterns
 2. Analyze volume, momentum, and price action
@@ -262,7 +569,8 @@ CRITICAL: Reject any large-cap recommendations (AAPL, TSLA, NVDA, etc.)
         
         return await self.call_ai_model("anthropic/claude-3-sonnet", "Team Consensus", prompt)
     
-    async def call_ai_model(self, model: str, agent_name: str, prompt: str) -> Dict[str, Any]:
+    async def call_ai_model(self, model: str, agent_name: str, prompt: str,
+                            max_tokens: int = 800, timeout: float = 30) -> Dict[str, Any]:
         """Call OpenRouter API for AI model response"""
         
         if not self.openrouter_api_key:
@@ -292,35 +600,26 @@ CRITICAL: Reject any large-cap recommendations (AAPL, TSLA, NVDA, etc.)
                     },
                     {'role': 'user', 'content': prompt}
                 ],
-                'max_tokens': 800,
+                'max_tokens': max_tokens,
                 'temperature': 0.3
             }
             
-            response = requests.post(
+            response = await http_client.post(
                 'https://openrouter.ai/api/v1/chat/completions',
                 headers=headers,
                 json=payload,
-                timeout=30
+                timeout=timeout
             )
             
             if response.status_code == 200:
                 result = response.json()
                 ai_response = result['choices'][0]['message']['content']
                 
-                # Extract confidence level from response
-                confidence = 0.7  # Default
-                if 'high confidence' in ai_response.lower() or 'approved' in ai_response.lower():
-                    confidence = 0.85
-                elif 'low confidence' in ai_response.lower() or 'reject' in ai_response.lower():
-                    confidence = 0.3
-                elif 'needs revision' in ai_response.lower():
-                    confidence = 0.5
-                
                 return {
                     "agent": agent_name,
                     "model": model,
                     "reasoning": ai_response,
-                    "confidence": confidence,
+                    "confidence": self._estimate_confidence(ai_response),
                     "timestamp": datetime.now().isoformat(),
                     "source": "OpenRouter API"
                 }
@@ -351,6 +650,18 @@ CRITICAL: Reject any large-cap recommendations (AAPL, TSLA, NVDA, etc.)
                 "source": "Exception"
             }
     
+    @staticmethod
+    def _estimate_confidence(ai_response: str) -> float:
+        """Extract confidence level from response wording"""
+        text = ai_response.lower()
+        if 'high confidence' in text or 'approved' in text:
+            return 0.85
+        if 'low confidence' in text or 'reject' in text:
+            return 0.3
+        if 'needs revision' in text:
+            return 0.5
+        return 0.7  # Default
+    
     def save_conversation_log(self, filename: str = None):
         """Save conversation history to file"""
         if not filename:
@@ -387,6 +698,8 @@ async def main():
         print(f"\nStep {step['step']}: {step['agent']} ({step['role']})")
         print(f"Analysis: {step['analysis']['reasoning'][:200]}...")
     
+    print(f"\nElapsed: {result['elapsed_seconds']}s (partial: {result['partial']})")
+    
     # Save conversation log
     log_file = system.save_conversation_log()
     print(f"\n💾 Conversation saved to: {log_file}")
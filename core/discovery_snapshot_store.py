@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Discovery Snapshot Store
+Precomputed, versioned results for expensive discovery scans so API reads
+serve the latest snapshot instead of re-running the engines per request
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoverySnapshotStore:
+    """
+    Holds the latest snapshot per discovery producer
+
+    A snapshot's ETag is a hash of its payload, so unchanged scan results keep
+    the same ETag (and version) across refreshes. Refreshes are single-flight:
+    any number of concurrent requests or scheduler triggers share one scan.
+    The latest snapshots are persisted so a restart serves immediately.
+
+    Producers run on a dedicated event loop in a background thread: the
+    discovery engines still make blocking yfinance calls, and on the API
+    loop those would stall every endpoint for the length of a scan.
+    """
+
+    def __init__(self, snapshot_dir: str = "cache/discovery_snapshots", keep_versions: int = 5,
+                 run_in_worker: bool = True):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.keep_versions = keep_versions
+        self.run_in_worker = run_in_worker
+        self._worker_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_lock = threading.Lock()
+        self.producers: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {}
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self.status: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def register(self, name: str, producer: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Register a coroutine function that produces a snapshot payload"""
+        self.producers[name] = producer
+        self.status.setdefault(name, {'refreshes': 0, 'last_error': None, 'last_checked': None})
+        if name not in self.snapshots:
+            snapshot = self._load(name)
+            if snapshot:
+                self.snapshots[name] = snapshot
+
+    async def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Latest snapshot, running the producer only if none exists yet"""
+        snapshot = self.snapshots.get(name)
+        if snapshot is None:
+            snapshot = await self.refresh(name)
+        return snapshot
+
+    async def refresh(self, name: str) -> Optional[Dict[str, Any]]:
+        """Run the producer (joining an in-flight run) and return the latest snapshot"""
+        task = self._inflight.get(name)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._run_producer(name))
+            self._inflight[name] = task
+        return await asyncio.shield(task)
+
+    async def refresh_all(self):
+        await asyncio.gather(*(self.refresh(name) for name in self.producers), return_exceptions=True)
+
+    def _get_worker_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop on a background thread; kept for the life of the process so pooled clients are reused"""
+        with self._worker_lock:
+            if self._worker_loop is None or self._worker_loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="discovery-snapshots", daemon=True).start()
+                self._worker_loop = loop
+            return self._worker_loop
+
+    async def shutdown(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None):
+        """Run an async cleanup (e.g. closing pooled clients) on the worker loop, then stop it"""
+        loop = self._worker_loop
+        if loop is None or loop.is_closed():
+            return
+        if cleanup is not None:
+            try:
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(cleanup(), loop))
+            except Exception as e:
+                logger.debug(f"Discovery worker cleanup failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._worker_loop = None
+
+    async def _produce(self, name: str) -> Dict[str, Any]:
+        producer = self.producers[name]
+        if not self.run_in_worker:
+            return await producer()
+        future = asyncio.run_coroutine_threadsafe(producer(), self._get_worker_loop())
+        return await asyncio.wrap_future(future)
+
+    async def _run_producer(self, name: str) -> Optional[Dict[str, Any]]:
+        status = self.status[name]
+        started = time.time()
+        try:
+            payload = await self._produce(name)
+        except Exception as e:
+            payload = {'error': str(e)}
+        # Plain JSON from here on, identical whether served from memory or disk
+        payload = json.loads(json.dumps(payload, default=str))
+
+        status['last_checked'] = datetime.now().isoformat()
+        status['refreshes'] += 1
+        current = self.snapshots.get(name)
+
+        if payload.get('error') and current is not None:
+            # Keep serving the last good scan rather than an error
+            status['last_error'] = payload['error']
+            logger.warning(f"Discovery snapshot '{name}' refresh failed, keeping v{current['version']}: {payload['error']}")
+            return current
+
+        etag = self._etag(payload)
+        if current is not None and current['etag'] == etag:
+            current['checked_at'] = time.time()
+            status['last_error'] = None
+            return current
+
+        snapshot = {
+            'name': name,
+            'version': (current['version'] + 1) if current else 1,
+            'etag': etag,
+            'generated_at': time.time(),
+            'checked_at': time.time(),
+            'scan_seconds': round(time.time() - started, 2),
+            'payload': payload
+        }
+        self.snapshots[name] = snapshot
+        status['last_error'] = payload.get('error')
+        self._save(snapshot)
+        logger.info(f"Discovery snapshot '{name}' v{snapshot['version']} ({snapshot['scan_seconds']}s)")
+        return snapshot
+
+    @staticmethod
+    def _etag(payload: Dict[str, Any]) -> str:
+        # Per-item lastUpdated stamps change on every scan; leave them out of the hash
+        def strip(value):
+            if isinstance(value, dict):
+                return {k: strip(v) for k, v in value.items() if k != 'lastUpdated'}
+            if isinstance(value, list):
+                return [strip(v) for v in value]
+            return value
+        digest = hashlib.sha256(json.dumps(strip(payload), sort_keys=True, default=str).encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def snapshot_age(self, snapshot: Dict[str, Any]) -> float:
+        """Seconds since a scan last produced or confirmed this snapshot"""
+        return round(time.time() - snapshot.get('checked_at', snapshot['generated_at']), 1)
+
+    def _save(self, snapshot: Dict[str, Any]):
+        """Write the versioned snapshot and prune old versions"""
+        name = snapshot['name']
+        try:
+            path = self.snapshot_dir / f"{name}_v{snapshot['version']}.json"
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, default=str)
+            os.replace(tmp_path, path)
+
+            versions = sorted(self.snapshot_dir.glob(f"{name}_v*.json"), key=lambda p: int(p.stem.rsplit('_v', 1)[1]))
+            for old in versions[:-self.keep_versions]:
+                old.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Error saving discovery snapshot '{name}': {e}")
+
+    def _load(self, name: str) -> Optional[Dict[str, Any]]:
+        """Load the newest persisted version"""
+        try:
+            versions = sorted(self.snapshot_dir.glob(f"{name}_v*.json"), key=lambda p: int(p.stem.rsplit('_v', 1)[1]))
+            if versions:
+                with open(versions[-1]) as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading discovery snapshot '{name}': {e}")
+        return None
+
+    def get_store_stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                'version': self.snapshots[name]['version'] if name in self.snapshots else None,
+                'age_seconds': self.snapshot_age(self.snapshots[name]) if name in self.snapshots else None,
+                'refreshing': name in self._inflight and not self._inflight[name].done(),
+                **self.status.get(name, {})
+            }
+            for name in self.producers
+        }
+
+
+# Global instance
+discovery_snapshots = DiscoverySnapshotStore()
@@ -5,16 +5,23 @@ NO HARDCODED STOCKS - Finds opportunities from real market data dynamically
 """
 
 import os
+import sys
 import asyncio
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from dataclasses import dataclass
 import logging
 import requests
 import json
 
+sys.path.insert(0, os.path.dirname(__file__))
+from market_bar_store import bar_store, get_price_history
+from async_scan_pipeline import AsyncScanner
+from universe_service import universe_service
+from fundamentals_cache import fundamentals_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -43,6 +50,7 @@ class DynamicAlphaDiscoveryEngine:
         self.max_market_cap = 500_000_000_000  # $500B maximum
         self.min_volume_dollars = 1_000_000  # $1M minimum daily volume - much lower
         self.min_avg_volume = 50_000  # 50K shares minimum liquidity
+        self.scan_concurrency = 16  # In-flight ticker lookups; provider token buckets cap request rate
         
     async def discover_dynamic_opportunities(self) -> str:
         """Discover opportunities dynamically from market data"""
@@ -146,90 +154,55 @@ class DynamicAlphaDiscoveryEngine:
         return list(universe)[:1000]  # Massive universe for real alpha discovery
     
     async def get_sp500_stocks(self) -> List[str]:
-        """Get S&P 500 stocks from Wikipedia API"""
+        """Get S&P 500 stocks from the daily universe table"""
         try:
-            sp500_url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-            tables = pd.read_html(sp500_url)
-            sp500_df = tables[0]
-            sp500_tickers = sp500_df['Symbol'].tolist()
-            return sp500_tickers
+            await universe_service.ensure_fresh(['sp500'], reference=False)
+            return universe_service.get_list('sp500')
         except Exception as e:
             logger.warning(f"Failed to get S&P 500: {e}")
             return []
 
     async def get_russell2000_stocks(self) -> List[str]:
-        """Get Russell 2000 stocks from Wikipedia API"""
+        """Get Russell 2000 stocks from the daily universe table"""
         try:
-            # Russell 2000 list from Wikipedia
-            russell_url = "https://en.wikipedia.org/wiki/Russell_2000_Index"
-            tables = pd.read_html(russell_url)
-            # Find the table with stock symbols
-            for table in tables:
-                if 'Symbol' in table.columns or 'Ticker' in table.columns:
-                    symbol_col = 'Symbol' if 'Symbol' in table.columns else 'Ticker'
-                    russell_tickers = table[symbol_col].dropna().tolist()[:200]  # First 200
-                    return russell_tickers
-            return []
+            await universe_service.ensure_fresh(['russell2000'], reference=False)
+            return universe_service.get_list('russell2000')
         except Exception as e:
             logger.warning(f"Failed to get Russell 2000: {e}")
             return []
 
     async def get_nasdaq_stocks(self) -> List[str]:
-        """Get NASDAQ 100 stocks from Wikipedia API"""
+        """Get NASDAQ 100 stocks from the daily universe table"""
         try:
-            nasdaq_url = "https://en.wikipedia.org/wiki/Nasdaq-100"
-            tables = pd.read_html(nasdaq_url)
-            nasdaq_df = tables[4]  # Usually the 5th table has the components
-            nasdaq_tickers = nasdaq_df['Ticker'].tolist()
-            return nasdaq_tickers
+            await universe_service.ensure_fresh(['nasdaq100'], reference=False)
+            return universe_service.get_list('nasdaq100')
         except Exception as e:
             logger.warning(f"Failed to get NASDAQ: {e}")
             return []
     
     async def get_biotech_universe(self) -> List[str]:
-        """Get biotech stocks from REAL biotech indices and ETFs"""
+        """Get biotech stocks, validated against sector/industry in the universe table"""
         try:
-            # Get IBB (biotech ETF) holdings from real data
-            ibb = yf.Ticker("IBB")
-            # We'll scan biotech sector stocks by getting sector info
-            
-            # Alternative: Use a sample from known biotech companies and validate with real data
             biotech_sample = ['GILD', 'BIIB', 'REGN', 'VRTX', 'AMGN', 'MRNA', 'BNTX', 'NVAX']
-            validated_biotech = []
-            
-            for ticker in biotech_sample:
-                try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
-                    if info.get('sector') in ['Healthcare', 'Biotechnology'] or 'biotech' in info.get('industry', '').lower():
-                        validated_biotech.append(ticker)
-                except:
-                    continue
+            universe_service.register_list('biotech', biotech_sample)
+            await universe_service.ensure_fresh(['biotech'])
             
-            return validated_biotech
+            by_sector = universe_service.query(lists=['biotech'], sectors=['Healthcare', 'Biotechnology'])
+            by_industry = universe_service.query(lists=['biotech'], industry_like='biotech')
+            return list(dict.fromkeys(by_sector + by_industry))
         except Exception as e:
             logger.warning(f"Failed to get biotech: {e}")
             return []
 
     async def get_crypto_stocks(self) -> List[str]:
-        """Get crypto-related stocks from market data"""
+        """Get crypto-related stocks by business description in the universe table"""
         try:
-            # Scan for stocks with crypto exposure by checking business descriptions
             crypto_keywords = ['bitcoin', 'crypto', 'blockchain', 'digital asset']
             crypto_candidates = ['COIN', 'MSTR', 'RIOT', 'MARA', 'HOOD', 'SQ', 'TSLA']
+            universe_service.register_list('crypto', crypto_candidates)
+            await universe_service.ensure_fresh(['crypto'])
             
-            validated_crypto = []
-            for ticker in crypto_candidates:
-                try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
-                    business_summary = info.get('longBusinessSummary', '').lower()
-                    if any(keyword in business_summary for keyword in crypto_keywords):
-                        validated_crypto.append(ticker)
-                except:
-                    continue
-                    
-            return validated_crypto
+            return universe_service.query(lists=['crypto'], summary_keywords=crypto_keywords)
         except Exception as e:
             logger.warning(f"Failed to get crypto stocks: {e}")
             return []
@@ -244,8 +217,7 @@ class DynamicAlphaDiscoveryEngine:
             validated_ipos = []
             for ticker in recent_candidates:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="5d")
+                    hist = get_price_history(ticker, period="5d")
                     if not hist.empty:  # Stock is trading
                         validated_ipos.append(ticker)
                 except:
@@ -270,8 +242,7 @@ class DynamicAlphaDiscoveryEngine:
             
             for ticker in sample_tickers:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="2d")
+                    hist = get_price_history(ticker, period="2d")
                     if len(hist) >= 1:
                         current_price = hist['Close'].iloc[-1]
                         volume = hist['Volume'].iloc[-1]
@@ -299,8 +270,7 @@ class DynamicAlphaDiscoveryEngine:
             validated_leaders = []
             for ticker in sector_leaders:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="2d")
+                    hist = get_price_history(ticker, period="2d")
                     if not hist.empty:
                         validated_leaders.append(ticker)
                 except:
@@ -318,85 +288,101 @@ class DynamicAlphaDiscoveryEngine:
         candidates = []
         logger.info(f"🔍 Scanning {len(universe)} dynamically discovered stocks...")
         
-        # Process in batches to avoid overwhelming APIs
-        batch_size = 20
-        for i in range(0, len(universe), batch_size):
-            batch = universe[i:i + batch_size]
-            batch_candidates = await self.scan_batch_dynamic(batch)
-            candidates.extend(batch_candidates)
-            
-            logger.info(f"   ✓ Scanned {min(i + batch_size, len(universe))}/{len(universe)} stocks")
-            await asyncio.sleep(1)  # Rate limiting
+        async for candidate in self.stream_dynamic_universe(universe):
+            candidates.append(candidate)
         
         return candidates
     
+    async def stream_dynamic_universe(self, universe: List[str]) -> AsyncIterator[DynamicAlphaCandidate]:
+        """Scan the universe concurrently, yielding candidates as soon as each ticker finishes"""
+        
+        # Bars for the whole universe come from a few grouped downloads
+        try:
+            await asyncio.to_thread(bar_store.prefetch, universe, "30d")
+        except Exception as e:
+            logger.warning(f"Bulk bar prefetch failed, falling back to per-ticker history: {e}")
+        
+        scanner = AsyncScanner(concurrency=self.scan_concurrency)
+        progress_step = max(1, len(universe) // 10)
+        
+        async for candidate in scanner.stream(universe, self.scan_ticker_dynamic):
+            yield candidate
+            if scanner.stats["scanned"] % progress_step == 0:
+                logger.info(f"   ✓ Scanned {scanner.stats['scanned']}/{len(universe)} stocks")
+        
+        logger.info(f"   ✓ Scanned {scanner.stats['scanned']}/{len(universe)} stocks in {scanner.stats['elapsed_seconds']}s "
+                    f"({scanner.stats['failed']} failed)")
+    
     async def scan_batch_dynamic(self, tickers: List[str]) -> List[DynamicAlphaCandidate]:
         """Scan a batch of tickers dynamically"""
         
-        batch_candidates = []
+        scanner = AsyncScanner(concurrency=self.scan_concurrency)
+        return await scanner.collect(tickers, self.scan_ticker_dynamic)
+    
+    async def scan_ticker_dynamic(self, ticker: str) -> Optional[DynamicAlphaCandidate]:
+        """Fetch one ticker off the event loop and evaluate it"""
         
-        for ticker in tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="30d")
-                info = stock.info
-                
-                if hist.empty or len(hist) < 5:
-                    continue
-                
-                # Calculate real metrics
-                current_price = hist['Close'].iloc[-1]
-                prev_close = hist['Close'].iloc[-2]
-                price_change_pct = ((current_price - prev_close) / prev_close) * 100
-                
-                current_volume = hist['Volume'].iloc[-1]
-                avg_volume = hist['Volume'].iloc[:-1].mean()
-                volume_spike = current_volume / avg_volume if avg_volume > 0 else 1
-                
-                market_cap = info.get('marketCap', 0)
-                
-                # Apply dynamic quality filters
-                if not self.passes_dynamic_filters(current_price, market_cap, current_volume, avg_volume):
-                    continue
-                
-                # Determine discovery reason dynamically
-                reasons = []
-                confidence = 0.5
-                
-                if volume_spike >= 2.0:
-                    reasons.append(f"Volume spike {volume_spike:.1f}x")
-                    confidence += 0.2
-                
-                if abs(price_change_pct) >= 3:
-                    reasons.append(f"Price move {price_change_pct:+.1f}%")
-                    confidence += 0.2
-                
-                if current_volume * current_price >= self.min_volume_dollars:
-                    reasons.append("High dollar volume")
-                    confidence += 0.1
-                
-                # Create dynamic candidate
-                candidate = DynamicAlphaCandidate(
-                    ticker=ticker,
-                    company_name=info.get('longName', ticker),
-                    current_price=current_price,
-                    price_change_pct=price_change_pct,
-                    volume=current_volume,
-                    volume_spike=volume_spike,
-                    market_cap=market_cap,
-                    sector=info.get('sector', 'Unknown'),
-                    discovery_method="Dynamic Market Scan",
-                    confidence_score=min(confidence, 0.9),
-                    reason=", ".join(reasons) if reasons else "Quality metrics"
-                )
-                
-                batch_candidates.append(candidate)
-                
-            except Exception as e:
-                logger.debug(f"Error scanning {ticker}: {e}")
-                continue
+        # Usually served from the prefetched bar store; its downloads apply the yfinance rate limit
+        hist = await asyncio.to_thread(get_price_history, ticker, period="30d")
+        if hist.empty or len(hist) < 5:
+            return None
         
-        return batch_candidates
+        info = await fundamentals_cache.get_info_async(ticker)
+        return self.evaluate_dynamic_candidate(ticker, hist, info)
+    
+    def evaluate_dynamic_candidate(self, ticker: str, hist: pd.DataFrame, info: Dict[str, Any]) -> Optional[DynamicAlphaCandidate]:
+        """Apply the dynamic filters and scoring to fetched bars and info"""
+        
+        try:
+            # Calculate real metrics
+            current_price = hist['Close'].iloc[-1]
+            prev_close = hist['Close'].iloc[-2]
+            price_change_pct = ((current_price - prev_close) / prev_close) * 100
+            
+            current_volume = hist['Volume'].iloc[-1]
+            avg_volume = hist['Volume'].iloc[:-1].mean()
+            volume_spike = current_volume / avg_volume if avg_volume > 0 else 1
+            
+            market_cap = info.get('marketCap', 0)
+            
+            # Apply dynamic quality filters
+            if not self.passes_dynamic_filters(current_price, market_cap, current_volume, avg_volume):
+                return None
+            
+            # Determine discovery reason dynamically
+            reasons = []
+            confidence = 0.5
+            
+            if volume_spike >= 2.0:
+                reasons.append(f"Volume spike {volume_spike:.1f}x")
+                confidence += 0.2
+            
+            if abs(price_change_pct) >= 3:
+                reasons.append(f"Price move {price_change_pct:+.1f}%")
+                confidence += 0.2
+            
+            if current_volume * current_price >= self.min_volume_dollars:
+                reasons.append("High dollar volume")
+                confidence += 0.1
+            
+            # Create dynamic candidate
+            return DynamicAlphaCandidate(
+                ticker=ticker,
+                company_name=info.get('longName', ticker),
+                current_price=current_price,
+                price_change_pct=price_change_pct,
+                volume=current_volume,
+                volume_spike=volume_spike,
+                market_cap=market_cap,
+                sector=info.get('sector', 'Unknown'),
+                discovery_method="Dynamic Market Scan",
+                confidence_score=min(confidence, 0.9),
+                reason=", ".join(reasons) if reasons else "Quality metrics"
+            )
+            
+        except Exception as e:
+            logger.debug(f"Error scanning {ticker}: {e}")
+            return None
     
     def passes_dynamic_filters(self, price: float, market_cap: float, volume: int, avg_volume: float) -> bool:
         """Dynamic quality filters - MORE INCLUSIVE to catch explosive opportunities"""
@@ -503,16 +489,16 @@ async def get_dynamic_alpha_candidates() -> List[DynamicAlphaCandidate]:
         
         # Scan for opportunities  
         logger.info(f"🔍 Scanning {len(universe)} dynamically discovered stocks...")
-        candidates = []
+        await asyncio.to_thread(bar_store.prefetch, universe, "2d")
         
-        for i, ticker in enumerate(universe):
+        async def scan_ticker(ticker: str) -> Optional[DynamicAlphaCandidate]:
             try:
-                stock = yf.Ticker(ticker)
-                info = stock.info
-                hist = stock.history(period="2d")
+                hist = await asyncio.to_thread(get_price_history, ticker, period="2d")
                 
                 if hist.empty:
-                    continue
+                    return None
+                
+                info = await fundamentals_cache.get_info_async(ticker)
                 
                 current_price = hist['Close'].iloc[-1]
                 if len(hist) >= 2:
@@ -564,11 +550,14 @@ async def get_dynamic_alpha_candidates() -> List[DynamicAlphaCandidate]:
                         reason=reason
                     )
                     
-                    candidates.append(candidate)
+                    return candidate
                 
             except Exception as e:
                 logger.debug(f"Error processing {ticker}: {e}")
-                continue
+            return None
+        
+        scanner = AsyncScanner(concurrency=engine.scan_concurrency)
+        candidates = await scanner.collect(universe, scan_ticker)
         
         # Sort by confidence and volume
         candidates.sort(key=lambda x: (x.confidence_score, x.volume), reverse=True)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+EDGAR Index
+Local ticker <-> CIK map refreshed daily, plus a per-CIK submissions cache
+fetched with conditional GETs that only folds in filings newer than the last
+accession seen, so SEC sweeps cost a handful of requests
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_http_client import http_client
+from async_scan_pipeline import get_rate_limiter, joinable
+
+logger = logging.getLogger(__name__)
+
+COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
+
+
+def normalize_cik(cik: Any) -> str:
+    return str(cik).strip().lstrip('0').zfill(10)
+
+
+class EdgarIndex:
+    """
+    Ticker/CIK lookups and cached company submissions
+
+    The ticker map and each company's filing history are persisted under
+    cache_dir. Submissions are re-requested at most every
+    submissions_min_interval seconds, with If-None-Match/If-Modified-Since so
+    unchanged companies come back as 304s.
+    """
+
+    def __init__(self, cache_dir: str = "cache/edgar", tickers_max_age_hours: float = 24.0,
+                 submissions_min_interval: float = 600.0, keep_days: int = 120):
+        self.cache_dir = Path(cache_dir)
+        self.submissions_dir = self.cache_dir / "submissions"
+        self.submissions_dir.mkdir(parents=True, exist_ok=True)
+        self.tickers_file = self.cache_dir / "company_tickers.json"
+        self.tickers_max_age = tickers_max_age_hours * 3600
+        self.submissions_min_interval = submissions_min_interval
+        self.keep_days = keep_days
+        self.user_agent = os.getenv('SEC_USER_AGENT', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
+
+        self.ticker_to_cik: Dict[str, str] = {}
+        self.cik_to_ticker: Dict[str, str] = {}
+        self.cik_to_name: Dict[str, str] = {}
+        self._tickers_meta: Dict[str, Any] = {}
+        self._submissions: Dict[str, Dict[str, Any]] = {}
+        self._tickers_task: Optional[asyncio.Future] = None
+        self.stats = {'requests': 0, 'not_modified': 0, 'new_filings': 0, 'errors': 0}
+
+        self._load_tickers_file()
+
+    # Ticker map
+
+    def _load_tickers_file(self):
+        try:
+            if self.tickers_file.exists():
+                with open(self.tickers_file) as f:
+                    cached = json.load(f)
+                self._tickers_meta = cached.get('meta', {})
+                self._index_tickers(cached.get('data', {}))
+        except Exception as e:
+            logger.warning(f"Error loading EDGAR ticker map: {e}")
+
+    def _index_tickers(self, data: Dict[str, Any]):
+        ticker_to_cik, cik_to_ticker, cik_to_name = {}, {}, {}
+        for entry in data.values():
+            ticker = str(entry.get('ticker', '')).upper()
+            if not ticker:
+                continue
+            cik = normalize_cik(entry.get('cik_str', ''))
+            ticker_to_cik[ticker] = cik
+            # The file lists a company's primary ticker first
+            cik_to_ticker.setdefault(cik, ticker)
+            cik_to_name.setdefault(cik, entry.get('title', ''))
+        self.ticker_to_cik, self.cik_to_ticker, self.cik_to_name = ticker_to_cik, cik_to_ticker, cik_to_name
+
+    def _headers(self, meta: Dict[str, Any]) -> Dict[str, str]:
+        headers = {'User-Agent': self.user_agent, 'Accept': 'application/json'}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    async def _get(self, url: str, meta: Dict[str, Any]):
+        await get_rate_limiter('sec').acquire()
+        self.stats['requests'] += 1
+        return await http_client.get(url, headers=self._headers(meta))
+
+    async def load_tickers(self, force: bool = False):
+        """Refresh the ticker map if it's older than a day (shared by concurrent callers)"""
+        fresh = time.time() - self._tickers_meta.get('checked_at', 0) < self.tickers_max_age
+        if self.ticker_to_cik and fresh and not force:
+            return
+        if not joinable(self._tickers_task):
+            self._tickers_task = asyncio.ensure_future(self._refresh_tickers())
+        await asyncio.shield(self._tickers_task)
+
+    async def _refresh_tickers(self):
+        meta = self._tickers_meta if self.ticker_to_cik else {}
+        try:
+            response = await self._get(COMPANY_TICKERS_URL, meta)
+            if response.status_code == 304:
+                self.stats['not_modified'] += 1
+                self._tickers_meta['checked_at'] = time.time()
+                self._save_json(self.tickers_file, {'meta': self._tickers_meta, 'data': self._tickers_data()})
+                return
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            data = response.json()
+            self._index_tickers(data)
+            self._tickers_meta = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked_at': time.time(),
+            }
+            self._save_json(self.tickers_file, {'meta': self._tickers_meta, 'data': data})
+            logger.info(f"EDGAR ticker map refreshed: {len(self.ticker_to_cik)} tickers")
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"EDGAR ticker map refresh failed, using cached map: {e}")
+
+    def _tickers_data(self) -> Dict[str, Any]:
+        """Rebuild the company_tickers.json shape from the in-memory map"""
+        return {
+            str(i): {'cik_str': int(cik), 'ticker': ticker, 'title': self.cik_to_name.get(cik, '')}
+            for i, (ticker, cik) in enumerate(self.ticker_to_cik.items())
+        }
+
+    def get_cik(self, ticker: str) -> Optional[str]:
+        ticker = ticker.upper()
+        return self.ticker_to_cik.get(ticker) or self.ticker_to_cik.get(ticker.replace('.', '-'))
+
+    def get_ticker(self, cik: Any) -> Optional[str]:
+        return self.cik_to_ticker.get(normalize_cik(cik))
+
+    def is_known_ticker(self, ticker: str) -> bool:
+        return self.get_cik(ticker) is not None
+
+    # Submissions
+
+    def _submissions_file(self, cik: str) -> Path:
+        return self.submissions_dir / f"CIK{cik}.json"
+
+    def _load_submissions(self, cik: str) -> Dict[str, Any]:
+        state = self._submissions.get(cik)
+        if state is None:
+            state = {'meta': {}, 'filings': []}
+            path = self._submissions_file(cik)
+            try:
+                if path.exists():
+                    with open(path) as f:
+                        state = json.load(f)
+            except Exception as e:
+                logger.debug(f"Error loading submissions cache for CIK {cik}: {e}")
+            self._submissions[cik] = state
+        return state
+
+    async def refresh_submissions(self, cik: Any, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Fold a company's new filings into its cache and return just the new ones
+
+        Filings are kept newest first as {form, filingDate, accessionNumber,
+        primaryDocument, items}; anything older than keep_days is dropped.
+        """
+        cik = normalize_cik(cik)
+        state = self._load_submissions(cik)
+        meta = state['meta']
+        if not force and time.time() - meta.get('checked_at', 0) < self.submissions_min_interval:
+            return []
+
+        try:
+            response = await self._get(SUBMISSIONS_URL.format(cik=cik), meta)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"Error fetching submissions for CIK {cik}: {e}")
+            return []
+
+        meta['checked_at'] = time.time()
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+            self._save_json(self._submissions_file(cik), state)
+            return []
+        if response.status_code != 200:
+            self.stats['errors'] += 1
+            logger.debug(f"Submissions for CIK {cik} returned HTTP {response.status_code}")
+            return []
+
+        recent = response.json().get('filings', {}).get('recent', {})
+        seen = {filing['accessionNumber'] for filing in state['filings']}
+        last_seen = state['filings'][0]['accessionNumber'] if state['filings'] else None
+
+        new_filings = []
+        # EDGAR lists recent filings newest first; stop at the last one already processed
+        for i, accession in enumerate(recent.get('accessionNumber', [])):
+            if accession == last_seen:
+                break
+            if accession in seen:
+                continue
+            new_filings.append({
+                'form': self._column(recent, 'form', i),
+                'filingDate': self._column(recent, 'filingDate', i),
+                'accessionNumber': accession,
+                'primaryDocument': self._column(recent, 'primaryDocument', i),
+                'items': self._column(recent, 'items', i),
+            })
+
+        cutoff = datetime.now().timestamp() - self.keep_days * 86400
+        new_filings = [filing for filing in new_filings if self._filing_timestamp(filing) >= cutoff]
+        state['filings'] = new_filings + [
+            filing for filing in state['filings'] if self._filing_timestamp(filing) >= cutoff
+        ]
+        state['meta'] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': meta['checked_at'],
+        }
+        self._save_json(self._submissions_file(cik), state)
+        self.stats['new_filings'] += len(new_filings)
+        return new_filings
+
+    async def get_filings(self, cik: Any, since: Optional[datetime] = None,
+                          forms: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Cached filings for a company (refreshed first if due), optionally filtered"""
+        cik = normalize_cik(cik)
+        await self.refresh_submissions(cik)
+        forms = set(forms) if forms is not None else None
+        cutoff = since.timestamp() if since else 0
+        return [
+            filing for filing in self._load_submissions(cik)['filings']
+            if (forms is None or filing['form'] in forms) and self._filing_timestamp(filing) >= cutoff
+        ]
+
+    @staticmethod
+    def _column(recent: Dict[str, List[Any]], name: str, i: int) -> Any:
+        values = recent.get(name, [])
+        return values[i] if i < len(values) else None
+
+    @staticmethod
+    def _filing_timestamp(filing: Dict[str, Any]) -> float:
+        try:
+            return datetime.strptime(filing['filingDate'], '%Y-%m-%d').timestamp()
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _save_json(path: Path, payload: Dict[str, Any]):
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Error saving {path}: {e}")
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        checked_at = self._tickers_meta.get('checked_at')
+        return {
+            **self.stats,
+            'tickers': len(self.ticker_to_cik),
+            'ticker_map_age_hours': round((time.time() - checked_at) / 3600, 1) if checked_at else None,
+            'companies_cached': len(self._submissions),
+        }
+
+
+# Global instance
+edgar_index = EdgarIndex()
@@ -13,6 +13,7 @@ import asyncio
 import concurrent.futures
 from dataclasses import dataclass
 from api_cost_tracker import log_api_call
+from fundamentals_cache import fundamentals_cache
 
 @dataclass
 class StockAnalysis:
@@ -151,7 +152,11 @@ class EnhancedAPIIntegration:
         return price_data
     
     def get_fundamentals(self, symbol: str) -> Dict:
-        """Get fundamental data from FMP and Finnhub"""
+        """Get fundamental data from FMP and Finnhub (cached per field)"""
+        return fundamentals_cache.get(symbol, lambda: self._fetch_fundamentals(symbol), source="fmp_finnhub")
+    
+    def _fetch_fundamentals(self, symbol: str) -> Dict:
+        """Fetch fundamental data from FMP and Finnhub"""
         fundamentals = {}
         
         # FMP fundamentals
@@ -5,12 +5,21 @@ Focuses specifically on small/mid-cap stocks with catalyst-driven explosive pote
 NO LARGE-CAP SAFE STOCKS
 """
 
+import os
+import sys
 import yfinance as yf
 import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import asyncio
 
+sys.path.insert(0, os.path.dirname(__file__))
+from fundamentals_cache import fundamentals_cache
+
+# .info fields the catalyst scans read
+CATALYST_INFO_FIELDS = ['longName', 'marketCap', 'sector', 'industry', 'shortRatio', 'floatShares',
+                        'sharesOutstanding', 'trailingPE', 'priceToBook']
+
 class ExplosiveCatalystDiscovery:
     """Discovers explosive catalyst opportunities, avoiding large-cap safe stocks"""
     
@@ -85,7 +94,7 @@ class ExplosiveCatalystDiscovery:
                     continue
                     
                 stock = yf.Ticker(ticker)
-                info = stock.info
+                info = await fundamentals_cache.get_info_async(ticker, fields=CATALYST_INFO_FIELDS)
                 hist = stock.history(period="5d")
                 
                 # Check if it's actually small/mid-cap (< $50B market cap)
@@ -137,7 +146,7 @@ class ExplosiveCatalystDiscovery:
                     continue
                     
                 stock = yf.Ticker(ticker)
-                info = stock.info
+                info = await fundamentals_cache.get_info_async(ticker, fields=CATALYST_INFO_FIELDS)
                 hist = stock.history(period="10d")
                 
                 market_cap = info.get('marketCap', 0)
@@ -186,7 +195,7 @@ class ExplosiveCatalystDiscovery:
                     continue
                     
                 stock = yf.Ticker(ticker)
-                info = stock.info
+                info = await fundamentals_cache.get_info_async(ticker, fields=CATALYST_INFO_FIELDS)
                 hist = stock.history(period="5d")
                 
                 market_cap = info.get('marketCap', 0)
@@ -249,7 +258,7 @@ class ExplosiveCatalystDiscovery:
                     continue
                     
                 stock = yf.Ticker(ticker)
-                info = stock.info
+                info = await fundamentals_cache.get_info_async(ticker, fields=CATALYST_INFO_FIELDS)
                 hist = stock.history(period="30d")
                 
                 market_cap = info.get('marketCap', 0)
@@ -310,7 +319,7 @@ class ExplosiveCatalystDiscovery:
                     continue
                     
                 stock = yf.Ticker(ticker)
-                info = stock.info
+                info = await fundamentals_cache.get_info_async(ticker, fields=CATALYST_INFO_FIELDS)
                 hist = stock.history(period="10d")
                 
                 market_cap = info.get('marketCap', 0)
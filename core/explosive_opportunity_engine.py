@@ -15,6 +15,10 @@ import logging
 import asyncio
 import requests
 
+from market_bar_store import get_price_history
+from universe_service import universe_service
+from fundamentals_cache import fundamentals_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -239,9 +243,8 @@ class ExplosiveOpportunityEngine:
     async def analyze_explosive_potential(self, ticker: str, pattern_type: str, similar_to: str) -> Optional[ExplosiveOpportunity]:
         """Analyze a stock using your exact 10 explosive criteria"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            hist = stock.history(period="90d")  # Need 90 days for baseline
+            info = await fundamentals_cache.get_info_async(ticker)
+            hist = get_price_history(ticker, period="90d")  # Need 90 days for baseline
             
             if hist.empty or len(hist) < 21:
                 return None
@@ -568,22 +571,14 @@ class ExplosiveOpportunityEngine:
                 'LAZR', 'PATH', 'RKLB', 'DOCN', 'NET', 'SNOW'
             ]
             
-            # Verify they actually have low float using real data
-            verified_universe = []
-            for ticker in low_float_candidates:
-                try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
-                    float_shares = info.get('floatShares', 0)
-                    market_cap = info.get('marketCap', 0)
-                    
-                    # Real criteria: small float + reasonable market cap
-                    if float_shares > 0 and float_shares < 50_000_000 and market_cap > 10_000_000:
-                        verified_universe.append(ticker)
-                        if len(verified_universe) >= 10:
-                            break
-                except:
-                    continue
+            # Verify they actually have low float using the daily reference table
+            universe_service.register_list('low_float', low_float_candidates)
+            await universe_service.ensure_fresh(['low_float'])
+            
+            # Real criteria: small float + reasonable market cap
+            verified_universe = universe_service.query(
+                lists=['low_float'], max_float=50_000_000, min_market_cap=10_000_000, limit=10
+            )
             
             return verified_universe if verified_universe else low_float_candidates[:10]
             
@@ -605,8 +600,7 @@ class ExplosiveOpportunityEngine:
             universe = []
             for ticker in volume_candidates:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="5d")
+                    hist = get_price_history(ticker, period="5d")
                     
                     if len(hist) >= 2:
                         current_volume = hist['Volume'].iloc[-1]
@@ -632,14 +626,12 @@ class ExplosiveOpportunityEngine:
         try:
             # Scan NASDAQ 100 for momentum
             universe = []
-            nasdaq_url = "https://en.wikipedia.org/wiki/Nasdaq-100"
-            tables = pd.read_html(nasdaq_url)
-            nasdaq_tickers = tables[4]['Ticker'].tolist()[:30]  # First 30 for scanning
+            await universe_service.ensure_fresh(['nasdaq100'], reference=False)
+            nasdaq_tickers = universe_service.get_list('nasdaq100')[:30]  # First 30 for scanning
             
             for ticker in nasdaq_tickers:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="10d")
+                    hist = get_price_history(ticker, period="10d")
                     
                     if len(hist) >= 5:
                         recent_change = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-5]) / hist['Close'].iloc[-5]) * 100
@@ -661,41 +653,16 @@ class ExplosiveOpportunityEngine:
     async def get_short_squeeze_universe(self) -> List[str]:
         """Get universe using REAL market data for short interest"""
         try:
-            # Scan real market data for high short interest stocks
-            universe = []
+            # Highest short interest in the Russell 2000 list, from the daily reference table
+            await universe_service.ensure_fresh(['russell2000'])
             
-            # Get some real market tickers to scan
-            try:
-                russell_url = "https://en.wikipedia.org/wiki/Russell_2000_Index"
-                tables = pd.read_html(russell_url)
-                
-                for table in tables:
-                    if 'Symbol' in table.columns or 'Ticker' in table.columns:
-                        symbol_col = 'Symbol' if 'Symbol' in table.columns else 'Ticker'
-                        candidates = table[symbol_col].dropna().tolist()[:30]  # First 30 for scanning
-                        
-                        # Scan for real short interest
-                        for ticker in candidates:
-                            try:
-                                stock = yf.Ticker(ticker)
-                                info = stock.info
-                                short_percent = info.get('shortPercentOfFloat', 0)
-                                market_cap = info.get('marketCap', 0)
-                                
-                                # Real criteria: high short interest + reasonable market cap
-                                if short_percent > 10.0 and market_cap > 50_000_000:
-                                    universe.append(ticker)
-                                    if len(universe) >= 5:
-                                        break
-                            except:
-                                continue
-                        break
-                
-                return universe
-                
-            except:
-                # If scanning fails, return empty (no fake data)
-                return []
+            # Real criteria: high short interest (>10% of float) + reasonable market cap
+            universe = universe_service.query(
+                lists=['russell2000'], min_short_percent=0.10, min_market_cap=50_000_000,
+                order_by='short_percent_float', limit=5
+            )
+            
+            return universe
             
         except Exception as e:
             logger.warning(f"Short squeeze scanning failed: {e}")
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Fundamentals Cache
+Shared, persisted cache for yf.Ticker(...).info and other per-symbol
+fundamentals, with a TTL per field: identity fields (sector, industry) live
+for weeks, share structure for days, price-driven fields (market cap,
+valuation ratios) for minutes
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import yfinance as yf
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_scan_pipeline import AsyncScanner, call_blocking, joinable
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# (ttl_seconds, fields) - yfinance keys plus the snake_case keys other providers are cached under
+FIELD_TTL_GROUPS = [
+    (14 * DAY, [
+        'symbol', 'longName', 'shortName', 'sector', 'industry', 'exchange', 'quoteType', 'country',
+        'website', 'longBusinessSummary', 'fullTimeEmployees',
+        'company_name', 'description', 'employees',
+    ]),
+    (3 * DAY, [
+        'sharesOutstanding', 'floatShares', 'impliedSharesOutstanding', 'heldPercentInsiders',
+        'heldPercentInstitutions', 'float_shares', 'shares_outstanding',
+    ]),
+    (DAY, [
+        'sharesShort', 'sharesShortPriorMonth', 'shortRatio', 'shortPercentOfFloat', 'dateShortInterest',
+        'trailingEps', 'forwardEps', 'totalRevenue', 'revenueGrowth', 'earningsGrowth',
+        'earningsQuarterlyGrowth', 'profitMargins', 'grossMargins', 'operatingMargins', 'returnOnEquity',
+        'returnOnAssets', 'totalCash', 'totalDebt', 'debtToEquity', 'ebitda', 'freeCashflow', 'bookValue',
+        'dividendRate', 'dividendYield', 'beta', 'roa', 'roe', 'revenue_growth',
+    ]),
+    (6 * HOUR, [
+        'averageVolume', 'averageVolume10days', 'averageDailyVolume10Day', 'fiftyTwoWeekHigh',
+        'fiftyTwoWeekLow', 'fiftyDayAverage', 'twoHundredDayAverage', 'targetMeanPrice', 'targetHighPrice',
+        'targetLowPrice', 'recommendationKey', 'recommendationMean', 'numberOfAnalystOpinions',
+        '52_week_high', '52_week_low',
+    ]),
+    (30 * MINUTE, [
+        'marketCap', 'enterpriseValue', 'trailingPE', 'forwardPE', 'priceToBook', 'pegRatio',
+        'priceToSalesTrailing12Months', 'currentPrice', 'regularMarketPrice', 'previousClose',
+        'regularMarketPreviousClose', 'open', 'dayHigh', 'dayLow', 'volume', 'regularMarketVolume',
+        'bid', 'ask', 'market_cap', 'pe_ratio',
+    ]),
+]
+FIELD_TTLS = {field: ttl for ttl, fields in FIELD_TTL_GROUPS for field in fields}
+DEFAULT_FIELD_TTL = 6 * HOUR
+
+# Requested fields the provider didn't return are re-checked after this long
+MISSING_FIELD_TTL = HOUR
+
+# Stored marker for a requested field the provider didn't return (omitted from results, like .info)
+_MISSING = object()
+
+
+class FundamentalsCache:
+    """
+    Per-field fundamentals cache in SQLite (WAL) with an in-memory LRU in front
+
+    A lookup names the fields it needs; if they're all within their TTLs no
+    provider call is made. Otherwise one fetch refreshes every field the
+    provider returns. Failed fetches fall back to whatever is stored, so a
+    provider outage degrades to stale data instead of empty results.
+    """
+
+    def __init__(self, cache_dir: str = "cache", memory_symbols: int = 2000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        self.db_path = self.cache_dir / "fundamentals_cache.db"
+        self.memory_symbols = memory_symbols
+        self.lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], Dict[str, Tuple[Any, float]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.counters = {'hits': 0, 'fetches': 0, 'fetch_errors': 0, 'stale_served': 0, 'coalesced': 0}
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._setup_database()
+
+    def _setup_database(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                source TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (source, symbol, field)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fundamentals_expires_at ON fundamentals(expires_at)')
+        self.conn.commit()
+
+    # Storage
+
+    def _load(self, source: str, symbol: str) -> Dict[str, Tuple[Any, float]]:
+        """{field: (value, expires_at)} for one symbol; caller holds the lock"""
+        key = (source, symbol)
+        fields = self._memory.get(key)
+        if fields is None:
+            fields = {
+                field: (json.loads(value) if value is not None else _MISSING, expires_at)
+                for field, value, expires_at in self.conn.execute(
+                    'SELECT field, value, expires_at FROM fundamentals WHERE source = ? AND symbol = ?',
+                    (source, symbol))
+            }
+            self._memory[key] = fields
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_symbols:
+            self._memory.popitem(last=False)
+        return fields
+
+    def _lookup(self, source: str, symbol: str, fields: Optional[Iterable[str]]) -> Tuple[Dict[str, Any], bool]:
+        """Stored values and whether the requested fields (all stored ones if None) are fresh"""
+        now = time.time()
+        with self.lock:
+            stored = self._load(source, symbol)
+        values = {field: value for field, (value, _) in stored.items() if value is not _MISSING}
+        required = list(fields) if fields is not None else list(stored)
+        fresh = bool(stored) and all(field in stored and stored[field][1] > now for field in required)
+        return values, fresh
+
+    def store(self, symbol: str, values: Dict[str, Any], source: str = 'yfinance',
+              fields: Optional[Iterable[str]] = None):
+        """
+        Write provider output, each field expiring on its own TTL
+
+        Requested fields missing from the output are stored as missing with a
+        short TTL so repeat lookups don't refetch on every call.
+        """
+        now = time.time()
+        rows = {}
+        for field, value in values.items():
+            try:
+                encoded = json.dumps(value, default=str)
+            except (TypeError, ValueError):
+                continue
+            rows[field] = (encoded, now + FIELD_TTLS.get(field, DEFAULT_FIELD_TTL))
+        for field in fields or ():
+            if field not in rows:
+                rows[field] = (None, now + MISSING_FIELD_TTL)
+
+        with self.lock:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO fundamentals (source, symbol, field, value, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(source, symbol, field, encoded, now, expires_at) for field, (encoded, expires_at) in rows.items()])
+            self.conn.commit()
+            cached = self._load(source, symbol)
+            for field, (encoded, expires_at) in rows.items():
+                cached[field] = (json.loads(encoded) if encoded is not None else _MISSING, expires_at)
+
+    # Lookups
+
+    def get(self, symbol: str, fetch: Callable[[], Dict[str, Any]], fields: Optional[Iterable[str]] = None,
+            source: str = 'yfinance', force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Cached values for a symbol, calling fetch() only if a requested field has expired
+
+        Returns every stored field; the requested ones are fresh unless the fetch failed.
+        """
+        fields = list(fields) if fields is not None else None
+        values, fresh = self._lookup(source, symbol, fields)
+        if fresh and not force_refresh:
+            self.counters['hits'] += 1
+            return values
+        try:
+            self.counters['fetches'] += 1
+            fetched = fetch() or {}
+        except Exception as e:
+            return self._fetch_failed(source, symbol, values, e)
+        self.store(symbol, fetched, source=source, fields=fields)
+        return {**values, **fetched}
+
+    def get_info(self, symbol: str, fields: Optional[Iterable[str]] = None,
+                 force_refresh: bool = False) -> Dict[str, Any]:
+        """Drop-in for yf.Ticker(symbol).info that only hits Yahoo when needed"""
+        symbol = symbol.upper()
+        return self.get(symbol, lambda: yf.Ticker(symbol).info, fields=fields, force_refresh=force_refresh)
+
+    async def get_info_async(self, symbol: str, fields: Optional[Iterable[str]] = None,
+                             force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        get_info for async callers: fetches run in a worker thread under the
+        yfinance rate limit, and concurrent misses for one symbol share a fetch
+        """
+        symbol = symbol.upper()
+        fields = list(fields) if fields is not None else None
+        values, fresh = self._lookup('yfinance', symbol, fields)
+        if fresh and not force_refresh:
+            self.counters['hits'] += 1
+            return values
+
+        key = ('yfinance', symbol)
+        task = self._inflight.get(key)
+        if not joinable(task):
+            task = asyncio.ensure_future(self._fetch_info(symbol, fields))
+            self._inflight[key] = task
+        else:
+            self.counters['coalesced'] += 1
+        try:
+            fetched = await asyncio.shield(task)
+        except Exception as e:
+            return self._fetch_failed('yfinance', symbol, values, e)
+        finally:
+            if task.done() and self._inflight.get(key) is task:
+                del self._inflight[key]
+        return {**values, **fetched}
+
+    async def _fetch_info(self, symbol: str, fields: Optional[list]) -> Dict[str, Any]:
+        self.counters['fetches'] += 1
+        fetched = await call_blocking('yfinance', lambda: yf.Ticker(symbol).info) or {}
+        self.store(symbol, fetched, fields=fields)
+        return fetched
+
+    def _fetch_failed(self, source: str, symbol: str, values: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        self.counters['fetch_errors'] += 1
+        if values:
+            self.counters['stale_served'] += 1
+        logger.debug(f"Fundamentals fetch failed for {symbol} ({source}): {error}")
+        return values
+
+    async def warm(self, symbols: Iterable[str], fields: Optional[Iterable[str]] = None,
+                   concurrency: int = 8) -> Dict[str, Any]:
+        """Bulk-refresh symbols whose requested fields have expired (e.g. held positions, active universe)"""
+        fields = list(fields) if fields is not None else None
+        stale = [s for s in dict.fromkeys(s.upper() for s in symbols if s)
+                 if not self._lookup('yfinance', s, fields)[1]]
+
+        async def refresh(symbol: str):
+            await self.get_info_async(symbol, fields=fields, force_refresh=True)
+            return symbol
+
+        scanner = AsyncScanner(concurrency)
+        refreshed = await scanner.collect(stale, refresh)
+        return {'requested': len(stale), 'refreshed': len(refreshed), **scanner.stats}
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            symbols, fields = self.conn.execute(
+                'SELECT COUNT(DISTINCT source || ":" || symbol), COUNT(*) FROM fundamentals'
+            ).fetchone()
+            expired = self.conn.execute(
+                'SELECT COUNT(*) FROM fundamentals WHERE expires_at <= ?', (time.time(),)
+            ).fetchone()[0]
+        lookups = self.counters['hits'] + self.counters['fetches']
+        return {
+            **self.counters,
+            'hit_rate': round(self.counters['hits'] / lookups * 100, 1) if lookups else 0.0,
+            'symbols': symbols,
+            'fields': fields,
+            'expired_fields': expired,
+            'memory_symbols': len(self._memory),
+        }
+
+
+# Global instance
+fundamentals_cache = FundamentalsCache()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Live Quote Stream
+One upstream market-data websocket feeding last-trade/last-quote state for
+held and watched symbols, with coalesced, throttled diffs pushed to every
+connected dashboard websocket
+"""
+
+import os
+import json
+import asyncio
+import random
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QuoteState:
+    """Latest trade and quote for one symbol"""
+    symbol: str
+    price: Optional[float] = None
+    last_size: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    bid_size: Optional[float] = None
+    ask_size: Optional[float] = None
+    streamed_volume: float = 0.0  # Shares traded since the stream connected
+    trade_time: Optional[str] = None
+    quote_time: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class AlpacaQuoteSource:
+    """
+    Alpaca market-data websocket (trades + quotes)
+
+    Keeps a single connection open, re-subscribing on reconnect, with
+    jittered exponential backoff between attempts.
+    """
+
+    def __init__(self, url: Optional[str] = None, api_key: Optional[str] = None,
+                 secret_key: Optional[str] = None):
+        self.url = url or os.getenv('ALPACA_DATA_STREAM_URL', 'wss://stream.data.alpaca.markets/v2/iex')
+        self.api_key = api_key or os.getenv('ALPACA_API_KEY')
+        self.secret_key = secret_key or os.getenv('ALPACA_SECRET_KEY')
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._subscribed: Set[str] = set()
+
+    async def run(self, streamer: "LiveQuoteStreamer"):
+        """Stream until cancelled, feeding raw messages to the streamer"""
+        attempt = 0
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.url, heartbeat=20) as ws:
+                        await ws.send_json({'action': 'auth', 'key': self.api_key, 'secret': self.secret_key})
+                        self._ws = ws
+                        self._subscribed = set()
+                        await self.subscribe(streamer.symbols)
+                        attempt = 0
+                        logger.info(f"Live quote stream connected ({self.url})")
+
+                        async for message in ws:
+                            if message.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            for item in json.loads(message.data):
+                                if item.get('T') == 'error':
+                                    logger.warning(f"Live quote stream error: {item}")
+                                else:
+                                    streamer.handle_message(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live quote stream disconnected: {e}")
+            finally:
+                self._ws = None
+
+            attempt += 1
+            await asyncio.sleep(random.uniform(0, min(60.0, 2 ** attempt)))
+
+    async def subscribe(self, symbols: Iterable[str]):
+        """Add symbols to the upstream subscription"""
+        new_symbols = sorted(set(symbols) - self._subscribed)
+        if self._ws is None or self._ws.closed or not new_symbols:
+            return
+        await self._ws.send_json({'action': 'subscribe', 'trades': new_symbols, 'quotes': new_symbols})
+        self._subscribed.update(new_symbols)
+
+
+class ReplayQuoteSource:
+    """
+    Local stand-in for the upstream stream
+
+    Replays recorded messages in Alpaca's wire format (one JSON object or
+    list per line when loaded from a file), paced by their timestamps.
+
+    Args:
+        messages: Messages to replay (dicts with T/S/p/s/bp/ap/... fields)
+        path: JSONL file of recorded messages, used when messages is None
+        speed: Replay speed multiplier; 0 replays as fast as possible
+        loop: Start over when the recording ends
+    """
+
+    def __init__(self, messages: Optional[List[Dict[str, Any]]] = None, path: Optional[str] = None,
+                 speed: float = 1.0, loop: bool = False):
+        if messages is None:
+            messages = []
+            if path:
+                with open(path) as f:
+                    for line in f:
+                        if line.strip():
+                            item = json.loads(line)
+                            messages.extend(item if isinstance(item, list) else [item])
+        self.messages = messages
+        self.speed = speed
+        self.loop = loop
+
+    async def run(self, streamer: "LiveQuoteStreamer"):
+        while True:
+            previous = None
+            for item in self.messages:
+                timestamp = _parse_time(item.get('t'))
+                if self.speed and previous is not None and timestamp is not None:
+                    await asyncio.sleep(max(0.0, (timestamp - previous).total_seconds()) / self.speed)
+                previous = timestamp or previous
+                streamer.handle_message(item)
+                await asyncio.sleep(0)
+            if not self.loop:
+                return
+
+    async def subscribe(self, symbols: Iterable[str]):
+        pass
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        # Alpaca sends RFC3339 with nanoseconds; trim to microseconds
+        value = value.replace('Z', '+00:00')
+        if '.' in value:
+            head, tail = value.split('.', 1)
+            fraction = ''.join(c for c in tail if c.isdigit())
+            zone = tail[len(fraction):]
+            value = f"{head}.{fraction[:6]}{zone}"
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class LiveQuoteStreamer:
+    """
+    Fan-out hub between one upstream quote source and many websocket clients
+
+    Upstream messages only update in-memory state and mark the symbol dirty.
+    A broadcaster wakes every throttle_seconds and sends each client one
+    'stock_update' per changed symbol, carrying only the fields that changed
+    since the previous broadcast.
+    """
+
+    def __init__(self, throttle_seconds: float = 1.0, send_timeout: float = 5.0):
+        self.throttle_seconds = throttle_seconds
+        self.send_timeout = send_timeout
+        self.source = None
+        self.symbols: Set[str] = set()
+        self.quotes: Dict[str, QuoteState] = {}
+        self.clients: Set[Any] = set()
+        self._dirty: Set[str] = set()
+        self._last_sent: Dict[str, Dict[str, Any]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {'messages': 0, 'broadcasts': 0, 'updates_sent': 0, 'clients_dropped': 0}
+
+    @staticmethod
+    def default_source():
+        """Replay of LIVE_QUOTES_REPLAY_FILE when set, else Alpaca when keys are configured"""
+        replay_file = os.getenv('LIVE_QUOTES_REPLAY_FILE')
+        if replay_file:
+            return ReplayQuoteSource(path=replay_file, loop=True)
+        if os.getenv('ALPACA_API_KEY') and os.getenv('ALPACA_SECRET_KEY'):
+            return AlpacaQuoteSource()
+        return None
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self, symbols: Iterable[str] = (), source=None):
+        """Start the upstream stream and broadcaster (idempotent)"""
+        await self.watch(symbols)
+        if self.running:
+            return
+        self.source = source or self.source or self.default_source()
+        if self.source is None:
+            logger.info("Live quote stream disabled: no upstream source configured")
+            return
+        self._tasks = [
+            asyncio.ensure_future(self.source.run(self)),
+            asyncio.ensure_future(self._broadcast_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def watch(self, symbols: Iterable[str]):
+        """Add held/watched symbols to the upstream subscription"""
+        new_symbols = {s.upper() for s in symbols if s} - self.symbols
+        if not new_symbols:
+            return
+        self.symbols.update(new_symbols)
+        if self.source is not None:
+            await self.source.subscribe(self.symbols)
+
+    def handle_message(self, item: Dict[str, Any]):
+        """Fold one upstream trade/quote message into state"""
+        symbol = item.get('S')
+        kind = item.get('T')
+        if not symbol or symbol not in self.symbols or kind not in ('t', 'q'):
+            return
+
+        state = self.quotes.get(symbol)
+        if state is None:
+            state = self.quotes[symbol] = QuoteState(symbol=symbol)
+
+        if kind == 't':
+            state.price = item.get('p', state.price)
+            state.last_size = item.get('s', state.last_size)
+            state.streamed_volume += item.get('s', 0) or 0
+            state.trade_time = item.get('t', state.trade_time)
+        else:
+            state.bid = item.get('bp', state.bid)
+            state.ask = item.get('ap', state.ask)
+            state.bid_size = item.get('bs', state.bid_size)
+            state.ask_size = item.get('as', state.ask_size)
+            state.quote_time = item.get('t', state.quote_time)
+
+        self.stats['messages'] += 1
+        self._dirty.add(symbol)
+
+    def _collect_diffs(self) -> List[Dict[str, Any]]:
+        """Changed fields per dirty symbol since the last broadcast"""
+        dirty, self._dirty = self._dirty, set()
+        diffs = []
+        for symbol in sorted(dirty):
+            current = self.quotes[symbol].to_dict()
+            previous = self._last_sent.get(symbol, {})
+            changed = {k: v for k, v in current.items() if previous.get(k) != v}
+            if changed:
+                changed['symbol'] = symbol
+                diffs.append(changed)
+                self._last_sent[symbol] = current
+        return diffs
+
+    async def _broadcast_loop(self):
+        while True:
+            await asyncio.sleep(self.throttle_seconds)
+            if not self._dirty:
+                continue
+            diffs = self._collect_diffs()
+            if diffs and self.clients:
+                timestamp = datetime.now().isoformat()
+                messages = [
+                    json.dumps({'type': 'stock_update', 'data': diff, 'timestamp': timestamp})
+                    for diff in diffs
+                ]
+                await asyncio.gather(*(self._send(client, messages) for client in list(self.clients)))
+                self.stats['broadcasts'] += 1
+                self.stats['updates_sent'] += len(messages) * len(self.clients)
+
+    async def _send(self, client, messages: List[str]):
+        try:
+            for message in messages:
+                await asyncio.wait_for(client.send_text(message), timeout=self.send_timeout)
+        except Exception:
+            # Slow or closed client: drop it rather than stall everyone else
+            self.clients.discard(client)
+            self.stats['clients_dropped'] += 1
+
+    async def connect_client(self, client):
+        """Register a websocket client and send it the current state"""
+        self.clients.add(client)
+        timestamp = datetime.now().isoformat()
+        for state in list(self.quotes.values()):
+            await client.send_text(json.dumps({'type': 'stock_update', 'data': state.to_dict(), 'timestamp': timestamp}))
+
+    def disconnect_client(self, client):
+        self.clients.discard(client)
+
+    def get_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current state for every symbol with data"""
+        return {symbol: state.to_dict() for symbol, state in self.quotes.items()}
+
+    def get_stream_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'running': self.running,
+            'source': type(self.source).__name__ if self.source else None,
+            'symbols': len(self.symbols),
+            'clients': len(self.clients),
+        }
+
+
+# Global instance
+live_quote_streamer = LiveQuoteStreamer()
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Market Bar Store
+Process-wide OHLCV bar cache shared by every engine that needs price history.
+Bars are kept per symbol and interval in columnar files under cache/bars and
+only the missing date range is ever downloaded from Yahoo.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, List
+
+import pandas as pd
+import yfinance as yf
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_scan_pipeline import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401 - only needed for Parquet support
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+# Relative price difference on an overlapping bar that means Yahoo re-adjusted the history
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+class MarketBarStore:
+    """
+    Append-only local store of OHLCV bars keyed by (symbol, interval)
+
+    Each symbol keeps one columnar file (Parquet when pyarrow is installed,
+    pickle otherwise) plus a small JSON sidecar recording the date range that
+    has already been downloaded. Requests for overlapping windows are served
+    from memory/disk; only the uncovered head or tail is fetched.
+
+    Bars are split/dividend adjusted, so a new corporate action changes every
+    earlier bar. Each merge checks the overlapping bars and the new bars'
+    actions; when the adjustment basis moved, the symbol's whole covered
+    range is downloaded again instead of mixing the two scales.
+    """
+
+    def __init__(self, cache_dir: str = "cache/bars", tail_refresh_seconds: int = 300):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.tail_refresh_seconds = tail_refresh_seconds  # How long the latest bar is trusted
+        self.extension = "parquet" if PARQUET_AVAILABLE else "pkl"
+
+        self.lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._meta: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        self.stats = {"memory_hits": 0, "disk_loads": 0, "downloads": 0, "readjusted": 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_history(self, ticker: str, period: Optional[str] = "3mo", start=None, end=None,
+                    interval: str = "1d") -> pd.DataFrame:
+        """
+        Get OHLCV bars for a ticker, mirroring yf.Ticker(t).history(...)
+
+        Args:
+            ticker: Stock symbol
+            period: yfinance style period ("5d", "3mo", "1y", "ytd", "max").
+                    "Nd" periods return the last N bars. Ignored if start is given.
+            start: Window start (date, datetime or ISO string)
+            end: Window end, exclusive like yfinance (defaults to now)
+            interval: Bar interval ("1d", "1h", ...)
+
+        Returns:
+            DataFrame of bars (empty if nothing is available)
+        """
+        symbol = ticker.upper().strip()
+        window_start, window_end, tail_bars = self._resolve_window(period, start, end)
+        key = (symbol, interval)
+
+        with self._get_key_lock(key):
+            frame = self._ensure_range(key, window_start, window_end)
+
+        if frame.empty:
+            return frame.copy()
+
+        window = frame.loc[(frame.index >= window_start) & (frame.index <= window_end)]
+        if tail_bars:
+            window = window.tail(tail_bars)
+        return window.copy()
+
+    def get_many(self, tickers: List[str], period: Optional[str] = "3mo", start=None, end=None,
+                 interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """Get history for several tickers, skipping symbols with no data"""
+        results = {}
+        for ticker in tickers:
+            data = self.get_history(ticker, period=period, start=start, end=end, interval=interval)
+            if not data.empty:
+                results[ticker] = data
+        return results
+
+    def prefetch(self, tickers: List[str], period: Optional[str] = "3mo", start=None, end=None,
+                 interval: str = "1d", chunk_size: int = 50) -> int:
+        """
+        Bulk-load bars for many tickers with grouped yf.download requests
+
+        Symbols whose window is already covered are skipped; the rest are
+        fetched chunk_size symbols per request and merged into the store.
+
+        Returns:
+            Number of symbols that had to be downloaded
+        """
+        window_start, window_end, _ = self._resolve_window(period, start, end)
+        symbols = list(dict.fromkeys(t.upper().strip() for t in tickers))
+        needed = [s for s in symbols if not self._is_covered((s, interval), window_start, window_end)]
+
+        for i in range(0, len(needed), chunk_size):
+            chunk = needed[i:i + chunk_size]
+            try:
+                get_rate_limiter("yfinance").acquire_blocking()
+                data = yf.download(
+                    chunk,
+                    start=window_start.strftime("%Y-%m-%d"),
+                    end=(window_end + timedelta(days=1)).strftime("%Y-%m-%d"),
+                    interval=interval,
+                    group_by="ticker",
+                    auto_adjust=True,
+                    actions=True,
+                    threads=True,
+                    progress=False,
+                )
+                with self.lock:
+                    self.stats["downloads"] += 1
+            except Exception as e:
+                logger.warning(f"Bulk bar download failed for {len(chunk)} symbols: {e}")
+                continue
+
+            for symbol in chunk:
+                try:
+                    if isinstance(data.columns, pd.MultiIndex):
+                        if symbol not in data.columns.get_level_values(0):
+                            continue
+                        bars = data[symbol]
+                    else:
+                        bars = data
+                    bars = self._normalize(bars.dropna(how="all"))
+                except Exception as e:
+                    logger.debug(f"No bulk bars for {symbol}: {e}")
+                    continue
+                if bars.empty:
+                    # yf.download returns an all-NaN column for a failed or rate-limited symbol;
+                    # leave its coverage alone so get_history fetches it on its own
+                    logger.debug(f"No bulk bars for {symbol}")
+                    continue
+                with self._get_key_lock((symbol, interval)):
+                    self._merge((symbol, interval), bars, window_start, window_end)
+
+        return len(needed)
+
+    def get_panel(self, tickers: List[str], period: Optional[str] = "3mo", start=None, end=None,
+                  interval: str = "1d", chunk_size: int = 50) -> pd.DataFrame:
+        """
+        Get a wide (time x symbol) frame for many tickers
+
+        Columns are a (symbol, field) MultiIndex, the same layout yf.download
+        returns with group_by="ticker". Missing symbols are left out.
+        """
+        self.prefetch(tickers, period=period, start=start, end=end, interval=interval, chunk_size=chunk_size)
+        frames = self.get_many(tickers, period=period, start=start, end=end, interval=interval)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def invalidate(self, ticker: str, interval: str = "1d"):
+        """Drop a symbol from the store (memory and disk)"""
+        key = (ticker.upper().strip(), interval)
+        with self._get_key_lock(key):
+            self._frames.pop(key, None)
+            self._meta.pop(key, None)
+            for path in (self._data_path(key), self._meta_path(key)):
+                if path.exists():
+                    path.unlink()
+
+    def get_store_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        with self.lock:
+            return {
+                "symbols_in_memory": len(self._frames),
+                "storage_format": self.extension,
+                "cache_dir": str(self.cache_dir),
+                **self.stats,
+            }
+
+    # ------------------------------------------------------------------
+    # Range bookkeeping
+    # ------------------------------------------------------------------
+
+    def _ensure_range(self, key: Tuple[str, str], window_start: datetime, window_end: datetime) -> pd.DataFrame:
+        """Make sure [window_start, window_end] is covered, downloading only the gaps"""
+        frame, meta = self._load(key)
+        now = datetime.now()
+        missing: List[Tuple[datetime, datetime]] = []
+
+        if meta is None:
+            missing.append((window_start, window_end))
+        else:
+            covered_start = datetime.fromisoformat(meta["covered_start"])
+            covered_end = datetime.fromisoformat(meta["covered_end"])
+            fetched_at = datetime.fromisoformat(meta["fetched_at"])
+
+            if window_start < covered_start:
+                missing.append((window_start, covered_start))
+
+            tail_is_stale = (now - fetched_at).total_seconds() > self.tail_refresh_seconds
+            if window_end > covered_end and tail_is_stale:
+                # Re-request from the last stored bar so a partial session bar gets replaced
+                tail_start = frame.index[-1].to_pydatetime() if not frame.empty else covered_end
+                missing.append((min(tail_start, covered_end), window_end))
+
+        if not missing:
+            return frame
+
+        fetched_pieces = []
+        for fetch_start, fetch_end in missing:
+            fetched = self._download(key, fetch_start, fetch_end)
+            # history() swallows most errors and returns an empty frame, so an empty head or
+            # tail fetch for a stored symbol counts as a failure too
+            if fetched is None or (fetched.empty and meta is not None):
+                # Leave coverage untouched so the next call retries
+                return frame
+            if not fetched.empty:
+                fetched_pieces.append(fetched)
+
+        new_bars = pd.concat(fetched_pieces) if fetched_pieces else pd.DataFrame()
+        return self._merge(key, new_bars, window_start, window_end)
+
+    def _merge(self, key: Tuple[str, str], new_bars: pd.DataFrame, window_start: datetime,
+               window_end: datetime) -> pd.DataFrame:
+        """Append freshly downloaded bars and extend the covered range (caller holds the key lock)"""
+        frame, meta = self._load(key)
+        now = datetime.now()
+
+        if meta is not None and self._adjustment_changed(frame, new_bars):
+            return self._readjust(key, new_bars, window_start, window_end, meta)
+
+        pieces = [p for p in (frame, new_bars) if not p.empty]
+        merged = pd.concat(pieces) if pieces else frame
+        if not merged.empty:
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        new_meta = {
+            "covered_start": min([window_start] + ([datetime.fromisoformat(meta["covered_start"])] if meta else [])).isoformat(),
+            "covered_end": max([min(window_end, now)] + ([datetime.fromisoformat(meta["covered_end"])] if meta else [])).isoformat(),
+            "fetched_at": now.isoformat(),
+            "rows": len(merged),
+        }
+        self._save(key, merged, new_meta)
+        return merged
+
+    @staticmethod
+    def _adjustment_changed(frame: pd.DataFrame, new_bars: pd.DataFrame) -> bool:
+        """Whether new bars are on a different split/dividend adjustment basis than the stored ones"""
+        if frame.empty or new_bars.empty:
+            return False
+        stored_start, stored_end = frame.index[0], frame.index[-1]
+
+        # A split or dividend the stored bars didn't know about re-adjusts every earlier bar.
+        # Actions before the first stored bar (a head extension) were never stored, so they
+        # aren't evidence of a change; later adjustments would show up on the stored range.
+        for column in ("Stock Splits", "Dividends"):
+            if column in new_bars.columns:
+                actions = new_bars.loc[new_bars.index >= stored_start, column].fillna(0)
+                known = frame[column].reindex(actions.index).fillna(0) if column in frame.columns else 0
+                if ((actions != 0) & (actions != known)).any():
+                    return True
+
+        # Otherwise compare prices on the overlapping bars. The last stored bar may have been a
+        # partial session when saved, so only its Open is compared; earlier bars compare Close too.
+        overlap = frame.index.intersection(new_bars.index)
+        for column, dates in (("Open", overlap), ("Close", overlap[overlap < stored_end])):
+            if len(dates) == 0 or column not in frame.columns or column not in new_bars.columns:
+                continue
+            old = frame.loc[dates, column].astype(float)
+            new = new_bars.loc[dates, column].astype(float)
+            drift = ((new - old).abs() / old.abs().where(old != 0)).dropna()
+            if (drift > ADJUSTMENT_TOLERANCE).any():
+                return True
+        return False
+
+    def _readjust(self, key: Tuple[str, str], new_bars: pd.DataFrame, window_start: datetime,
+                  window_end: datetime, meta: Dict[str, Any]) -> pd.DataFrame:
+        """Replace a symbol's stored bars after a corporate action (caller holds the key lock)"""
+        now = datetime.now()
+        covered_start = min(window_start, datetime.fromisoformat(meta["covered_start"]))
+        covered_end = max(min(window_end, now), datetime.fromisoformat(meta["covered_end"]))
+        logger.info(f"Adjustment basis changed for {key[0]}; re-downloading bars from {covered_start:%Y-%m-%d}")
+        with self.lock:
+            self.stats["readjusted"] += 1
+
+        refetched = self._download(key, covered_start, covered_end)
+        if refetched is None or refetched.empty:
+            # Keep only the new-basis bars; the uncovered head is fetched again on the next request
+            bars = new_bars[~new_bars.index.duplicated(keep="last")].sort_index()
+            covered_start = bars.index[0].to_pydatetime()
+        else:
+            bars = refetched
+        new_meta = {
+            "covered_start": covered_start.isoformat(),
+            "covered_end": covered_end.isoformat(),
+            "fetched_at": now.isoformat(),
+            "rows": len(bars),
+        }
+        self._save(key, bars, new_meta)
+        return bars
+
+    def _is_covered(self, key: Tuple[str, str], window_start: datetime, window_end: datetime) -> bool:
+        """Check whether a window can be served without touching the network"""
+        with self._get_key_lock(key):
+            frame, meta = self._load(key)
+        if meta is None:
+            return False
+        if window_start < datetime.fromisoformat(meta["covered_start"]):
+            return False
+        if window_end <= datetime.fromisoformat(meta["covered_end"]):
+            return True
+        fetched_at = datetime.fromisoformat(meta["fetched_at"])
+        return (datetime.now() - fetched_at).total_seconds() <= self.tail_refresh_seconds
+
+    def _resolve_window(self, period: Optional[str], start, end) -> Tuple[datetime, datetime, Optional[int]]:
+        """Translate period/start/end arguments into an absolute window"""
+        now = datetime.now()
+        window_end = pd.Timestamp(end).to_pydatetime() if end is not None else now
+        if end is not None and window_end.time() == datetime.min.time():
+            # Match yfinance: a bare end date is exclusive
+            window_end = window_end - timedelta(microseconds=1)
+        window_end = min(window_end, now)
+
+        if start is not None:
+            return pd.Timestamp(start).to_pydatetime(), window_end, None
+
+        period = (period or "1mo").lower()
+        if period == "max":
+            return datetime(1970, 1, 1), window_end, None
+        if period == "ytd":
+            return datetime(window_end.year, 1, 1), window_end, None
+
+        match = _PERIOD_PATTERN.match(period)
+        if not match:
+            raise ValueError(f"Unsupported period: {period}")
+
+        count, unit = int(match.group(1)), match.group(2)
+        day_start = window_end.replace(hour=0, minute=0, second=0, microsecond=0)
+        if unit == "d":
+            # Pad calendar days to cover weekends/holidays, then keep the last N bars
+            return day_start - timedelta(days=count * 7 // 5 + 7), window_end, count
+        if unit == "wk":
+            return day_start - timedelta(weeks=count), window_end, None
+        if unit == "mo":
+            return (pd.Timestamp(day_start) - pd.DateOffset(months=count)).to_pydatetime(), window_end, None
+        return (pd.Timestamp(day_start) - pd.DateOffset(years=count)).to_pydatetime(), window_end, None
+
+    # ------------------------------------------------------------------
+    # Network and disk
+    # ------------------------------------------------------------------
+
+    def _download(self, key: Tuple[str, str], start: datetime, end: datetime) -> Optional[pd.DataFrame]:
+        """Download bars for [start, end] from Yahoo; None signals a failed request"""
+        symbol, interval = key
+        try:
+            # Only real network calls spend yfinance tokens; memory/disk hits are free
+            get_rate_limiter("yfinance").acquire_blocking()
+            data = yf.Ticker(symbol).history(
+                start=start.strftime("%Y-%m-%d"),
+                end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+                interval=interval,
+            )
+            with self.lock:
+                self.stats["downloads"] += 1
+            return self._normalize(data)
+        except Exception as e:
+            logger.debug(f"Bar download failed for {symbol} {interval}: {e}")
+            return None
+
+    @staticmethod
+    def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+        """Use tz-naive exchange-local timestamps so windows compare cleanly"""
+        if data is None or data.empty:
+            return pd.DataFrame()
+        data = data.copy()
+        if getattr(data.index, "tz", None) is not None:
+            data.index = data.index.tz_localize(None)
+        data.index.name = "Date"
+        return data
+
+    def _load(self, key: Tuple[str, str]) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        """Load a symbol from memory, falling back to disk"""
+        if key in self._frames:
+            with self.lock:
+                self.stats["memory_hits"] += 1
+            return self._frames[key], self._meta.get(key)
+
+        frame, meta = pd.DataFrame(), None
+        data_path, meta_path = self._data_path(key), self._meta_path(key)
+        try:
+            if data_path.exists() and meta_path.exists():
+                frame = pd.read_parquet(data_path) if self.extension == "parquet" else pd.read_pickle(data_path)
+                with open(meta_path, "r") as f:
+                    meta = json.load(f)
+                with self.lock:
+                    self.stats["disk_loads"] += 1
+        except Exception as e:
+            logger.warning(f"Discarding unreadable bar file for {key[0]}: {e}")
+            frame, meta = pd.DataFrame(), None
+
+        if meta is not None:
+            self._frames[key] = frame
+            self._meta[key] = meta
+        return frame, meta
+
+    def _save(self, key: Tuple[str, str], frame: pd.DataFrame, meta: Dict[str, Any]):
+        """Persist a symbol atomically and refresh the in-memory copy"""
+        self._frames[key] = frame
+        self._meta[key] = meta
+
+        data_path, meta_path = self._data_path(key), self._meta_path(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            tmp_data = data_path.with_suffix(data_path.suffix + ".tmp")
+            if self.extension == "parquet":
+                frame.to_parquet(tmp_data)
+            else:
+                frame.to_pickle(tmp_data)
+            os.replace(tmp_data, data_path)
+
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            with open(tmp_meta, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_meta, meta_path)
+        except Exception as e:
+            logger.warning(f"Error saving bars for {key[0]}: {e}")
+
+    def _data_path(self, key: Tuple[str, str]) -> Path:
+        symbol, interval = key
+        return self.cache_dir / interval / f"{symbol}.{self.extension}"
+
+    def _meta_path(self, key: Tuple[str, str]) -> Path:
+        symbol, interval = key
+        return self.cache_dir / interval / f"{symbol}.json"
+
+    def _get_key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self.lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+
+# Global bar store instance
+bar_store = MarketBarStore()
+
+
+def get_price_history(ticker: str, period: Optional[str] = "3mo", start=None, end=None,
+                      interval: str = "1d") -> pd.DataFrame:
+    """Convenience wrapper around the shared bar store"""
+    return bar_store.get_history(ticker, period=period, start=start, end=end, interval=interval)
@@ -7,12 +7,17 @@ Provides comprehensive performance analysis and improvement recommendations
 import os
 import json
 import asyncio
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 import time
 import calendar
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from market_bar_store import bar_store, get_price_history
+from risk_metrics import compute_risk_metrics, returns_from_closes
 
 @dataclass
 class PerformanceMetrics:
@@ -91,6 +96,11 @@ class PerformanceReportEngine:
             "AMD", "BLNK", "BTBT", "BYND", "CHPT", "CRWV", "EAT", 
             "ETSY", "LIXT", "NVAX", "SMCI", "SOUN", "VIGL", "WOLF"
         ]
+        
+        # Shared price panel for the period metrics (covers the annual window)
+        self.panel_lookback_days = 380
+        self.panel_max_age = 300
+        self._price_panel: Optional[Dict[str, Any]] = None
     
     async def generate_daily_report(self) -> Dict[str, Any]:
         """Generate comprehensive daily performance report"""
@@ -384,11 +394,8 @@ class PerformanceReportEngine:
         
         try:
             # Get market data
-            spy = yf.Ticker("SPY")
-            vix = yf.Ticker("VIX")
-            
-            spy_data = spy.history(period="30d")
-            vix_data = vix.history(period="30d")
+            spy_data = get_price_history("SPY", period="30d")
+            vix_data = get_price_history("VIX", period="30d")
             
             # Determine market trend
             if len(spy_data) >= 2:
@@ -442,8 +449,7 @@ class PerformanceReportEngine:
             # Check for winning positions with detailed analysis
             for ticker in self.current_positions:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="5d")  # Get more data for context
+                    hist = get_price_history(ticker, period="5d")  # Get more data for context
                     
                     if len(hist) >= 2:
                         daily_return = (hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]
@@ -495,8 +501,7 @@ class PerformanceReportEngine:
                 })
             
             # Check for market timing success
-            spy = yf.Ticker("SPY")
-            spy_hist = spy.history(period="2d")
+            spy_hist = get_price_history("SPY", period="2d")
             if len(spy_hist) >= 2:
                 spy_return = (spy_hist['Close'].iloc[-1] - spy_hist['Close'].iloc[-2]) / spy_hist['Close'].iloc[-2]
                 
@@ -531,8 +536,7 @@ class PerformanceReportEngine:
             # Check for losing positions with detailed analysis
             for ticker in self.current_positions:
                 try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="5d")  # Get more data for context
+                    hist = get_price_history(ticker, period="5d")  # Get more data for context
                     
                     if len(hist) >= 2:
                         daily_return = (hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]
@@ -590,8 +594,7 @@ class PerformanceReportEngine:
                 # Compare against major indices
                 indices = ["SPY", "QQQ", "IWM"]
                 for index in indices:
-                    index_ticker = yf.Ticker(index)
-                    index_hist = index_ticker.history(period="2d")
+                    index_hist = get_price_history(index, period="2d")
                     
                     if len(index_hist) >= 2:
                         index_return = (index_hist['Close'].iloc[-1] - index_hist['Close'].iloc[-2]) / index_hist['Close'].iloc[-2]
@@ -995,38 +998,57 @@ Full report saved to reports directory.
             return False
     
     # Real-time calculations methods
+    def get_price_panel(self) -> Dict[str, pd.DataFrame]:
+        """
+        Aligned daily Close/Volume panels (date x symbol) for positions plus SPY
+
+        One panel covers the longest report window and is shared by every
+        metric and every report period until it's panel_max_age seconds old,
+        so each symbol's history is loaded once per report run.
+        """
+        symbols = list(dict.fromkeys(self.current_positions + ["SPY"]))
+        cached = self._price_panel
+        if (cached and cached["symbols"] == symbols
+                and time.time() - cached["built_at"] < self.panel_max_age):
+            return cached
+        
+        panel = bar_store.get_panel(symbols, start=datetime.now() - timedelta(days=self.panel_lookback_days))
+        if panel.empty:
+            closes = volumes = pd.DataFrame(columns=symbols, dtype=float)
+        else:
+            closes = panel.xs("Close", axis=1, level=1).reindex(columns=symbols)
+            volumes = panel.xs("Volume", axis=1, level=1).reindex(columns=symbols)
+        
+        self._price_panel = {"symbols": symbols, "built_at": time.time(), "closes": closes, "volumes": volumes}
+        return self._price_panel
+    
+    def get_period_window(self, start_date, end_date) -> Dict[str, pd.DataFrame]:
+        """Close/Volume panels sliced to [start_date, end_date]"""
+        panel = self.get_price_panel()
+        closes = panel["closes"]
+        mask = (closes.index >= pd.Timestamp(start_date)) & (closes.index <= pd.Timestamp(end_date))
+        return {"closes": closes.loc[mask], "volumes": panel["volumes"].loc[mask]}
+    
+    def calculate_period_returns(self, start_date, end_date, symbols: Optional[List[str]] = None) -> pd.Series:
+        """Percent return over the window per symbol (symbols with fewer than 2 closes are dropped)"""
+        closes = self.get_period_window(start_date, end_date)["closes"]
+        closes = closes[symbols if symbols is not None else self.current_positions]
+        has_data = closes.count() >= 2
+        first = closes.bfill().iloc[0] if len(closes) else pd.Series(dtype=float)
+        last = closes.ffill().iloc[-1] if len(closes) else pd.Series(dtype=float)
+        return ((last - first) / first * 100)[has_data].dropna()
+    
     async def calculate_portfolio_return(self, start_date, end_date) -> float:
         """Calculate actual portfolio return for period"""
         try:
-            total_return = 0.0
-            total_weight = 0.0
-            
-            # Calculate weighted return for each position
-            for ticker in self.current_positions:
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(start=start_date, end=end_date)
-                    
-                    if len(hist) >= 2:
-                        start_price = hist['Close'].iloc[0]
-                        end_price = hist['Close'].iloc[-1]
-                        position_return = ((end_price - start_price) / start_price) * 100
-                        
-                        # Equal weighting for now (could be enhanced with actual position sizes)
-                        weight = 1.0 / len(self.current_positions)
-                        total_return += position_return * weight
-                        total_weight += weight
-                        
-                        print(f"   {ticker}: {position_return:.1f}% return")
-                        
-                except Exception as e:
-                    print(f"   Error calculating return for {ticker}: {e}")
-                    continue
+            returns = self.calculate_period_returns(start_date, end_date)
+            for ticker, position_return in returns.items():
+                print(f"   {ticker}: {position_return:.1f}% return")
             
-            if total_weight > 0:
-                return total_return
-            else:
+            # Equal weighting for now (could be enhanced with actual position sizes)
+            if returns.empty:
                 return 0.0
+            return float(returns.sum() / len(self.current_positions))
                 
         except Exception as e:
             print(f"Error calculating portfolio return: {e}")
@@ -1035,10 +1057,9 @@ Full report saved to reports directory.
     async def calculate_benchmark_return(self, start_date, end_date) -> float:
         """Calculate benchmark (SPY) return for period"""
         try:
-            spy = yf.Ticker("SPY")
-            hist = spy.history(start=start_date, end=end_date)
-            if len(hist) >= 2:
-                benchmark_return = ((hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
+            returns = self.calculate_period_returns(start_date, end_date, ["SPY"])
+            if not returns.empty:
+                benchmark_return = float(returns["SPY"])
                 print(f"   SPY benchmark return: {benchmark_return:.1f}%")
                 return benchmark_return
         except Exception as e:
@@ -1048,38 +1069,25 @@ Full report saved to reports directory.
     async def find_best_performer(self, start_date, end_date) -> Dict[str, Any]:
         """Find actual best performing position"""
         try:
-            best_performer = {"ticker": "", "return": float('-inf'), "reason": ""}
+            returns = self.calculate_period_returns(start_date, end_date)
+            if returns.empty:
+                return {"ticker": "None", "return": 0, "reason": "No data"}
             
-            for ticker in self.current_positions:
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(start=start_date, end=end_date)
-                    
-                    if len(hist) >= 2:
-                        position_return = ((hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
-                        
-                        if position_return > best_performer["return"]:
-                            # Get reason from news/volume
-                            volume_spike = hist['Volume'].iloc[-1] / hist['Volume'].iloc[:-1].mean() if len(hist) > 1 else 1
-                            
-                            if volume_spike > 2:
-                                reason = f"High volume ({volume_spike:.1f}x normal)"
-                            elif position_return > 5:
-                                reason = "Strong momentum"
-                            else:
-                                reason = "Market outperformance"
-                                
-                            best_performer = {
-                                "ticker": ticker,
-                                "return": position_return,
-                                "reason": reason
-                            }
-                            
-                except Exception as e:
-                    print(f"Error analyzing {ticker}: {e}")
-                    continue
+            ticker = returns.idxmax()
+            position_return = float(returns[ticker])
+            
+            # Get reason from news/volume
+            volume = self.get_period_window(start_date, end_date)["volumes"][ticker].dropna()
+            volume_spike = volume.iloc[-1] / volume.iloc[:-1].mean() if len(volume) > 1 else 1
+            
+            if volume_spike > 2:
+                reason = f"High volume ({volume_spike:.1f}x normal)"
+            elif position_return > 5:
+                reason = "Strong momentum"
+            else:
+                reason = "Market outperformance"
             
-            return best_performer if best_performer["ticker"] else {"ticker": "None", "return": 0, "reason": "No data"}
+            return {"ticker": ticker, "return": position_return, "reason": reason}
             
         except Exception as e:
             print(f"Error finding best performer: {e}")
@@ -1088,36 +1096,22 @@ Full report saved to reports directory.
     async def find_worst_performer(self, start_date, end_date) -> Dict[str, Any]:
         """Find actual worst performing position"""
         try:
-            worst_performer = {"ticker": "", "return": float('inf'), "reason": ""}
+            returns = self.calculate_period_returns(start_date, end_date)
+            if returns.empty:
+                return {"ticker": "None", "return": 0, "reason": "No data"}
             
-            for ticker in self.current_positions:
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(start=start_date, end=end_date)
-                    
-                    if len(hist) >= 2:
-                        position_return = ((hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
-                        
-                        if position_return < worst_performer["return"]:
-                            # Get reason from sector/market conditions
-                            if position_return < -5:
-                                reason = "Significant decline"
-                            elif position_return < -2:
-                                reason = "Underperforming market"
-                            else:
-                                reason = "Minor weakness"
-                                
-                            worst_performer = {
-                                "ticker": ticker,
-                                "return": position_return,
-                                "reason": reason
-                            }
-                            
-                except Exception as e:
-                    print(f"Error analyzing {ticker}: {e}")
-                    continue
+            ticker = returns.idxmin()
+            position_return = float(returns[ticker])
+            
+            # Get reason from sector/market conditions
+            if position_return < -5:
+                reason = "Significant decline"
+            elif position_return < -2:
+                reason = "Underperforming market"
+            else:
+                reason = "Minor weakness"
             
-            return worst_performer if worst_performer["ticker"] else {"ticker": "None", "return": 0, "reason": "No data"}
+            return {"ticker": ticker, "return": position_return, "reason": reason}
             
         except Exception as e:
             print(f"Error finding worst performer: {e}")
@@ -1126,43 +1120,18 @@ Full report saved to reports directory.
     async def calculate_trade_statistics(self, start_date, end_date) -> Dict[str, Any]:
         """Calculate actual trade statistics from portfolio positions"""
         try:
-            winning_trades = 0
-            losing_trades = 0
-            total_wins = 0.0
-            total_losses = 0.0
-            
-            # Analyze each position's performance
-            for ticker in self.current_positions:
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(start=start_date, end=end_date)
-                    
-                    if len(hist) >= 2:
-                        position_return = ((hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
-                        
-                        if position_return > 0:
-                            winning_trades += 1
-                            total_wins += position_return
-                        else:
-                            losing_trades += 1
-                            total_losses += abs(position_return)
-                            
-                except Exception as e:
-                    print(f"Error calculating stats for {ticker}: {e}")
-                    continue
-            
-            total_trades = winning_trades + losing_trades
-            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            average_win = (total_wins / winning_trades) if winning_trades > 0 else 0
-            average_loss = -(total_losses / losing_trades) if losing_trades > 0 else 0
+            returns = self.calculate_period_returns(start_date, end_date)
+            wins = returns[returns > 0]
+            losses = returns[returns <= 0]
             
+            total_trades = len(returns)
             return {
                 "total_trades": total_trades,
-                "winning_trades": winning_trades,
-                "losing_trades": losing_trades,
-                "win_rate": win_rate,
-                "average_win": average_win,
-                "average_loss": average_loss
+                "winning_trades": len(wins),
+                "losing_trades": len(losses),
+                "win_rate": (len(wins) / total_trades * 100) if total_trades > 0 else 0,
+                "average_win": float(wins.mean()) if len(wins) else 0,
+                "average_loss": -float(losses.abs().mean()) if len(losses) else 0
             }
             
         except Exception as e:
@@ -1179,47 +1148,23 @@ Full report saved to reports directory.
     async def calculate_risk_metrics(self, start_date, end_date) -> Dict[str, Any]:
         """Calculate actual risk metrics from portfolio performance"""
         try:
-            # Get daily returns for each position
-            daily_returns = []
-            portfolio_values = []
+            closes = self.get_period_window(start_date, end_date)["closes"][self.current_positions]
+            closes = closes.loc[:, closes.count() >= 2]
             
-            # Calculate portfolio daily returns
-            for ticker in self.current_positions:
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(start=start_date, end=end_date)
-                    
-                    if len(hist) >= 2:
-                        # Calculate daily returns
-                        stock_returns = hist['Close'].pct_change().dropna()
-                        daily_returns.append(stock_returns)
-                        
-                except Exception as e:
-                    print(f"Error calculating risk metrics for {ticker}: {e}")
-                    continue
-            
-            if daily_returns:
-                # Equal weighted portfolio returns
-                import pandas as pd
-                portfolio_returns = pd.concat(daily_returns, axis=1).mean(axis=1)
+            if not closes.empty:
+                # Equal weighted portfolio of daily returns (0% risk-free rate)
+                returns = returns_from_closes(closes)
+                benchmark = self.get_period_window(start_date, end_date)["closes"]["SPY"].dropna().pct_change(fill_method=None)
+                risk = compute_risk_metrics(returns, benchmark=benchmark)["portfolio"]
                 
-                # Calculate Sharpe ratio (assuming 0% risk-free rate)
-                if len(portfolio_returns) > 1:
-                    sharpe_ratio = portfolio_returns.mean() / portfolio_returns.std() * (252 ** 0.5) if portfolio_returns.std() > 0 else 0
-                    
-                    # Calculate maximum drawdown
-                    cumulative_returns = (1 + portfolio_returns).cumprod()
-                    rolling_max = cumulative_returns.expanding().max()
-                    drawdown = (cumulative_returns - rolling_max) / rolling_max
-                    max_drawdown = abs(drawdown.min())
-                    
-                    # Calculate volatility (annualized)
-                    volatility = portfolio_returns.std() * (252 ** 0.5)
-                    
+                if risk.get("observations", 0) > 1:
                     return {
-                        "sharpe_ratio": sharpe_ratio,
-                        "max_drawdown": max_drawdown,
-                        "volatility": volatility
+                        "sharpe_ratio": risk["sharpe_ratio"],
+                        "max_drawdown": risk["max_drawdown"],
+                        "volatility": risk["volatility"],
+                        "sortino_ratio": risk["sortino_ratio"],
+                        "var_95": risk["var_historical"],
+                        "beta": risk["beta"]
                     }
             
             return {
@@ -5,13 +5,21 @@ Provides level 2 quotes, news, and advanced market analytics
 """
 
 import os
+import sys
 import asyncio
-import aiohttp
+import time
 from datetime import datetime, timedelta
 import pytz
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
+sys.path.insert(0, os.path.dirname(__file__))
+from async_http_client import http_client
+from async_scan_pipeline import get_rate_limiter
+
+# Tickers per multi-ticker snapshot request (keeps the query string reasonable)
+SNAPSHOT_CHUNK_SIZE = 250
+
 @dataclass
 class MarketSnapshot:
     """Real-time market snapshot from Polygon"""
@@ -65,6 +73,40 @@ class PolygonMarketEngine:
             'close': {'start': '12:30', 'end': '13:00'},
             'aftermarket': {'start': '13:00', 'end': '17:00'}
         }
+        
+        # In-memory snapshot table keyed by symbol, filled by bulk snapshot requests
+        self.snapshot_table: Dict[str, MarketSnapshot] = {}
+        self.snapshot_table_updated: Optional[float] = None
+        
+        # Concurrent news/options lookups during session analysis
+        self.detail_concurrency = 10
+    
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """GET through the shared pooled session under Polygon's rate limit"""
+        await get_rate_limiter("polygon").acquire()
+        response = await http_client.get(url, params={**params, 'apiKey': self.api_key})
+        if response.status_code == 200:
+            return response.json()
+        return None
+    
+    def _parse_snapshot(self, ticker: str, ticker_data: Dict[str, Any]) -> MarketSnapshot:
+        """Build a MarketSnapshot from one Polygon snapshot ticker object"""
+        bid = ticker_data.get('prevDay', {}).get('c', 0)  # Previous close as fallback
+        ask = ticker_data.get('day', {}).get('c', 0)
+        
+        return MarketSnapshot(
+            ticker=ticker,
+            price=ticker_data.get('day', {}).get('c', 0),
+            bid=bid,
+            ask=ask,
+            bid_size=ticker_data.get('day', {}).get('v', 0) // 100,
+            ask_size=ticker_data.get('day', {}).get('v', 0) // 100,
+            volume=ticker_data.get('day', {}).get('v', 0),
+            vwap=ticker_data.get('day', {}).get('vw', 0),
+            spread=ask - bid,
+            spread_percent=((ask - bid) / bid * 100) if bid > 0 else 0,
+            last_update=datetime.now()
+        )
     
     async def get_realtime_snapshot(self, ticker: str) -> Optional[MarketSnapshot]:
         """Get real-time level 2 market data"""
@@ -73,38 +115,63 @@ class PolygonMarketEngine:
             return None
         
         url = f"{self.base_url}/v2/snapshot/locale/us/markets/stocks/tickers/{ticker}"
-        params = {'apiKey': self.api_key}
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        ticker_data = data.get('ticker', {})
-                        
-                        bid = ticker_data.get('prevDay', {}).get('c', 0)  # Previous close as fallback
-                        ask = ticker_data.get('day', {}).get('c', 0)
-                        
-                        snapshot = MarketSnapshot(
-                            ticker=ticker,
-                            price=ticker_data.get('day', {}).get('c', 0),
-                            bid=bid,
-                            ask=ask,
-                            bid_size=ticker_data.get('day', {}).get('v', 0) // 100,
-                            ask_size=ticker_data.get('day', {}).get('v', 0) // 100,
-                            volume=ticker_data.get('day', {}).get('v', 0),
-                            vwap=ticker_data.get('day', {}).get('vw', 0),
-                            spread=ask - bid,
-                            spread_percent=((ask - bid) / bid * 100) if bid > 0 else 0,
-                            last_update=datetime.now()
-                        )
-                        return snapshot
+            data = await self._get_json(url, {})
+            if data:
+                snapshot = self._parse_snapshot(ticker, data.get('ticker', {}))
+                self.snapshot_table[ticker] = snapshot
+                return snapshot
         
         except Exception as e:
             print(f"⚠️ Polygon snapshot error: {e}")
         
         return None
     
+    async def get_market_snapshots(self, tickers: Optional[List[str]] = None) -> Dict[str, MarketSnapshot]:
+        """
+        Bulk snapshot ingestion into the in-memory snapshot table
+        
+        Args:
+            tickers: Symbols to fetch, SNAPSHOT_CHUNK_SIZE per request;
+                     None pulls the whole US market in a single request
+        
+        Returns:
+            Snapshots keyed by symbol (only the requested ones when tickers is given)
+        """
+        
+        if not self.api_key:
+            return {}
+        
+        url = f"{self.base_url}/v2/snapshot/locale/us/markets/stocks/tickers"
+        if tickers is None:
+            requests_params = [{}]
+        else:
+            tickers = list(dict.fromkeys(t.upper() for t in tickers))
+            requests_params = [
+                {'tickers': ','.join(tickers[i:i + SNAPSHOT_CHUNK_SIZE])}
+                for i in range(0, len(tickers), SNAPSHOT_CHUNK_SIZE)
+            ]
+        
+        async def fetch(params: Dict[str, Any]) -> Dict[str, MarketSnapshot]:
+            try:
+                data = await self._get_json(url, params)
+            except Exception as e:
+                print(f"⚠️ Polygon bulk snapshot error: {e}")
+                return {}
+            return {
+                item['ticker']: self._parse_snapshot(item['ticker'], item)
+                for item in (data or {}).get('tickers', []) if item.get('ticker')
+            }
+        
+        snapshots = {}
+        for chunk in await asyncio.gather(*(fetch(params) for params in requests_params)):
+            snapshots.update(chunk)
+        
+        self.snapshot_table.update(snapshots)
+        self.snapshot_table_updated = time.time()
+        return snapshots
+    
     async def get_news_sentiment(self, tickers: List[str]) -> List[MarketNews]:
         """Get latest news and sentiment for tickers"""
         
@@ -117,34 +184,30 @@ class PolygonMarketEngine:
             'ticker': ticker_str,
             'limit': 10,
             'sort': 'published_utc',
-            'order': 'desc',
-            'apiKey': self.api_key
+            'order': 'desc'
         }
         
         news_items = []
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for article in data.get('results', []):
-                            # Simple sentiment analysis based on keywords
-                            sentiment = self.analyze_news_sentiment(
-                                article.get('title', ''),
-                                article.get('description', '')
-                            )
-                            
-                            news = MarketNews(
-                                title=article.get('title', ''),
-                                summary=article.get('description', '')[:200],
-                                ticker=article.get('tickers', [''])[0],
-                                published=datetime.fromisoformat(article.get('published_utc', '')),
-                                sentiment=sentiment,
-                                url=article.get('article_url', '')
-                            )
-                            news_items.append(news)
+            data = await self._get_json(url, params)
+            if data:
+                for article in data.get('results', []):
+                    # Simple sentiment analysis based on keywords
+                    sentiment = self.analyze_news_sentiment(
+                        article.get('title', ''),
+                        article.get('description', '')
+                    )
+                    
+                    news = MarketNews(
+                        title=article.get('title', ''),
+                        summary=article.get('description', '')[:200],
+                        ticker=article.get('tickers', [''])[0],
+                        published=datetime.fromisoformat(article.get('published_utc', '')),
+                        sentiment=sentiment,
+                        url=article.get('article_url', '')
+                    )
+                    news_items.append(news)
         
         except Exception as e:
             print(f"⚠️ Polygon news error: {e}")
@@ -162,35 +225,31 @@ class PolygonMarketEngine:
         params = {
             'underlying_ticker': ticker,
             'expired': 'false',
-            'limit': 100,
-            'apiKey': self.api_key
+            'limit': 100
         }
         
         options_flows = []
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for contract in data.get('results', []):
-                            # Look for unusual volume
-                            volume = contract.get('day', {}).get('volume', 0)
-                            open_interest = contract.get('open_interest', 0)
-                            
-                            if volume > open_interest * 2 and volume > 100:  # Unusual activity
-                                flow = OptionsFlow(
-                                    ticker=ticker,
-                                    strike=contract.get('strike_price', 0),
-                                    expiry=contract.get('expiration_date', ''),
-                                    call_put=contract.get('contract_type', ''),
-                                    volume=volume,
-                                    open_interest=open_interest,
-                                    premium=volume * contract.get('day', {}).get('close', 0) * 100,
-                                    unusual_activity=True
-                                )
-                                options_flows.append(flow)
+            data = await self._get_json(url, params)
+            if data:
+                for contract in data.get('results', []):
+                    # Look for unusual volume
+                    volume = contract.get('day', {}).get('volume', 0)
+                    open_interest = contract.get('open_interest', 0)
+                    
+                    if volume > open_interest * 2 and volume > 100:  # Unusual activity
+                        flow = OptionsFlow(
+                            ticker=ticker,
+                            strike=contract.get('strike_price', 0),
+                            expiry=contract.get('expiration_date', ''),
+                            call_put=contract.get('contract_type', ''),
+                            volume=volume,
+                            open_interest=open_interest,
+                            premium=volume * contract.get('day', {}).get('close', 0) * 100,
+                            unusual_activity=True
+                        )
+                        options_flows.append(flow)
         
         except Exception as e:
             print(f"⚠️ Polygon options error: {e}")
@@ -233,8 +292,13 @@ class PolygonMarketEngine:
         else:
             return 'NEUTRAL'
     
-    async def analyze_portfolio_session(self, tickers: List[str]) -> Dict[str, Any]:
-        """Comprehensive portfolio analysis for current session"""
+    async def analyze_portfolio_session(self, tickers: List[str], include_details: bool = True) -> Dict[str, Any]:
+        """
+        Comprehensive portfolio analysis for current session
+        
+        Snapshots for every ticker come from one bulk request; news and options
+        lookups (include_details) run concurrently rather than one after another.
+        """
         
         session = self.get_current_session()
         print(f"📊 ANALYZING PORTFOLIO - {session.upper()} SESSION")
@@ -248,18 +312,28 @@ class PolygonMarketEngine:
             'recommendations': []
         }
         
-        # Get real-time data for each ticker
-        for ticker in tickers:
-            print(f"🔍 Analyzing {ticker}...")
-            
-            # Get snapshot
-            snapshot = await self.get_realtime_snapshot(ticker)
+        # Get real-time snapshots for all tickers in one bulk request
+        print(f"🔍 Fetching snapshots for {len(tickers)} tickers...")
+        snapshots = await self.get_market_snapshots(tickers)
+        
+        # Fan out news and options lookups concurrently
+        details = {}
+        if include_details:
+            semaphore = asyncio.Semaphore(self.detail_concurrency)
             
-            # Get news
-            news = await self.get_news_sentiment([ticker])
+            async def fetch_details(ticker: str):
+                async with semaphore:
+                    news, options = await asyncio.gather(
+                        self.get_news_sentiment([ticker]),
+                        self.get_options_flow(ticker)
+                    )
+                    details[ticker] = (news, options)
             
-            # Get options flow
-            options = await self.get_options_flow(ticker)
+            await asyncio.gather(*(fetch_details(ticker) for ticker in tickers))
+        
+        for ticker in tickers:
+            snapshot = snapshots.get(ticker.upper())
+            news, options = details.get(ticker, ([], []))
             
             ticker_analysis = {
                 'snapshot': snapshot,
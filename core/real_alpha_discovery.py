@@ -5,6 +5,7 @@ Uses actual market data to find trading opportunities - NO MOCK DATA
 """
 
 import os
+import sys
 import asyncio
 import yfinance as yf
 import pandas as pd
@@ -13,6 +14,10 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 import logging
 
+sys.path.insert(0, os.path.dirname(__file__))
+from universe_service import universe_service
+from fundamentals_cache import fundamentals_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -72,26 +77,35 @@ class RealAlphaDiscoveryEngine:
         
         candidates = []
         
-        # Use S&P 500 components as a quality universe
-        sp500_tickers = self.get_sp500_tickers()
-        
         # Also add some high-volatility growth stocks
         growth_tickers = [
             'NVDA', 'AMD', 'TSLA', 'PLTR', 'COIN', 'HOOD', 'SOFI', 'SQ', 
             'ROKU', 'DKNG', 'PENN', 'AFRM', 'UPST', 'RBLX', 'U', 'NET',
             'CRWD', 'SNOW', 'OKTA', 'ZS', 'DOCU', 'ZM', 'TWLO', 'SHOP'
         ]
+        universe_service.register_list('real_alpha_growth', growth_tickers)
+        # Membership only for the S&P list (the daily refresh keeps its reference rows)
+        await universe_service.ensure_fresh(['sp500'], reference=False)
+        await universe_service.ensure_fresh(['real_alpha_growth'])
+        
+        # Use S&P 500 components as a quality universe
+        sp500_tickers = self.get_sp500_tickers()
         
         # Combine and deduplicate
         all_tickers = list(set(sp500_tickers[:100] + growth_tickers))  # Limit for performance
         
+        # Market cap and liquidity come from the daily reference table, so names that
+        # already fail those filters are never fetched (unknown names are still scanned)
+        references = universe_service.get_reference(all_tickers)
+        all_tickers = [t for t in all_tickers if t not in references or self.passes_reference_filters(references[t])]
+        
         logger.info(f"📊 Scanning {len(all_tickers)} stocks for real opportunities...")
         
         # Scan in batches to avoid overwhelming the API
         batch_size = 10
         for i in range(0, len(all_tickers), batch_size):
             batch = all_tickers[i:i + batch_size]
-            batch_candidates = await self.scan_batch(batch)
+            batch_candidates = await self.scan_batch(batch, references)
             candidates.extend(batch_candidates)
             
             # Log progress
@@ -103,8 +117,9 @@ class RealAlphaDiscoveryEngine:
         logger.info(f"✅ Found {len(candidates)} real alpha candidates")
         return candidates
     
-    async def scan_batch(self, tickers: List[str]) -> List[RealAlphaCandidate]:
-        """Scan a batch of tickers"""
+    async def scan_batch(self, tickers: List[str],
+                         references: Optional[Dict[str, Dict[str, Any]]] = None) -> List[RealAlphaCandidate]:
+        """Scan a batch of tickers (reference rows from the universe table replace .info lookups)"""
         
         batch_candidates = []
         
@@ -113,7 +128,11 @@ class RealAlphaDiscoveryEngine:
                 # Get real stock data
                 stock = yf.Ticker(ticker)
                 hist = stock.history(period="30d")
-                info = stock.info
+                reference = (references or {}).get(ticker)
+                if reference is None:
+                    info = fundamentals_cache.get_info(ticker)
+                    reference = {'name': info.get('longName'), 'market_cap': info.get('marketCap'),
+                                 'sector': info.get('sector')}
                 
                 if hist.empty or len(hist) < 5:
                     continue
@@ -127,7 +146,7 @@ class RealAlphaDiscoveryEngine:
                 avg_volume = hist['Volume'].iloc[:-1].mean()
                 volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
                 
-                market_cap = info.get('marketCap', 0)
+                market_cap = reference.get('market_cap') or 0
                 
                 # Apply filters
                 if not self.passes_filters(current_price, market_cap, volume_ratio, avg_volume):
@@ -159,7 +178,7 @@ class RealAlphaDiscoveryEngine:
                 # Create real candidate
                 candidate = RealAlphaCandidate(
                     ticker=ticker,
-                    company_name=info.get('longName', ticker),
+                    company_name=reference.get('name') or ticker,
                     current_price=current_price,
                     price_change_pct=price_change_pct,
                     volume=current_volume,
@@ -168,7 +187,7 @@ class RealAlphaDiscoveryEngine:
                     avg_volume=avg_volume,
                     volatility=volatility,
                     rsi=None,  # Could calculate if needed
-                    sector=info.get('sector', 'Unknown'),
+                    sector=reference.get('sector') or 'Unknown',
                     discovery_reason=", ".join(reasons) if reasons else "Technical setup",
                     confidence_score=min(confidence, 0.9),
                     timestamp=datetime.now()
@@ -196,10 +215,23 @@ class RealAlphaDiscoveryEngine:
             
         return True
     
+    def passes_reference_filters(self, reference: Dict[str, Any]) -> bool:
+        """Market cap and average volume filters against a universe reference row"""
+        
+        market_cap = reference.get('market_cap') or 0
+        if market_cap < self.min_market_cap or market_cap > self.max_market_cap:
+            return False
+        
+        return (reference.get('avg_volume') or 0) >= self.min_avg_volume
+    
     def get_sp500_tickers(self) -> List[str]:
         """Get S&P 500 tickers for quality universe"""
         
-        # Top S&P 500 components (abbreviated list for performance)
+        sp500_tickers = universe_service.get_list('sp500')
+        if sp500_tickers:
+            return sp500_tickers
+        
+        # Top S&P 500 components (fallback until the universe table is built)
         return [
             'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'BRK-B',
             'JPM', 'JNJ', 'V', 'PG', 'UNH', 'HD', 'MA', 'DIS', 'BAC', 'ADBE',
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Risk Metrics
+Vectorized portfolio and per-position risk over a (dates x positions)
+return matrix: drawdown, volatility, Sharpe/Sortino, historical and
+parametric VaR/CVaR, beta vs SPY and contribution to risk, computed in one
+pass and cached per as-of date
+"""
+
+import os
+import sys
+import time
+import threading
+import warnings
+import logging
+from datetime import datetime, date, timedelta
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from market_bar_store import bar_store
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+
+def max_drawdown(values: Iterable[float], is_returns: bool = False) -> float:
+    """Largest peak-to-trough decline as a fraction (0.25 = 25%) of a price or return series"""
+    values = np.asarray(list(values), dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return 0.0
+    # A return series' curve starts at 1.0 so a loss on the first return counts
+    curve = np.concatenate([[1.0], np.cumprod(1 + values)]) if is_returns else values
+    peaks = np.maximum.accumulate(curve)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdowns = np.where(peaks > 0, (peaks - curve) / peaks, 0.0)
+    return float(np.nanmax(drawdowns)) if drawdowns.size else 0.0
+
+
+def returns_from_closes(closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Simple returns per column, each computed on that column's own bars
+
+    The result keeps the shared date index (first row dropped). A symbol
+    missing a date the others have still books the whole move across the
+    gap on its next bar, instead of losing it to NaN as a plain
+    pct_change() on the aligned matrix would.
+    """
+    closes = closes.sort_index()
+    returns = pd.DataFrame(
+        {column: closes[column].dropna().pct_change(fill_method=None) for column in closes.columns},
+        index=closes.index, columns=closes.columns
+    )
+    return returns.iloc[1:]
+
+
+def compute_risk_metrics(returns: pd.DataFrame, weights: Optional[Iterable[float]] = None,
+                         benchmark: Optional[pd.Series] = None, risk_free_rate: float = 0.0,
+                         confidence: float = 0.95, periods_per_year: int = TRADING_DAYS) -> Dict[str, Any]:
+    """
+    Portfolio and per-position risk from periodic (e.g. daily) simple returns
+
+    Args:
+        returns: dates x positions; NaN where a position has no bar
+        weights: Position weights (normalized to sum to 1; equal weight if None).
+                 On dates where some positions are missing, the weights of the
+                 available ones are renormalized.
+        benchmark: Benchmark returns (e.g. SPY) for beta, aligned on dates
+        risk_free_rate: Annual risk-free rate used by Sharpe/Sortino
+        confidence: VaR/CVaR confidence level (0.95 = 95%)
+
+    Returns:
+        {'observations', 'portfolio': {...}, 'positions': {symbol: {...}}}.
+        Returns, volatility, drawdown and VaR/CVaR are fractions; VaR/CVaR
+        are positive one-period losses.
+    """
+    # Empty columns (positions without bars) make the nan-reductions warn; they come back as None
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return _compute_risk_metrics(returns, weights, benchmark, risk_free_rate, confidence, periods_per_year)
+
+
+def _compute_risk_metrics(returns: pd.DataFrame, weights: Optional[Iterable[float]], benchmark: Optional[pd.Series],
+                          risk_free_rate: float, confidence: float, periods_per_year: int) -> Dict[str, Any]:
+    returns = returns.sort_index()
+    symbols = [str(c) for c in returns.columns]
+    R = returns.to_numpy(dtype=float)
+    n_obs, n_pos = R.shape
+    if n_obs < 2 or n_pos == 0:
+        return {'observations': int(n_obs), 'portfolio': {}, 'positions': {}}
+
+    w = np.ones(n_pos) if weights is None else np.asarray(list(weights), dtype=float)
+    w = w / w.sum() if w.sum() else np.full(n_pos, 1.0 / n_pos)
+
+    available = ~np.isnan(R)
+    filled = np.where(available, R, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        portfolio = (filled @ w) / (available @ w)
+    portfolio_valid = ~np.isnan(portfolio)
+
+    # Portfolio gets the last column so every statistic is one matrix operation
+    M = np.column_stack([R, portfolio])
+    mask = ~np.isnan(M)
+    rf = risk_free_rate / periods_per_year
+    counts = mask.sum(axis=0)
+    mean = np.nanmean(M, axis=0)
+    std = np.nanstd(M, axis=0, ddof=1)
+    downside = np.sqrt(np.nanmean(np.minimum(M - rf, 0.0) ** 2, axis=0))
+    annual = np.sqrt(periods_per_year)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std > 0, (mean - rf) / std * annual, 0.0)
+        sortino = np.where(downside > 0, (mean - rf) / downside * annual, 0.0)
+
+    # Growth curves start from a row of ones so a first-period loss counts as drawdown
+    growth = np.vstack([np.ones(n_pos + 1), np.cumprod(1 + np.where(mask, M, 0.0), axis=0)])
+    peaks = np.maximum.accumulate(growth, axis=0)
+    drawdown = ((peaks - growth) / peaks).max(axis=0)
+    total_return = growth[-1] - 1
+
+    # Historical VaR/CVaR: the loss at the (1 - confidence) quantile, and the mean loss beyond it
+    tail = 1 - confidence
+    quantile = np.nanquantile(M, tail, axis=0)
+    with np.errstate(invalid='ignore'):
+        in_tail = mask & (M <= quantile)
+    hist_cvar = -np.where(in_tail, M, 0.0).sum(axis=0) / np.maximum(in_tail.sum(axis=0), 1)
+    hist_var = -quantile
+
+    # Parametric (Gaussian) VaR/CVaR
+    normal = NormalDist()
+    z = normal.inv_cdf(tail)
+    param_var = -(mean + z * std)
+    param_cvar = -(mean - std * normal.pdf(z) / tail)
+
+    # Beta vs benchmark
+    beta = np.full(n_pos + 1, np.nan)
+    if benchmark is not None:
+        b = benchmark.reindex(returns.index).to_numpy(dtype=float)
+        pair = mask & ~np.isnan(b)[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            Mc = np.where(pair, M - np.nanmean(np.where(pair, M, np.nan), axis=0), 0.0)
+            bc = np.where(pair, b[:, None] - np.nanmean(np.where(pair, b[:, None], np.nan), axis=0), 0.0)
+            beta = (Mc * bc).sum(axis=0) / (bc ** 2).sum(axis=0)
+
+    # Contribution to risk: w_i * (Σw)_i / σ_p, which sums to portfolio volatility
+    cov = np.atleast_2d(np.cov(filled[portfolio_valid], rowvar=False))
+    portfolio_var = float(w @ cov @ w)
+    portfolio_vol = np.sqrt(portfolio_var) if portfolio_var > 0 else 0.0
+    contribution = w * (cov @ w) / portfolio_vol if portfolio_vol else np.zeros(n_pos)
+
+    def value(x) -> Optional[float]:
+        # None rather than NaN for positions without enough data (keeps results JSON-safe)
+        return float(x) if np.isfinite(x) else None
+
+    def stats(i: int) -> Dict[str, Any]:
+        enough = counts[i] > 1
+        return {
+            'observations': int(counts[i]),
+            'total_return': value(total_return[i]),
+            'mean_return': value(mean[i]) if counts[i] else None,
+            'volatility': value(std[i] * annual) if enough else 0.0,
+            'sharpe_ratio': value(sharpe[i]) if enough else 0.0,
+            'sortino_ratio': value(sortino[i]) if enough else 0.0,
+            'max_drawdown': value(drawdown[i]),
+            'var_historical': value(hist_var[i]) if counts[i] else None,
+            'cvar_historical': value(hist_cvar[i]) if counts[i] else None,
+            'var_parametric': value(param_var[i]) if enough else None,
+            'cvar_parametric': value(param_cvar[i]) if enough else None,
+            'beta': value(beta[i]),
+        }
+
+    positions = {}
+    for i, symbol in enumerate(symbols):
+        positions[symbol] = {
+            **stats(i),
+            'weight': float(w[i]),
+            'risk_contribution': value(contribution[i] * annual),
+            'risk_contribution_pct': value(contribution[i] / portfolio_vol) if portfolio_vol else 0.0,
+        }
+
+    return {
+        'observations': int(n_obs),
+        'confidence': confidence,
+        'portfolio': stats(n_pos),
+        'positions': positions,
+    }
+
+
+class RiskMetricsEngine:
+    """
+    Risk metrics for a set of holdings, cached per as-of date
+
+    Price history comes from the shared bar store (one batched panel per
+    request). The return matrix is cached per (as-of date, symbols), so
+    repeated calls for the same holdings on the same day only re-run the
+    vectorized metrics with their current weights (market values move on
+    every request). Past as-of dates never change; today's entry is
+    reloaded after intraday_ttl seconds as the last bar moves.
+    """
+
+    def __init__(self, lookback_days: int = TRADING_DAYS, benchmark: str = "SPY", max_entries: int = 64,
+                 intraday_ttl: float = 900.0):
+        self.lookback_days = lookback_days
+        self.benchmark = benchmark
+        self.max_entries = max_entries
+        self.intraday_ttl = intraday_ttl
+        self.lock = threading.Lock()
+        self._cache: Dict[Tuple, Dict[str, Any]] = {}
+        self.stats = {'hits': 0, 'computed': 0}
+
+    def get_portfolio_risk(self, symbols: List[str], weights: Optional[List[float]] = None,
+                           as_of: Optional[date] = None, lookback_days: Optional[int] = None,
+                           risk_free_rate: float = 0.0) -> Dict[str, Any]:
+        """Risk metrics over the trading days up to as_of (today by default)"""
+        symbols = [s.upper() for s in symbols]
+        as_of = as_of or date.today()
+        lookback_days = lookback_days or self.lookback_days
+        if weights is not None:
+            weights = [float(x) for x in weights]
+        key = (as_of, tuple(symbols), lookback_days)
+
+        with self.lock:
+            cached = self._cache.get(key)
+        if cached is not None and (as_of < date.today() or time.time() - cached['computed_at'] < self.intraday_ttl):
+            self.stats['hits'] += 1
+        else:
+            closes = self._load_closes(symbols + [self.benchmark], as_of, lookback_days)
+            benchmark = closes.get(self.benchmark)
+            cached = {
+                'returns': returns_from_closes(closes.reindex(columns=symbols)),
+                'benchmark_returns': benchmark.dropna().pct_change(fill_method=None) if benchmark is not None else None,
+                'computed_at': time.time(),
+            }
+            self.stats['computed'] += 1
+            with self.lock:
+                self._cache.pop(key, None)
+                self._cache[key] = cached
+                while len(self._cache) > self.max_entries:
+                    self._cache.pop(next(iter(self._cache)))
+
+        result = compute_risk_metrics(cached['returns'], weights=weights, benchmark=cached['benchmark_returns'],
+                                      risk_free_rate=risk_free_rate)
+        result.update({'as_of': as_of.isoformat(), 'lookback_days': lookback_days, 'benchmark': self.benchmark,
+                       'computed_at': cached['computed_at']})
+        return result
+
+    def _load_closes(self, symbols: List[str], as_of: date, lookback_days: int) -> pd.DataFrame:
+        symbols = list(dict.fromkeys(symbols))
+        end = datetime.combine(as_of + timedelta(days=1), datetime.min.time())
+        # Pad calendar days so the window holds lookback_days trading days
+        start = end - timedelta(days=lookback_days * 7 // 5 + 7)
+        panel = bar_store.get_panel(symbols, start=start, end=end)
+        if panel.empty:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        closes = panel.xs("Close", axis=1, level=1)
+        return closes.tail(lookback_days + 1).copy()
+
+    def get_engine_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'cached': len(self._cache)}
+
+
+# Global instance
+risk_engine = RiskMetricsEngine()
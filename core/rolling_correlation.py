@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Rolling Correlation Engine
+Sliding-window correlation/covariance over daily returns, maintained from
+running pairwise sums so each new day is an O(symbols^2) update instead of
+a full DataFrame.corr() rebuild
+"""
+
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class RollingCorrelationEngine:
+    """
+    Pairwise sliding-window correlation, matching DataFrame.corr() over the
+    last `window` return rows
+
+    Each pair (i, j) keeps sums over rows where both returns exist: n, Σx, Σx²
+    and Σxy. update() folds in only dates newer than the last one seen (a
+    repeated last date, such as today's still-forming bar, replaces the
+    earlier row), and rows leaving the window are subtracted out. Sums are
+    rebuilt from the stored window every rebuild_every updates to shed
+    floating-point drift.
+    """
+
+    def __init__(self, window: int = 29, rebuild_every: int = 250):
+        self.window = window
+        self.rebuild_every = rebuild_every
+        self.symbols: List[str] = []
+        self._rows: deque = deque()  # (date, returns vector)
+        self._updates = 0
+        self._reset_sums(0)
+
+    def _reset_sums(self, size: int):
+        self.n = np.zeros((size, size))
+        self.sum_x = np.zeros((size, size))   # Σ x_i over rows where i and j are both present
+        self.sum_xx = np.zeros((size, size))
+        self.sum_xy = np.zeros((size, size))
+
+    def _apply(self, row: np.ndarray, sign: float):
+        present = ~np.isnan(row)
+        values = np.where(present, row, 0.0)
+        mask = present.astype(float)
+        self.n += sign * np.outer(mask, mask)
+        self.sum_x += sign * np.outer(values, mask)
+        self.sum_xx += sign * np.outer(values * values, mask)
+        self.sum_xy += sign * np.outer(values, values)
+
+    def _rebuild(self):
+        self._reset_sums(len(self.symbols))
+        for _, row in self._rows:
+            self._apply(row, 1.0)
+
+    def update(self, returns: pd.DataFrame) -> int:
+        """
+        Fold new return rows (dates x symbols) into the window
+
+        A different symbol set starts a fresh window from these rows.
+        Returns the number of rows added or replaced.
+        """
+        returns = returns.sort_index()
+        symbols = [str(c) for c in returns.columns]
+        if symbols != self.symbols:
+            self.symbols = symbols
+            self._rows.clear()
+            self._reset_sums(len(symbols))
+
+        last_date = self._rows[-1][0] if self._rows else None
+        if last_date is not None:
+            returns = returns.loc[returns.index >= last_date]
+
+        folded = 0
+        for date, row in zip(returns.index, returns.to_numpy(dtype=float)):
+            if np.isnan(row).all():
+                continue
+            if self._rows and date == self._rows[-1][0]:
+                _, previous = self._rows.pop()
+                self._apply(previous, -1.0)
+            self._rows.append((date, row))
+            self._apply(row, 1.0)
+            while len(self._rows) > self.window:
+                _, expired = self._rows.popleft()
+                self._apply(expired, -1.0)
+            folded += 1
+
+        self._updates += folded
+        if self._updates >= self.rebuild_every:
+            self._rebuild()
+            self._updates = 0
+        return folded
+
+    def covariance(self, min_periods: int = 2) -> pd.DataFrame:
+        """Pairwise sample covariance over the window"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (self.sum_xy - self.sum_x * self.sum_x.T / self.n) / (self.n - 1)
+        cov[self.n < max(min_periods, 2)] = np.nan
+        return pd.DataFrame(cov, index=self.symbols, columns=self.symbols)
+
+    def correlation(self, min_periods: int = 2) -> pd.DataFrame:
+        """Pairwise Pearson correlation over the window"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sxy = self.n * self.sum_xy - self.sum_x * self.sum_x.T
+            var_i = self.n * self.sum_xx - self.sum_x ** 2
+            corr = sxy / np.sqrt(np.clip(var_i, 0, None) * np.clip(var_i.T, 0, None))
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[self.n < max(min_periods, 2)] = np.nan
+        return pd.DataFrame(corr, index=self.symbols, columns=self.symbols)
+
+    def high_correlation_pairs(self, threshold: float, min_periods: int = 6) -> List[Dict[str, Any]]:
+        """Pairs with |correlation| above threshold, strongest first"""
+        corr = self.correlation(min_periods).to_numpy()
+        rows, cols = np.triu_indices(len(self.symbols), k=1)
+        values = corr[rows, cols]
+        with np.errstate(invalid='ignore'):
+            hits = np.flatnonzero(np.abs(values) > threshold)
+        hits = hits[np.argsort(-np.abs(values[hits]))]
+        return [
+            {"pair": f"{self.symbols[rows[k]]} - {self.symbols[cols[k]]}", "correlation": round(float(values[k]), 3)}
+            for k in hits
+        ]
+
+    def get_engine_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self.symbols),
+            "window_rows": len(self._rows),
+            "window_end": str(self._rows[-1][0]) if self._rows else None,
+        }
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Sentiment Score Cache
+Persisted sentiment scores keyed by a hash of the scored text, so a post is
+scored once no matter how many tickers it mentions or how many sweeps see it
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Whitespace- and case-insensitive hash, so reposts and trivial edits share a score"""
+    return hashlib.sha256(' '.join((text or '').lower().split()).encode()).hexdigest()
+
+
+class SentimentScoreCache:
+    """
+    SQLite (WAL) table of {content_hash: sentiment, score, confidence, scorer}
+
+    Scores don't expire: a given text's sentiment doesn't change. Rows older
+    than max_age_days are pruned on startup to keep the table small.
+    """
+
+    def __init__(self, cache_dir: str = "cache", max_age_days: int = 30):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        self.db_path = self.cache_dir / "sentiment_scores.db"
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'stored': 0}
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._setup_database(max_age_days)
+
+    def _setup_database(self, max_age_days: int):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sentiment_scores (
+                content_hash TEXT PRIMARY KEY,
+                sentiment TEXT NOT NULL,
+                score REAL NOT NULL,
+                confidence REAL NOT NULL,
+                scorer TEXT NOT NULL,
+                scored_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('DELETE FROM sentiment_scores WHERE scored_at < ?', (time.time() - max_age_days * 86400,))
+        self.conn.commit()
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored scores for the given content hashes (unscored hashes are omitted)"""
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                for row in self.conn.execute(
+                        f"SELECT content_hash, sentiment, score, confidence, scorer FROM sentiment_scores "
+                        f"WHERE content_hash IN ({','.join('?' * len(chunk))})", chunk):
+                    found[row[0]] = {'sentiment': row[1], 'score': row[2], 'confidence': row[3], 'scorer': row[4]}
+        self.counters['hits'] += len(found)
+        self.counters['misses'] += len(hashes) - len(found)
+        return found
+
+    def store_many(self, scores: Dict[str, Dict[str, Any]], scorer: str):
+        """Persist {content_hash: {sentiment, score, confidence}}"""
+        if not scores:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO sentiment_scores (content_hash, sentiment, score, confidence, scorer, scored_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(h, s['sentiment'], float(s['score']), float(s['confidence']), scorer, now)
+                  for h, s in scores.items()])
+            self.conn.commit()
+        self.counters['stored'] += len(scores)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT scorer, COUNT(*) FROM sentiment_scores GROUP BY scorer'
+            ).fetchall()
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': round(self.counters['hits'] / lookups * 100, 1) if lookups else 0.0,
+            'scores_by_scorer': dict(rows),
+        }
+
+
+# Global instance
+sentiment_score_cache = SentimentScoreCache()
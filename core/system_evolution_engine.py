@@ -9,7 +9,6 @@ import sys
 import json
 import time
 from datetime import datetime, timedelta
-import yfinance as yf
 import requests
 from dataclasses import dataclass
 from typing import List, Dict, Any
@@ -18,6 +17,12 @@ import ssl
 
 # Add path for local modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pandas as pd
+from market_bar_store import bar_store, get_price_history
+from rolling_correlation import RollingCorrelationEngine
+from risk_metrics import returns_from_closes
 
 @dataclass
 class EvolutionRecommendation:
@@ -52,6 +57,13 @@ class SystemEvolutionEngine:
         self.volume_threshold = 2.0       # 2x normal volume
         self.correlation_threshold = 0.8   # High correlation warning
         
+        # One 30-bar panel is shared by the volatility, correlation and volume analyses;
+        # correlations are kept incrementally across runs
+        self.panel_bars = 30
+        self.panel_max_age = 300
+        self._market_panel = None
+        self.correlation_engine = RollingCorrelationEngine(window=self.panel_bars - 1)
+        
         # Load existing recommendations
         self.pending_recommendations = self.load_recommendations()
         self.approved_upgrades = self.load_approved_upgrades()
@@ -98,6 +110,29 @@ class SystemEvolutionEngine:
             print(f"❌ Error in market analysis: {e}")
             return market_analysis
     
+    def get_market_panel(self, tickers: List[str]) -> Dict[str, Any]:
+        """Aligned Close/Volume frames (date x ticker) for the last panel_bars bars, cached briefly"""
+        cached = self._market_panel
+        if (cached and cached["tickers"] == tickers
+                and time.time() - cached["built_at"] < self.panel_max_age):
+            return cached
+        
+        panel = bar_store.get_panel(tickers, period=f"{self.panel_bars}d")
+        if panel.empty:
+            closes = volumes = pd.DataFrame(columns=tickers, dtype=float)
+        else:
+            closes = panel.xs("Close", axis=1, level=1).reindex(columns=tickers)
+            volumes = panel.xs("Volume", axis=1, level=1).reindex(columns=tickers)
+        
+        self._market_panel = {
+            "tickers": list(tickers),
+            "built_at": time.time(),
+            "closes": closes,
+            "volumes": volumes,
+            "returns": returns_from_closes(closes)
+        }
+        return self._market_panel
+    
     def analyze_volatility_patterns(self, tickers: List[str]) -> Dict[str, Any]:
         """Analyze volatility patterns to suggest system improvements"""
         
@@ -108,28 +143,28 @@ class SystemEvolutionEngine:
         }
         
         try:
-            for ticker in tickers:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="30d")
+            panel = self.get_market_panel(tickers)
+            returns = panel["returns"]
+            
+            # Rolling volatility for every ticker at once (annualized)
+            current_vol = returns.std() * (252 ** 0.5)
+            recent_vol = returns.tail(5).std() * (252 ** 0.5)
+            vol_ratio = (recent_vol / current_vol).where(current_vol > 0, 0)
+            eligible = panel["closes"].count() > 10
+            
+            for ticker in current_vol[eligible].index:
+                volatility_analysis["current_volatility"][ticker] = {
+                    "30_day_vol": round(float(current_vol[ticker]), 3),
+                    "recent_vol": round(float(recent_vol[ticker]), 3),
+                    "vol_ratio": round(float(vol_ratio[ticker]), 2)
+                }
                 
-                if len(hist) > 10:
-                    # Calculate rolling volatility
-                    returns = hist['Close'].pct_change().dropna()
-                    current_vol = returns.std() * (252 ** 0.5)  # Annualized
-                    recent_vol = returns.tail(5).std() * (252 ** 0.5)
-                    
-                    volatility_analysis["current_volatility"][ticker] = {
-                        "30_day_vol": round(current_vol, 3),
-                        "recent_vol": round(recent_vol, 3),
-                        "vol_ratio": round(recent_vol / current_vol if current_vol > 0 else 0, 2)
-                    }
-                    
-                    # Check for volatility spikes
-                    if recent_vol / current_vol > 1.5:  # 50% volatility increase
-                        volatility_analysis["volatility_spike"] = True
-                        volatility_analysis["evolution_needs"].append(
-                            f"High volatility in {ticker} suggests need for adaptive position sizing"
-                        )
+                # Check for volatility spikes
+                if vol_ratio[ticker] > 1.5:  # 50% volatility increase
+                    volatility_analysis["volatility_spike"] = True
+                    volatility_analysis["evolution_needs"].append(
+                        f"High volatility in {ticker} suggests need for adaptive position sizing"
+                    )
             
         except Exception as e:
             print(f"Volatility analysis error: {e}")
@@ -146,37 +181,22 @@ class SystemEvolutionEngine:
         }
         
         try:
-            # Get price data for correlation analysis
-            price_data = {}
-            for ticker in tickers:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="30d")
-                if len(hist) > 10:
-                    price_data[ticker] = hist['Close']
+            panel = self.get_market_panel(tickers)
+            eligible = panel["closes"].columns[panel["closes"].count() > 10]
             
-            if len(price_data) >= 2:
-                import pandas as pd
-                prices_df = pd.DataFrame(price_data)
-                returns_df = prices_df.pct_change().dropna()
+            if len(eligible) >= 2:
+                # Fold only the new days into the rolling window, then mask the upper triangle
+                self.correlation_engine.update(panel["returns"][list(eligible)])
+                high_correlations = self.correlation_engine.high_correlation_pairs(
+                    self.correlation_threshold, min_periods=6
+                )
                 
-                if len(returns_df) > 5:
-                    corr_matrix = returns_df.corr()
-                    
-                    # Find high correlations
-                    for i in range(len(corr_matrix.columns)):
-                        for j in range(i+1, len(corr_matrix.columns)):
-                            correlation = corr_matrix.iloc[i, j]
-                            if abs(correlation) > self.correlation_threshold:
-                                correlation_analysis["high_correlations"].append({
-                                    "pair": f"{corr_matrix.columns[i]} - {corr_matrix.columns[j]}",
-                                    "correlation": round(correlation, 3)
-                                })
-                                correlation_analysis["correlation_risk"] = True
-                    
-                    if correlation_analysis["correlation_risk"]:
-                        correlation_analysis["evolution_needs"].append(
-                            "High portfolio correlation suggests need for diversification algorithm"
-                        )
+                if high_correlations:
+                    correlation_analysis["high_correlations"] = high_correlations
+                    correlation_analysis["correlation_risk"] = True
+                    correlation_analysis["evolution_needs"].append(
+                        "High portfolio correlation suggests need for diversification algorithm"
+                    )
             
         except Exception as e:
             print(f"Correlation analysis error: {e}")
@@ -193,22 +213,20 @@ class SystemEvolutionEngine:
         }
         
         try:
-            for ticker in tickers:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="10d")
-                
-                if len(hist) > 5:
-                    avg_volume = hist['Volume'].mean()
-                    recent_volume = hist['Volume'].iloc[-1]
-                    volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 0
-                    
-                    if volume_ratio > self.volume_threshold:
-                        volume_analysis["volume_spikes"].append({
-                            "ticker": ticker,
-                            "volume_ratio": round(volume_ratio, 2),
-                            "recent_volume": int(recent_volume)
-                        })
-                        volume_analysis["unusual_activity"] = True
+            # Last 10 bars of the shared panel
+            volumes = self.get_market_panel(tickers)["volumes"].tail(10)
+            avg_volume = volumes.mean()
+            recent_volume = volumes.iloc[-1] if len(volumes) else pd.Series(dtype=float)
+            volume_ratio = (recent_volume / avg_volume).where(avg_volume > 0, 0)
+            spikes = (volumes.count() > 5) & (volume_ratio > self.volume_threshold)
+            
+            for ticker in volume_ratio[spikes].index:
+                volume_analysis["volume_spikes"].append({
+                    "ticker": ticker,
+                    "volume_ratio": round(float(volume_ratio[ticker]), 2),
+                    "recent_volume": int(recent_volume[ticker])
+                })
+                volume_analysis["unusual_activity"] = True
             
             if volume_analysis["unusual_activity"]:
                 volume_analysis["evolution_needs"].append(
@@ -241,8 +259,7 @@ class SystemEvolutionEngine:
             
             for etf, sector in sector_etfs.items():
                 try:
-                    stock = yf.Ticker(etf)
-                    hist = stock.history(period="5d")
+                    hist = get_price_history(etf, period="5d")
                     
                     if len(hist) >= 2:
                         performance = ((hist['Close'].iloc[-1] / hist['Close'].iloc[0]) - 1) * 100
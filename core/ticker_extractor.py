@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Ticker Extractor
+Shared ticker-mention extraction for social posts, press releases and
+filings: the universe is compiled once and text is scanned in a single pass,
+so extraction cost depends on text length, not universe size
+"""
+
+import os
+import re
+import sys
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+from edgar_index import edgar_index
+from universe_service import universe_service
+
+logger = logging.getLogger(__name__)
+
+# Cashtag or bare word, with an optional class-share suffix (BRK.B / BRK-B).
+# Lookarounds give the word-boundary rule: no letters, digits or $ glued on either side.
+TOKEN_PATTERN = re.compile(r'(?<![\w$])(\$)?([A-Za-z]{1,5}(?:[.\-][A-Za-z]{1,2})?)(?![\w$])')
+
+# Uppercase words that read as tickers but almost never mean one without a cashtag
+DEFAULT_STOP_WORDS = frozenset({
+    # Regulators, exchanges and corporate suffixes
+    'FDA', 'SEC', 'EDGAR', 'NYSE', 'NASDAQ', 'AMEX', 'OTC', 'FINRA', 'FTC', 'DOJ', 'EPA', 'CDC', 'NIH', 'EMA',
+    'INC', 'CORP', 'LLC', 'LTD', 'PLC', 'CO', 'LP', 'NV', 'SA', 'AG',
+    # Finance and filing jargon
+    'CEO', 'CFO', 'COO', 'CTO', 'IPO', 'ETF', 'EPS', 'PE', 'ATH', 'ATM', 'GDP', 'CPI', 'FOMC', 'FED', 'IRS',
+    'USD', 'EUR', 'API', 'AI', 'PDUFA', 'NDA', 'BLA', 'SNDA', 'EUA', 'Q', 'FY', 'YOY', 'QOQ', 'EST', 'PST',
+    'ET', 'PT', 'AM', 'PM', 'USA', 'US', 'UK', 'EU',
+    # Social-media slang
+    'DD', 'YOLO', 'FOMO', 'HODL', 'IMO', 'IMHO', 'TLDR', 'LOL', 'WSB', 'MOON', 'RIP', 'OP', 'EDIT', 'PSA',
+    'TA', 'FA', 'IV', 'OTM', 'ITM', 'DTE', 'EOD', 'EOW', 'AH', 'BTFD', 'FUD', 'GG', 'OK', 'NEW',
+    # Common words that are also listed tickers
+    'A', 'I', 'AN', 'AS', 'AT', 'BE', 'BY', 'DO', 'GO', 'IF', 'IN', 'IS', 'IT', 'ME', 'MY', 'NO', 'OF',
+    'ON', 'OR', 'SO', 'TO', 'UP', 'WE', 'ALL', 'AND', 'ARE', 'BIG', 'BUY', 'CAN', 'FOR', 'GET', 'HAS',
+    'NOW', 'ONE', 'OUT', 'SEE', 'THE', 'TWO', 'WAS', 'WHO', 'YOU', 'CASH', 'HOLD', 'SELL', 'GAIN', 'LOSS',
+    'LOW', 'HIGH', 'OPEN', 'REAL', 'FREE', 'BEST', 'GOOD', 'NEXT', 'JUST', 'VERY', 'LIFE', 'FUN', 'CALL',
+    'PUT', 'PUTS', 'ANY', 'PLAY', 'RUN', 'TRUE', 'LOVE', 'WELL',
+})
+
+
+def normalize_ticker(ticker: str) -> str:
+    """Upper-case with class shares dashed (BRK.B -> BRK-B), matching the universe and EDGAR maps"""
+    return ticker.strip().upper().replace('.', '-')
+
+
+class TickerExtractor:
+    """
+    One-pass ticker extraction against a fixed universe
+
+    A single compiled token scanner walks the text once; each candidate is
+    looked up in a frozen hash set of the universe. Rules:
+      - Cashtags ($TSLA, $tsla) match in any case and override the stop words
+      - Bare words must be upper-case in the text, at least min_bare_length
+        long, and not a stop word
+    Results keep first-mention order without duplicates.
+    """
+
+    def __init__(self, universe: Iterable[str], stop_words: Iterable[str] = DEFAULT_STOP_WORDS,
+                 min_bare_length: int = 2):
+        self.universe = frozenset(normalize_ticker(t) for t in universe if t and t.strip())
+        self.stop_words = frozenset(normalize_ticker(w) for w in stop_words)
+        self.min_bare_length = min_bare_length
+        self._version: Optional[str] = None
+
+    @property
+    def version(self) -> str:
+        """Stable digest of the universe and rules; results parsed with one extractor stay valid while it matches"""
+        if self._version is None:
+            digest = hashlib.sha1()
+            for part in (sorted(self.universe), sorted(self.stop_words), [str(self.min_bare_length)]):
+                digest.update('\n'.join(part).encode())
+                digest.update(b'\0')
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self.universe)
+
+    def __contains__(self, ticker: str) -> bool:
+        return normalize_ticker(ticker) in self.universe
+
+    def iter_matches(self, text: str):
+        """Yield universe tickers in the order they're mentioned (repeats included)"""
+        if not text:
+            return
+        for match in TOKEN_PATTERN.finditer(text):
+            cashtag, word = match.groups()
+            ticker = normalize_ticker(word)
+            if ticker not in self.universe:
+                continue
+            if not cashtag and (not word.isupper() or len(word) < self.min_bare_length
+                                or ticker in self.stop_words):
+                continue
+            yield ticker
+
+    def extract(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """Distinct tickers mentioned in text, in first-mention order"""
+        found = []
+        for ticker in self.iter_matches(text):
+            if ticker not in found:
+                found.append(ticker)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    def first(self, text: str) -> Optional[str]:
+        """First ticker mentioned in text, if any"""
+        return next(self.iter_matches(text), None)
+
+
+@lru_cache(maxsize=32)
+def _compiled_extractor(universe: frozenset) -> TickerExtractor:
+    # Tickers the caller asked for explicitly (AI, OPEN, PLAY...) match as bare words too
+    return TickerExtractor(universe, stop_words=DEFAULT_STOP_WORDS - universe)
+
+
+def get_ticker_extractor(universe: Iterable[str]) -> TickerExtractor:
+    """
+    Extractor for an explicit ticker list; recently used universes stay compiled
+
+    Targets that are also stop words are matched as bare mentions.
+    """
+    return _compiled_extractor(frozenset(normalize_ticker(t) for t in universe if t and t.strip()))
+
+
+_market_extractor: Optional[TickerExtractor] = None
+_market_key = None
+
+
+def get_market_ticker_extractor() -> TickerExtractor:
+    """
+    Extractor over every known listed ticker (EDGAR map plus the symbol universe)
+
+    Recompiled only when either source has been refreshed since the last build.
+    """
+    global _market_extractor, _market_key
+
+    key = (id(edgar_index.ticker_to_cik), len(edgar_index.ticker_to_cik), universe_service.stats['refreshes'])
+    if _market_extractor is None or key != _market_key:
+        universe = set(edgar_index.ticker_to_cik)
+        try:
+            universe.update(universe_service.query())
+        except Exception as e:
+            logger.debug(f"Symbol universe unavailable for ticker extraction: {e}")
+        _market_extractor = TickerExtractor(universe)
+        _market_key = key
+        logger.info(f"Ticker extractor compiled: {len(_market_extractor)} tickers")
+    return _market_extractor
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Symbol Universe Service
+Daily reference table of tradable symbols (exchange, sector, market cap,
+float, average volume, short interest) plus named constituent lists, persisted
+in SQLite so engines select their scan universes with indexed queries instead
+of re-scraping index pages and calling yf.Ticker(...).info per candidate
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import asyncio
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from async_scan_pipeline import AsyncScanner, joinable
+from fundamentals_cache import fundamentals_cache
+
+logger = logging.getLogger(__name__)
+
+# Reference columns stored per symbol, mapped from yfinance .info keys
+REFERENCE_FIELDS = {
+    'name': 'longName',
+    'exchange': 'exchange',
+    'quote_type': 'quoteType',
+    'sector': 'sector',
+    'industry': 'industry',
+    'market_cap': 'marketCap',
+    'float_shares': 'floatShares',
+    'avg_volume': 'averageVolume',
+    'short_percent_float': 'shortPercentOfFloat',  # Fraction of float, e.g. 0.12 = 12%
+    'price': 'regularMarketPrice',
+    'summary': 'longBusinessSummary',
+}
+
+
+def _normalize_symbol(symbol: Any) -> Optional[str]:
+    """Index pages use class-share dots (BRK.B); Yahoo uses dashes (BRK-B)"""
+    if not isinstance(symbol, str) or not symbol.strip():
+        return None
+    return symbol.strip().upper().replace('.', '-')
+
+
+def _symbols_from_tables(url: str, columns=('Symbol', 'Ticker'), limit: Optional[int] = None) -> List[str]:
+    """Symbol column of the first table on a page that has one"""
+    for table in pd.read_html(url):
+        for column in columns:
+            if column in table.columns:
+                symbols = table[column].dropna().tolist()
+                return symbols[:limit] if limit else symbols
+    return []
+
+
+def fetch_sp500() -> List[str]:
+    return _symbols_from_tables("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies")
+
+
+def fetch_nasdaq100() -> List[str]:
+    return _symbols_from_tables("https://en.wikipedia.org/wiki/Nasdaq-100", columns=('Ticker', 'Symbol'))
+
+
+def fetch_russell2000() -> List[str]:
+    # Wikipedia only lists a sample of the index
+    return _symbols_from_tables("https://en.wikipedia.org/wiki/Russell_2000_Index", limit=200)
+
+
+class SymbolUniverseService:
+    """
+    Persisted symbol reference table with named constituent lists
+
+    Index lists (sp500, nasdaq100, russell2000) are re-fetched at most once per
+    max_age_hours; seed lists are candidate sets registered by engines. Every
+    member's reference row is refreshed on the same daily cadence, so queries
+    never touch the network. Lists and seeds persist, so a scheduled refresh
+    in one process keeps every engine's universe current.
+
+    List membership and reference rows are tracked separately: callers that
+    only need the members (reference=False) never trigger per-symbol .info
+    fetches; the scheduled refresh keeps the reference rows current.
+    """
+
+    def __init__(self, cache_dir: str = "cache", max_age_hours: float = 24.0, concurrency: int = 8):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        self.db_path = self.cache_dir / "symbol_universe.db"
+        self.max_age_seconds = max_age_hours * 3600
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.fetchers: Dict[str, Callable[[], List[str]]] = {
+            'sp500': fetch_sp500,
+            'nasdaq100': fetch_nasdaq100,
+            'russell2000': fetch_russell2000,
+        }
+        self.stats = {'queries': 0, 'refreshes': 0, 'symbols_fetched': 0, 'fetch_errors': 0}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._setup_database()
+
+    def _setup_database(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS symbols (
+                symbol TEXT PRIMARY KEY,
+                name TEXT,
+                exchange TEXT,
+                quote_type TEXT,
+                sector TEXT,
+                industry TEXT,
+                market_cap REAL,
+                float_shares REAL,
+                avg_volume REAL,
+                short_percent_float REAL,
+                price REAL,
+                summary TEXT,
+                fetch_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lists (
+                list_name TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                refreshed_at REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS list_members (
+                list_name TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (list_name, symbol)
+            )
+        ''')
+
+        for column in ('sector', 'market_cap', 'float_shares', 'avg_volume', 'short_percent_float', 'updated_at'):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_symbols_{column} ON symbols({column})')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_list_members_symbol ON list_members(symbol)')
+        self.conn.commit()
+
+    # Lists
+
+    def register_list(self, name: str, symbols: Iterable[str]):
+        """
+        Register (or replace) a seed list of candidate symbols
+
+        The members' reference rows are filled on the next refresh; until then
+        they only match queries with include_unknown=True.
+        """
+        members = list(dict.fromkeys(s for s in (_normalize_symbol(v) for v in symbols) if s))
+        with self.lock:
+            current = [row[0] for row in self.conn.execute(
+                'SELECT symbol FROM list_members WHERE list_name = ? ORDER BY position', (name,))]
+            if current == members:
+                return
+            self._write_members(name, 'seed', members, refreshed_at=None)
+
+    def _write_members(self, name: str, source: str, members: List[str], refreshed_at: Optional[float]):
+        self.conn.execute('''
+            INSERT INTO lists (list_name, source, refreshed_at) VALUES (?, ?, ?)
+            ON CONFLICT(list_name) DO UPDATE SET source = excluded.source,
+                refreshed_at = COALESCE(excluded.refreshed_at, lists.refreshed_at)
+        ''', (name, source, refreshed_at))
+        self.conn.execute('DELETE FROM list_members WHERE list_name = ?', (name,))
+        self.conn.executemany(
+            'INSERT INTO list_members (list_name, symbol, position) VALUES (?, ?, ?)',
+            [(name, symbol, i) for i, symbol in enumerate(members)]
+        )
+        self.conn.commit()
+
+    def get_list(self, name: str) -> List[str]:
+        """Stored members of a list, in source order"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                'SELECT symbol FROM list_members WHERE list_name = ? ORDER BY position', (name,))]
+
+    def list_names(self, source: Optional[str] = None) -> List[str]:
+        """Known list names, optionally only 'index' or 'seed' lists"""
+        with self.lock:
+            names = {row[0] for row in self.conn.execute('SELECT list_name FROM lists WHERE ? IS NULL OR source = ?',
+                                                          (source, source))}
+        if source in (None, 'index'):
+            names |= set(self.fetchers)
+        return sorted(names)
+
+    # Queries
+
+    def query(self, lists: Optional[Iterable[str]] = None, sectors: Optional[Iterable[str]] = None,
+              industry_like: Optional[str] = None, summary_keywords: Optional[Iterable[str]] = None,
+              min_market_cap: Optional[float] = None, max_market_cap: Optional[float] = None,
+              max_float: Optional[float] = None, min_avg_volume: Optional[float] = None,
+              min_short_percent: Optional[float] = None, include_unknown: bool = False,
+              order_by: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """
+        Symbols matching every given filter
+
+        Args:
+            lists: Restrict to members of these lists (kept in list order unless order_by is set)
+            sectors: Any of these sectors
+            industry_like: Case-insensitive substring of the industry
+            summary_keywords: Any keyword appears in the business summary
+            min_short_percent: Short interest as a fraction of float (0.10 = 10%)
+            include_unknown: Also return list members with no reference data yet
+            order_by: Reference column to sort by, descending (e.g. 'short_percent_float')
+            limit: Maximum symbols returned
+        """
+        where, params = [], []
+        if sectors:
+            sectors = list(sectors)
+            where.append(f"s.sector IN ({','.join('?' * len(sectors))})")
+            params.extend(sectors)
+        if industry_like:
+            where.append("LOWER(s.industry) LIKE ?")
+            params.append(f"%{industry_like.lower()}%")
+        if summary_keywords:
+            keywords = list(summary_keywords)
+            where.append('(' + ' OR '.join('LOWER(s.summary) LIKE ?' for _ in keywords) + ')')
+            params.extend(f"%{k.lower()}%" for k in keywords)
+        for column, op, value in (('market_cap', '>=', min_market_cap), ('market_cap', '<=', max_market_cap),
+                                  ('float_shares', '<=', max_float), ('avg_volume', '>=', min_avg_volume),
+                                  ('short_percent_float', '>=', min_short_percent)):
+            if value is not None:
+                where.append(f"s.{column} {op} ?")
+                params.append(value)
+        if max_float is not None:
+            where.append("s.float_shares > 0")
+
+        if lists:
+            lists = list(lists)
+            sql = (f"SELECT m.symbol, MIN(m.position) AS position FROM list_members m "
+                   f"LEFT JOIN symbols s ON s.symbol = m.symbol "
+                   f"WHERE m.list_name IN ({','.join('?' * len(lists))})")
+            params = lists + params
+            if where:
+                condition = ' AND '.join(where)
+                if include_unknown:
+                    condition = f"(s.symbol IS NULL OR s.fetch_error IS NOT NULL OR ({condition}))"
+                sql += f" AND {condition}"
+            sql += " GROUP BY m.symbol"
+        else:
+            sql = "SELECT s.symbol, 0 AS position FROM symbols s WHERE s.fetch_error IS NULL"
+            if where:
+                sql += " AND " + ' AND '.join(where)
+
+        if order_by:
+            if order_by not in REFERENCE_FIELDS:
+                raise ValueError(f"Unknown universe column: {order_by}")
+            sql = f"SELECT q.symbol FROM ({sql}) q LEFT JOIN symbols r ON r.symbol = q.symbol ORDER BY r.{order_by} DESC"
+        else:
+            sql = f"SELECT symbol FROM ({sql}) ORDER BY position, symbol"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self.lock:
+            self.stats['queries'] += 1
+            return [row[0] for row in self.conn.execute(sql, params)]
+
+    def get_reference(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored reference rows for the given symbols (missing symbols are omitted)"""
+        symbols = [s for s in (_normalize_symbol(v) for v in symbols) if s]
+        if not symbols:
+            return {}
+        columns = ['symbol', *REFERENCE_FIELDS, 'updated_at']
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(columns)} FROM symbols WHERE fetch_error IS NULL "
+                f"AND symbol IN ({','.join('?' * len(symbols))})", symbols
+            ).fetchall()
+        return {row[0]: dict(zip(columns, row)) for row in rows}
+
+    # Refresh
+
+    def is_stale(self, name: str, reference: bool = True) -> bool:
+        """
+        Index list past max age or, with reference=True, any member without
+        a current reference row
+        """
+        cutoff = time.time() - self.max_age_seconds
+        with self.lock:
+            row = self.conn.execute('SELECT refreshed_at FROM lists WHERE list_name = ?', (name,)).fetchone()
+            if name in self.fetchers and (row is None or (row[0] or 0) < cutoff):
+                return True
+            if not reference:
+                return False
+            missing = self.conn.execute('''
+                SELECT COUNT(*) FROM list_members m LEFT JOIN symbols s ON s.symbol = m.symbol
+                WHERE m.list_name = ? AND (s.updated_at IS NULL OR s.updated_at < ?)
+            ''', (name, cutoff)).fetchone()[0]
+        return missing > 0
+
+    async def ensure_fresh(self, names: Iterable[str], reference: bool = True):
+        """
+        Refresh only the given lists that are stale; a no-op on most scans
+
+        Args:
+            reference: Also refresh the members' reference rows. Pass False
+                       when only the membership is read (get_list).
+        """
+        stale = [name for name in names if self.is_stale(name, reference=reference)]
+        if stale:
+            await self.refresh(stale, reference=reference)
+
+    async def refresh(self, names: Optional[Iterable[str]] = None, force: bool = False,
+                      reference: bool = True) -> Dict[str, Any]:
+        """
+        Re-fetch stale index lists and, with reference=True, stale reference
+        rows (all lists by default)
+
+        Single-flight: concurrent callers asking for the same lists share
+        the running refresh.
+        """
+        names = list(names) if names is not None else None
+        key = (tuple(sorted(names)) if names is not None else None, force, reference)
+        task = self._inflight.get(key)
+        if not joinable(task):
+            task = asyncio.ensure_future(self._refresh(names, force, reference))
+            self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done() and self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    async def _refresh(self, names: Optional[Iterable[str]], force: bool, reference: bool = True) -> Dict[str, Any]:
+        started = time.time()
+        names = list(names) if names is not None else self.list_names()
+        cutoff = time.time() - (0 if force else self.max_age_seconds)
+
+        for name in names:
+            fetcher = self.fetchers.get(name)
+            if fetcher is None:
+                continue
+            with self.lock:
+                row = self.conn.execute('SELECT refreshed_at FROM lists WHERE list_name = ?', (name,)).fetchone()
+            if row is not None and (row[0] or 0) >= cutoff:
+                continue
+            try:
+                members = await asyncio.to_thread(fetcher)
+                members = list(dict.fromkeys(s for s in (_normalize_symbol(v) for v in members) if s))
+            except Exception as e:
+                logger.warning(f"Failed to fetch {name} constituents: {e}")
+                members = []
+            if members:
+                with self.lock:
+                    self._write_members(name, 'index', members, refreshed_at=time.time())
+                logger.info(f"Universe list '{name}': {len(members)} symbols")
+
+        with self.lock:
+            stale_symbols = [row[0] for row in self.conn.execute(f'''
+                SELECT DISTINCT m.symbol FROM list_members m LEFT JOIN symbols s ON s.symbol = m.symbol
+                WHERE m.list_name IN ({','.join('?' * len(names))})
+                AND (s.updated_at IS NULL OR s.updated_at < ?)
+            ''', [*names, cutoff])] if names and reference else []
+
+        fetched = await AsyncScanner(self.concurrency).collect(stale_symbols, self._fetch_reference)
+        with self.lock:
+            self.conn.executemany(f'''
+                INSERT OR REPLACE INTO symbols (symbol, {', '.join(REFERENCE_FIELDS)}, fetch_error, updated_at)
+                VALUES ({','.join('?' * (len(REFERENCE_FIELDS) + 3))})
+            ''', fetched)
+            self.conn.commit()
+
+        errors = sum(1 for row in fetched if row[-2])
+        self.stats['refreshes'] += 1
+        self.stats['symbols_fetched'] += len(fetched)
+        self.stats['fetch_errors'] += errors
+        summary = {'lists': names, 'symbols_refreshed': len(fetched), 'errors': errors,
+                   'elapsed_seconds': round(time.time() - started, 2)}
+        logger.info(f"Universe refresh: {summary}")
+        return summary
+
+    async def _fetch_reference(self, symbol: str) -> tuple:
+        """One reference row; failures are stored too so they're retried next cycle, not every scan"""
+        try:
+            info = await fundamentals_cache.get_info_async(symbol, fields=list(REFERENCE_FIELDS.values()))
+            values = [info.get(key) for key in REFERENCE_FIELDS.values()]
+            error = None if info.get('marketCap') or info.get('quoteType') else 'no reference data'
+        except Exception as e:
+            values = [None] * len(REFERENCE_FIELDS)
+            error = str(e)[:200]
+        return (symbol, *values, error, time.time())
+
+    def get_universe_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            symbols = self.conn.execute('SELECT COUNT(*), MIN(updated_at) FROM symbols').fetchone()
+            lists = {
+                name: {'source': source, 'size': size, 'refreshed_at': refreshed_at}
+                for name, source, refreshed_at, size in self.conn.execute('''
+                    SELECT l.list_name, l.source, l.refreshed_at, COUNT(m.symbol)
+                    FROM lists l LEFT JOIN list_members m ON m.list_name = l.list_name
+                    GROUP BY l.list_name
+                ''')
+            }
+        return {
+            **self.stats,
+            'symbols': symbols[0],
+            'oldest_row_age_hours': round((time.time() - symbols[1]) / 3600, 1) if symbols[1] else None,
+            'lists': lists,
+            'refreshing': any(not task.done() for task in self._inflight.values()),
+        }
+
+
+# Global instance
+universe_service = SymbolUniverseService()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Dashboard Data Layer
+TTL-cached loaders for the Streamlit dashboard (backend endpoints, price
+history, sectors) plus a concurrent prefetch of everything a page needs, so
+widget interactions redraw from cache instead of re-hitting the backend
+and Yahoo on every rerun
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+import requests
+import streamlit as st
+
+# Shared market-data caches live in core/ next to the other process-wide services
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core'))
+from market_bar_store import bar_store
+from fundamentals_cache import fundamentals_cache
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000')
+
+# How long (seconds) each backend endpoint's response is reused
+BACKEND_TTL = {
+    "/": 30,
+    "/api/costs/summary": 30,
+    "/api/baselines/portfolio": 60,
+    "/api/learning-summary": 120,
+    "/api/catalyst-discovery": 300,
+    "/api/alpha-discovery": 300,
+}
+DEFAULT_BACKEND_TTL = 30
+PRICE_TTL = 300
+SECTOR_TTL = 6 * 3600
+
+# Endpoints every main-dashboard render reads
+DASHBOARD_ENDPOINTS = ("/", "/api/costs/summary", "/api/baselines/portfolio", "/api/learning-summary")
+
+
+def as_of(ttl: float) -> int:
+    """Start of the current ttl-second window; passed to the cached loaders as part of their key"""
+    return int(time.time() // ttl * ttl)
+
+
+def fragment(func=None, *, run_every=None):
+    """
+    st.fragment (st.experimental_fragment on 1.33-1.36) so a widget inside
+    reruns only its own section; a plain function on older Streamlit
+    """
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if decorator is None:
+        return func if func is not None else (lambda f: f)
+    wrap = decorator(run_every=run_every) if run_every else decorator
+    return wrap(func) if func is not None else wrap
+
+
+@st.cache_resource
+def get_backend_session() -> requests.Session:
+    """One pooled HTTP session for all dashboard requests"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=600, show_spinner=False, max_entries=256)
+def _fetch_backend_json(path: str, as_of_time: int, _timeout: float) -> Any:
+    # Failures raise, so they're not cached and the next rerun retries;
+    # the leading underscore keeps the timeout out of the cache key
+    response = get_backend_session().get(f"{BACKEND_URL}{path}", timeout=_timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_backend_json(path: str, timeout: float = 10, ttl: Optional[float] = None) -> Optional[Any]:
+    """GET a backend endpoint through the cache; None if it's unreachable or not 200"""
+    ttl = ttl or BACKEND_TTL.get(path, DEFAULT_BACKEND_TTL)
+    try:
+        return _fetch_backend_json(path, as_of(ttl), timeout)
+    except Exception as e:
+        logger.debug(f"Backend request {path} failed: {e}")
+        return None
+
+
+@st.cache_data(ttl=2 * PRICE_TTL, show_spinner=False, max_entries=512)
+def _load_symbol_history(symbol: str, period: str, as_of_time: int) -> pd.DataFrame:
+    return bar_store.get_history(symbol, period=period)
+
+
+def get_symbol_history(symbol: str, period: str = "30d") -> pd.DataFrame:
+    """Daily bars for one symbol, reused for PRICE_TTL seconds"""
+    return _load_symbol_history(symbol.upper(), period, as_of(PRICE_TTL))
+
+
+@st.cache_data(ttl=SECTOR_TTL, show_spinner=False, max_entries=512)
+def get_sector(symbol: str) -> str:
+    """Sector from the fundamentals cache (raises if it can't be looked up, so failures aren't cached)"""
+    # get_info returns {} on fetch errors rather than raising
+    sector = fundamentals_cache.get_info(symbol.upper(), fields=['sector']).get('sector')
+    if not sector:
+        raise LookupError(f"No sector for {symbol}")
+    return sector
+
+
+def _attach_script_context(ctx):
+    # Cached loaders called from worker threads need the session's script context
+    if ctx is not None and add_script_run_ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def run_concurrently(jobs: Dict[str, tuple], max_workers: int = 8) -> Dict[str, Any]:
+    """Run {name: (func, *args)} in worker threads; failed jobs map to None"""
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=_attach_script_context,
+                            initargs=(ctx,)) as pool:
+        futures = {name: pool.submit(*job) for name, job in jobs.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.debug(f"Prefetch job {name} failed: {e}")
+                results[name] = None
+    return results
+
+
+def get_backend_many(paths: Iterable[str], timeout: float = 10) -> Dict[str, Optional[Any]]:
+    """Several backend endpoints fetched concurrently through the cache"""
+    return run_concurrently({path: (get_backend_json, path, timeout) for path in paths})
+
+
+def _warm_price_histories(symbols: list, period: str) -> int:
+    # One grouped download for everything missing, then per-symbol cache entries
+    bar_store.prefetch(symbols, period=period)
+    for symbol in symbols:
+        get_symbol_history(symbol, period)
+    return len(symbols)
+
+
+def prefetch_dashboard(symbols: Iterable[str], paths: Iterable[str] = DASHBOARD_ENDPOINTS,
+                       period: str = "30d") -> Dict[str, Any]:
+    """
+    Warm every loader a dashboard render reads, concurrently: backend
+    endpoints, price history for the held symbols and their sectors
+    """
+    symbols = sorted({s.upper() for s in symbols if s})
+    jobs = {path: (get_backend_json, path) for path in paths}
+    if symbols:
+        jobs["prices"] = (_warm_price_histories, symbols, period)
+        jobs.update({f"sector:{symbol}": (get_sector, symbol) for symbol in symbols})
+    return run_concurrently(jobs)
+
+
+def clear_dashboard_cache():
+    """Drop cached backend responses and prices (manual refresh)"""
+    _fetch_backend_json.clear()
+    _load_symbol_history.clear()
@@ -4,10 +4,8 @@ FDA PDUFA Date Scraper
 Scrapes real FDA approval dates and PDUFA dates from official sources
 """
 
-import requests
+import asyncio
 import pandas as pd
-import yfinance as yf
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import logging
@@ -19,20 +17,34 @@ import os
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schemas'))
 from catalyst_opportunity import CatalystOpportunity
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'core'))
+from cached_page_fetcher import page_fetcher
+from edgar_index import edgar_index
+from ticker_extractor import get_market_ticker_extractor
+
 logger = logging.getLogger(__name__)
 
+# Days ahead assumed for a calendar event whose date can't be parsed
+DEFAULT_EVENT_OFFSET_DAYS = 30
+
 class FDAScraper:
     """Scraper for real FDA PDUFA dates and drug approvals"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Pages are fetched concurrently with conditional GETs; parses are memoized per page content
+        self.fetcher = page_fetcher
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        }
         
         # FDA data sources
         self.fda_drugs_url = "https://www.fda.gov/drugs/drug-approvals-and-databases/drugsfda-data-files"
         self.biopharmcatalyst_url = "https://www.biopharmcatalyst.com/calendars/fda-calendar"
+        self.fda_press_url = "https://www.fda.gov/news-events/newsroom/press-announcements"
+        self.fda_news_urls = [
+            self.fda_press_url,
+            "https://www.fda.gov/drugs/news-events-human-drugs"
+        ]
         
         # Known biotech ticker mappings (extend as needed)
         self.company_ticker_map = {
@@ -60,17 +72,17 @@ class FDAScraper:
         
         catalysts = []
         
-        # Source 1: BioPharma Catalyst (most reliable for PDUFA dates)
-        bpc_catalysts = await self.scrape_biopharmcatalyst()
-        catalysts.extend(bpc_catalysts)
+        # Ticker validation uses the local EDGAR map instead of per-match lookups
+        await edgar_index.load_tickers()
         
-        # Source 2: FDA Orange Book updates
-        fda_catalysts = await self.scrape_fda_approvals()
-        catalysts.extend(fda_catalysts)
-        
-        # Source 3: Recent FDA press releases
-        press_catalysts = await self.scrape_fda_press_releases()
-        catalysts.extend(press_catalysts)
+        # Sources run concurrently; the FDA newsroom page they share is fetched once
+        source_results = await asyncio.gather(
+            self.scrape_biopharmcatalyst(),  # Source 1: BioPharma Catalyst (most reliable for PDUFA dates)
+            self.scrape_fda_approvals(),  # Source 2: FDA approval announcements
+            self.scrape_fda_press_releases()  # Source 3: Recent FDA press releases
+        )
+        for source_catalysts in source_results:
+            catalysts.extend(source_catalysts)
         
         # Deduplicate and validate
         unique_catalysts = self.deduplicate_catalysts(catalysts)
@@ -86,29 +98,15 @@ class FDAScraper:
         try:
             logger.info("📊 Scraping BioPharma Catalyst PDUFA calendar...")
             
-            response = self.session.get(self.biopharmcatalyst_url, timeout=15)
+            page = await self.fetcher.fetch(self.biopharmcatalyst_url, headers=self.headers)
             
-            if response.status_code != 200:
-                logger.warning(f"BioPharma Catalyst returned {response.status_code}")
+            if not page.ok:
+                logger.warning(f"BioPharma Catalyst returned {page.status_code}")
                 return catalysts
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for calendar events (structure may vary)
-            events = soup.find_all(['tr', 'div'], class_=['event', 'calendar-event', 'pdufa-event'])
-            
-            for event in events:
-                try:
-                    catalyst = self.parse_biopharmcatalyst_event(event)
-                    if catalyst:
-                        catalysts.append(catalyst)
-                except Exception as e:
-                    logger.debug(f"Error parsing event: {e}")
-                    continue
-            
-            # Alternative: Look for table rows with date patterns
-            if not catalysts:
-                catalysts = self.parse_calendar_table(soup)
+            events = await self.fetcher.memoized(f"biopharmcatalyst:{page.url}", page, self.parse_biopharmcatalyst_page,
+                                                 version=self.parse_version())
+            catalysts = self.catalysts_from_dicts(events)
             
         except Exception as e:
             logger.error(f"Error scraping BioPharma Catalyst: {e}")
@@ -116,6 +114,61 @@ class FDAScraper:
         logger.info(f"📊 Found {len(catalysts)} catalysts from BioPharma Catalyst")
         return catalysts
     
+    def parse_biopharmcatalyst_page(self, page) -> List[Dict[str, Any]]:
+        """Parse the calendar page into catalyst dicts (memoized per page content)"""
+        
+        catalysts = []
+        soup = self.fetcher.soup(page)
+        
+        # Look for calendar events (structure may vary)
+        events = soup.find_all(['tr', 'div'], class_=['event', 'calendar-event', 'pdufa-event'])
+        
+        for event in events:
+            try:
+                catalyst = self.parse_biopharmcatalyst_event(event)
+                if catalyst:
+                    catalysts.append(catalyst)
+            except Exception as e:
+                logger.debug(f"Error parsing event: {e}")
+                continue
+        
+        # Alternative: Look for table rows with date patterns
+        if not catalysts:
+            catalysts = self.parse_calendar_table(soup)
+        
+        return [
+            self.memo_entry(catalyst, DEFAULT_EVENT_OFFSET_DAYS if catalyst.details.get('date_estimated') else None)
+            for catalyst in catalysts
+        ]
+    
+    def parse_version(self) -> str:
+        """Version of everything the page parses read besides the page itself (the ticker map)"""
+        return get_market_ticker_extractor().version
+    
+    def memo_entry(self, catalyst: CatalystOpportunity, event_offset_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Catalyst dict for memoization; event_offset_days marks an event date
+        relative to the parse time so it's re-based when restored
+        """
+        entry = catalyst.to_dict()
+        entry['event_offset_days'] = event_offset_days
+        return entry
+    
+    def catalysts_from_dicts(self, events: List[Dict[str, Any]]) -> List[CatalystOpportunity]:
+        """Rebuild catalysts from memoized parse results, stamped with the current time"""
+        
+        catalysts = []
+        now = datetime.now()
+        for event in events:
+            try:
+                event = dict(event, discovered_at=now.isoformat())
+                if event.get('event_offset_days') is not None:
+                    event['event_date'] = (now + timedelta(days=event['event_offset_days'])).isoformat()
+                catalysts.append(CatalystOpportunity.from_dict(event))
+            except Exception as e:
+                logger.debug(f"Error restoring catalyst: {e}")
+        return catalysts
+    
     def parse_biopharmcatalyst_event(self, event) -> Optional[CatalystOpportunity]:
         """Parse individual BioPharma Catalyst event"""
         
@@ -147,9 +200,10 @@ class FDAScraper:
                     except:
                         continue
             
-            if not event_date:
+            date_estimated = not event_date
+            if date_estimated:
                 # Default to 30 days out if no date found
-                event_date = datetime.now() + timedelta(days=30)
+                event_date = datetime.now() + timedelta(days=DEFAULT_EVENT_OFFSET_DAYS)
             
             # Determine catalyst type from text
             catalyst_type = self.determine_catalyst_type(text)
@@ -167,7 +221,7 @@ class FDAScraper:
                 source="BioPharma Catalyst",
                 source_url=self.biopharmcatalyst_url,
                 headline=headline,
-                details={'raw_text': text},
+                details={'raw_text': text, 'date_estimated': date_estimated},
                 discovered_at=datetime.now()
             )
             
@@ -245,28 +299,12 @@ class FDAScraper:
             logger.info("🏛️ Scraping FDA.gov for recent approvals...")
             
             # FDA press releases
-            fda_press_url = "https://www.fda.gov/news-events/newsroom/press-announcements"
+            page = await self.fetcher.fetch(self.fda_press_url, headers=self.headers)
             
-            response = self.session.get(fda_press_url, timeout=15)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for press release links
-                press_links = soup.find_all('a', href=True)
-                
-                for link in press_links[:20]:  # Check recent press releases
-                    href = link.get('href')
-                    title = link.get_text().strip()
-                    
-                    if 'approval' in title.lower() or 'authorize' in title.lower():
-                        try:
-                            catalyst = await self.parse_fda_press_release(href, title)
-                            if catalyst:
-                                catalysts.append(catalyst)
-                        except Exception as e:
-                            logger.debug(f"Error parsing press release: {e}")
-                            continue
+            if page.ok:
+                events = await self.fetcher.memoized(f"fda_approvals:{page.url}", page, self.parse_fda_approvals_page,
+                                                     version=self.parse_version())
+                catalysts = self.catalysts_from_dicts(events)
             
         except Exception as e:
             logger.error(f"Error scraping FDA approvals: {e}")
@@ -274,6 +312,30 @@ class FDAScraper:
         logger.info(f"🏛️ Found {len(catalysts)} catalysts from FDA.gov")
         return catalysts
     
+    async def parse_fda_approvals_page(self, page) -> List[Dict[str, Any]]:
+        """Parse approval links from the press announcements page (memoized per page content)"""
+        
+        catalysts = []
+        soup = self.fetcher.soup(page)
+        
+        # Look for press release links
+        press_links = soup.find_all('a', href=True)
+        
+        for link in press_links[:20]:  # Check recent press releases
+            href = link.get('href')
+            title = link.get_text().strip()
+            
+            if 'approval' in title.lower() or 'authorize' in title.lower():
+                try:
+                    catalyst = await self.parse_fda_press_release(href, title)
+                    if catalyst:
+                        catalysts.append(self.memo_entry(catalyst, event_offset_days=0))
+                except Exception as e:
+                    logger.debug(f"Error parsing press release: {e}")
+                    continue
+        
+        return catalysts
+    
     async def parse_fda_press_release(self, href: str, title: str) -> Optional[CatalystOpportunity]:
         """Parse individual FDA press release"""
         
@@ -314,44 +376,15 @@ class FDAScraper:
         try:
             logger.info("📰 Scraping FDA press releases...")
             
-            # Alternative FDA news sources
-            fda_news_urls = [
-                "https://www.fda.gov/news-events/newsroom/press-announcements",
-                "https://www.fda.gov/drugs/news-events-human-drugs"
-            ]
+            # Alternative FDA news sources, fetched concurrently
+            pages = await self.fetcher.fetch_all(self.fda_news_urls, headers=self.headers)
             
-            for url in fda_news_urls:
+            for url, page in pages.items():
                 try:
-                    response = self.session.get(url, timeout=15)
-                    
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
-                        # Look for approval announcements
-                        articles = soup.find_all(['article', 'div', 'li'], class_=['news-item', 'press-release'])
-                        
-                        for article in articles[:10]:  # Recent items
-                            text = article.get_text().strip()
-                            
-                            if any(keyword in text.lower() for keyword in ['approval', 'authorize', 'pdufa']):
-                                ticker = self.extract_ticker_from_text(text)
-                                
-                                if ticker:
-                                    catalyst = CatalystOpportunity(
-                                        ticker=ticker,
-                                        catalyst_type='FDA_APPROVAL',
-                                        event_date=datetime.now(),
-                                        confidence_score=0.9,
-                                        estimated_upside=None,
-                                        estimated_downside=None,
-                                        source="FDA Press Release",
-                                        source_url=url,
-                                        headline=text[:100],
-                                        details={'source_type': 'press_release'},
-                                        discovered_at=datetime.now()
-                                    )
-                                    
-                                    catalysts.append(catalyst)
+                    if page.ok:
+                        events = await self.fetcher.memoized(f"fda_press:{url}", page, self.parse_press_release_page,
+                                                             version=self.parse_version())
+                        catalysts.extend(self.catalysts_from_dicts(events))
                                     
                 except Exception as e:
                     logger.debug(f"Error scraping {url}: {e}")
@@ -363,6 +396,40 @@ class FDAScraper:
         logger.info(f"📰 Found {len(catalysts)} catalysts from FDA press releases")
         return catalysts
     
+    def parse_press_release_page(self, page) -> List[Dict[str, Any]]:
+        """Parse approval announcements from an FDA news page (memoized per page content)"""
+        
+        catalysts = []
+        soup = self.fetcher.soup(page)
+        
+        # Look for approval announcements
+        articles = soup.find_all(['article', 'div', 'li'], class_=['news-item', 'press-release'])
+        
+        for article in articles[:10]:  # Recent items
+            text = article.get_text().strip()
+            
+            if any(keyword in text.lower() for keyword in ['approval', 'authorize', 'pdufa']):
+                ticker = self.extract_ticker_from_text(text)
+                
+                if ticker:
+                    catalyst = CatalystOpportunity(
+                        ticker=ticker,
+                        catalyst_type='FDA_APPROVAL',
+                        event_date=datetime.now(),
+                        confidence_score=0.9,
+                        estimated_upside=None,
+                        estimated_downside=None,
+                        source="FDA Press Release",
+                        source_url=page.url,
+                        headline=text[:100],
+                        details={'source_type': 'press_release'},
+                        discovered_at=datetime.now()
+                    )
+                    
+                    catalysts.append(self.memo_entry(catalyst, event_offset_days=0))
+        
+        return catalysts
+    
     def extract_ticker_from_company(self, company_text: str) -> Optional[str]:
         """Extract ticker from company name"""
         
@@ -377,11 +444,7 @@ class FDAScraper:
                 return ticker
         
         # Look for standalone ticker
-        ticker_match = re.search(r'\b([A-Z]{2,5})\b', company_text)
-        if ticker_match:
-            return ticker_match.group(1)
-        
-        return None
+        return get_market_ticker_extractor().first(company_text)
     
     def extract_ticker_from_title(self, title: str) -> Optional[str]:
         """Extract ticker from FDA press release title"""
@@ -391,43 +454,14 @@ class FDAScraper:
             if company.lower() in title.lower():
                 return ticker
         
-        # Look for ticker patterns
-        ticker_match = re.search(r'\b([A-Z]{2,5})\b', title)
-        if ticker_match:
-            potential_ticker = ticker_match.group(1)
-            
-            # Validate it's a real ticker
-            try:
-                stock = yf.Ticker(potential_ticker)
-                info = stock.info
-                if info.get('symbol') == potential_ticker:
-                    return potential_ticker
-            except:
-                pass
-        
-        return None
+        # Look for known tickers
+        return get_market_ticker_extractor().first(title)
     
     def extract_ticker_from_text(self, text: str) -> Optional[str]:
         """Extract ticker from general text"""
         
-        # Look for ticker patterns with validation
-        ticker_matches = re.findall(r'\b([A-Z]{2,5})\b', text)
-        
-        for match in ticker_matches:
-            # Skip common false positives
-            if match in ['FDA', 'CEO', 'IPO', 'API', 'USA', 'NYSE', 'SEC']:
-                continue
-            
-            # Validate with yfinance
-            try:
-                stock = yf.Ticker(match)
-                info = stock.info
-                if info.get('symbol') == match:
-                    return match
-            except:
-                continue
-        
-        return None
+        # One pass over the text against every known ticker (stop words like FDA/CEO skipped)
+        return get_market_ticker_extractor().first(text)
     
     def determine_catalyst_type(self, text: str) -> str:
         """Determine catalyst type from text"""
@@ -6,11 +6,11 @@ Monitors real SEC 8-K filings for M&A, partnerships, and material events
 
 import requests
 import feedparser
-import yfinance as yf
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import logging
+import asyncio
 import re
 import sys
 import os
@@ -20,6 +20,10 @@ import json
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schemas'))
 from catalyst_opportunity import CatalystOpportunity
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'core'))
+from edgar_index import edgar_index
+from ticker_extractor import get_market_ticker_extractor, normalize_ticker
+
 logger = logging.getLogger(__name__)
 
 class SECMonitor:
@@ -63,6 +67,9 @@ class SECMonitor:
         
         catalysts = []
         
+        # Local ticker<->CIK map (refreshed at most daily) backs CIK lookups and ticker validation
+        await edgar_index.load_tickers()
+        
         # Source 1: Recent 8-K filings via RSS
         rss_catalysts = await self.monitor_edgar_rss()
         catalysts.extend(rss_catalysts)
@@ -182,20 +189,23 @@ class SECMonitor:
                 'PLTR', 'COIN', 'HOOD', 'SOFI', 'IONQ', 'SMCI'
             ]
             
-            for ticker in target_tickers:
+            async def check_ticker(ticker: str) -> List[CatalystOpportunity]:
                 try:
                     # Get CIK for ticker
                     cik = await self.get_cik_for_ticker(ticker)
                     if not cik:
-                        continue
+                        return []
                     
                     # Get recent filings
-                    filings = await self.get_recent_filings(cik, ticker)
-                    catalysts.extend(filings)
+                    return await self.get_recent_filings(cik, ticker)
                     
                 except Exception as e:
                     logger.debug(f"Error checking {ticker}: {e}")
-                    continue
+                    return []
+            
+            # Submissions requests share the SEC rate limit; unchanged companies come back as 304s
+            for filings in await asyncio.gather(*(check_ticker(ticker) for ticker in target_tickers)):
+                catalysts.extend(filings)
         
         except Exception as e:
             logger.error(f"Error checking SEC API: {e}")
@@ -204,21 +214,11 @@ class SECMonitor:
         return catalysts
     
     async def get_cik_for_ticker(self, ticker: str) -> Optional[str]:
-        """Get SEC CIK number for ticker"""
+        """Get SEC CIK number for ticker from the local EDGAR index"""
         
         try:
-            # Use SEC company tickers JSON
-            tickers_url = "https://www.sec.gov/files/company_tickers.json"
-            
-            response = self.session.get(tickers_url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                for entry in data.values():
-                    if entry.get('ticker', '').upper() == ticker.upper():
-                        return str(entry.get('cik_str', '')).zfill(10)
-            
+            await edgar_index.load_tickers()
+            return edgar_index.get_cik(ticker)
         except Exception as e:
             logger.debug(f"Error getting CIK for {ticker}: {e}")
         
@@ -230,57 +230,42 @@ class SECMonitor:
         catalysts = []
         
         try:
-            submissions_url = f"{self.sec_api_base}/CIK{cik}.json"
+            # Check recent filings (last 30 days) from the incremental submissions cache
+            cutoff_date = datetime.now() - timedelta(days=30)
+            filings = await edgar_index.get_filings(cik, since=cutoff_date, forms=self.catalyst_forms)
             
-            response = self.session.get(submissions_url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                filings = data.get('filings', {}).get('recent', {})
-                forms = filings.get('form', [])
-                dates = filings.get('filingDate', [])
-                accessions = filings.get('accessionNumber', [])
-                
-                # Check recent filings (last 30 days)
-                cutoff_date = datetime.now() - timedelta(days=30)
-                
-                for i, (form, date_str, accession) in enumerate(zip(forms, dates, accessions)):
-                    try:
-                        filing_date = datetime.strptime(date_str, '%Y-%m-%d')
-                        
-                        if filing_date < cutoff_date:
-                            continue
-                        
-                        # Check if it's a catalyst form
-                        if form in self.catalyst_forms:
-                            
-                            # Create filing URL
-                            filing_url = f"https://www.sec.gov/Archives/edgar/data/{cik.lstrip('0')}/{accession.replace('-', '')}/{accession}.txt"
-                            
-                            catalyst = CatalystOpportunity(
-                                ticker=ticker,
-                                catalyst_type='SEC_FILING',
-                                event_date=filing_date,
-                                confidence_score=0.7,
-                                estimated_upside=None,
-                                estimated_downside=None,
-                                source="SEC API",
-                                source_url=filing_url,
-                                headline=f"{ticker} filed {form}",
-                                details={
-                                    'form_type': form,
-                                    'accession_number': accession,
-                                    'cik': cik
-                                },
-                                discovered_at=datetime.now()
-                            )
-                            
-                            catalysts.append(catalyst)
+            for filing in filings:
+                try:
+                    form = filing['form']
+                    accession = filing['accessionNumber']
+                    filing_date = datetime.strptime(filing['filingDate'], '%Y-%m-%d')
                     
-                    except Exception as e:
-                        logger.debug(f"Error parsing filing {i}: {e}")
-                        continue
+                    # Create filing URL
+                    filing_url = f"https://www.sec.gov/Archives/edgar/data/{cik.lstrip('0')}/{accession.replace('-', '')}/{accession}.txt"
+                    
+                    catalyst = CatalystOpportunity(
+                        ticker=ticker,
+                        catalyst_type='SEC_FILING',
+                        event_date=filing_date,
+                        confidence_score=0.7,
+                        estimated_upside=None,
+                        estimated_downside=None,
+                        source="SEC API",
+                        source_url=filing_url,
+                        headline=f"{ticker} filed {form}",
+                        details={
+                            'form_type': form,
+                            'accession_number': accession,
+                            'cik': cik
+                        },
+                        discovered_at=datetime.now()
+                    )
+                    
+                    catalysts.append(catalyst)
+                
+                except Exception as e:
+                    logger.debug(f"Error parsing filing {filing.get('accessionNumber')}: {e}")
+                    continue
         
         except Exception as e:
             logger.debug(f"Error getting filings for CIK {cik}: {e}")
@@ -347,34 +332,25 @@ class SECMonitor:
         
         text = f"{title} {summary}"
         
-        # Look for ticker patterns
-        ticker_patterns = [
-            r'\(([A-Z]{2,5})\)',  # Ticker in parentheses
-            r'([A-Z]{2,5})\s+\(',  # Ticker before parentheses
-            r'\b([A-Z]{2,5})\b'    # Standalone ticker
-        ]
+        # EDGAR feed titles carry the filer's CIK, e.g. "8-K - ACME CORP (0001234567) (Filer)"
+        for cik in re.findall(r'\((\d{10})\)', title):
+            ticker = edgar_index.get_ticker(cik)
+            if ticker:
+                return ticker
         
-        for pattern in ticker_patterns:
-            matches = re.findall(pattern, text)
-            
-            for match in matches:
-                # Skip common false positives
-                if match in ['SEC', 'EDGAR', 'NYSE', 'NASDAQ', 'LLC', 'INC', 'CORP']:
-                    continue
-                
-                # Validate ticker
-                if self.validate_ticker(match):
-                    return match
+        # Prefer a ticker given in parentheses, then any known ticker in the text
+        extractor = get_market_ticker_extractor()
+        for candidate in re.findall(r'\(([A-Z]{1,5}(?:[.\-][A-Z]{1,2})?)\)', text):
+            if candidate in extractor:
+                return normalize_ticker(candidate)
         
-        return None
+        return extractor.first(text)
     
     def validate_ticker(self, ticker: str) -> bool:
-        """Validate if string is a real ticker"""
+        """Validate if string is a real ticker against the local EDGAR map and symbol universe"""
         
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            return info.get('symbol') == ticker
+            return ticker in get_market_ticker_extractor()
         except:
             return False
     
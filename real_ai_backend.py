@@ -7,14 +7,13 @@ COMPLETELY REAL Backend - NO MOCK DATA ANYWHERE
 - Zero hardcoded/mock/fake data
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
 import subprocess
 import threading
 import os
-import requests
 from datetime import datetime
 import asyncio
 import json
@@ -29,6 +28,12 @@ import pytz
 # Import AI analysis cache
 sys.path.append('./core')
 from ai_analysis_cache import ai_cache
+from async_http_client import http_client
+from discovery_snapshot_store import discovery_snapshots
+from universe_service import universe_service, REFERENCE_FIELDS
+from fundamentals_cache import fundamentals_cache
+from explosive_catalyst_discovery import CATALYST_INFO_FIELDS
+from risk_metrics import risk_engine
 
 # Load environment variables
 load_dotenv()
@@ -139,7 +144,49 @@ async def startup_background_tasks():
         replace_existing=True
     )
     
+    # Symbol universe reference table - daily, ahead of the open scans
+    scheduler.add_job(
+        func=universe_service.refresh,
+        trigger=CronTrigger(hour='5', minute='45', day_of_week='0-4'),  # 5:45 AM PT
+        id='universe_refresh',
+        replace_existing=True
+    )
+    
+    # Fundamentals for held positions and the engines' candidate lists - every 30 minutes during market hours
+    scheduler.add_job(
+        func=warm_fundamentals_cache,
+        trigger=CronTrigger(hour='6-12', minute='*/30', day_of_week='0-4'),  # 6:00 AM - 12:30 PM PT
+        id='fundamentals_warmup',
+        replace_existing=True
+    )
+    
+    # Discovery snapshots - every 15 minutes during market hours, plus right after the open and close
+    scheduler.add_job(
+        func=discovery_snapshots.refresh_all,
+        trigger=CronTrigger(hour='7-12', minute='*/15', day_of_week='0-4'),  # 7:00 AM - 12:45 PM PT
+        id='discovery_snapshots',
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        func=discovery_snapshots.refresh_all,
+        trigger=CronTrigger(hour='6', minute='31', day_of_week='0-4'),  # 6:31 AM PT open
+        id='discovery_open',
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        func=discovery_snapshots.refresh_all,
+        trigger=CronTrigger(hour='13', minute='1', day_of_week='0-4'),  # 1:01 PM PT close
+        id='discovery_close',
+        replace_existing=True
+    )
+    
     scheduler.start()
+    
+    # Warm the fundamentals cache and discovery snapshots in the background (scans run on the snapshot worker loop)
+    asyncio.create_task(warm_fundamentals_cache())
+    asyncio.create_task(discovery_snapshots.refresh_all())
     logger.info("🚀 Smart background system started - thesis snapshots + learning")
 
 # Add root endpoint for deployment
@@ -171,6 +218,8 @@ async def shutdown_background_tasks():
     global scheduler
     if scheduler:
         scheduler.shutdown()
+    await discovery_snapshots.shutdown(http_client.close)
+    await http_client.close()
 
 async def take_scheduled_thesis_snapshot():
     """Take thesis snapshot at scheduled times"""
@@ -181,6 +230,22 @@ async def take_scheduled_thesis_snapshot():
     except Exception as e:
         logger.error(f"❌ Snapshot failed: {e}")
 
+# .info fields the scan engines read (universe reference rows, catalyst scans, squeeze short interest);
+# warming only these keeps short-lived fields outside them from forcing a full .info refetch
+WARM_INFO_FIELDS = sorted(set(REFERENCE_FIELDS.values()) | set(CATALYST_INFO_FIELDS) | {'sharesShort'})
+
+async def warm_fundamentals_cache():
+    """Refresh expired fundamentals for held positions and the active scan universe"""
+    try:
+        portfolio = await get_real_portfolio_positions()
+        symbols = [pos["symbol"] for pos in portfolio.get("positions", [])]
+        for name in universe_service.list_names(source="seed"):
+            symbols.extend(universe_service.get_list(name))
+        stats = await fundamentals_cache.warm(symbols, fields=WARM_INFO_FIELDS)
+        logger.info(f"Fundamentals warm-up: {stats['refreshed']}/{stats['requested']} expired symbols refreshed")
+    except Exception as e:
+        logger.warning(f"Fundamentals warm-up failed: {e}")
+
 async def run_morning_learning_review():
     """Morning review with learning insights"""
     try:
@@ -233,7 +298,7 @@ async def send_slack_notification(message, urgent=False):
             }]
         }
         
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = await http_client.post(webhook_url, json=payload, timeout=10)
         if response.status_code == 200:
             logger.info("✅ Slack notification sent")
         else:
@@ -266,7 +331,7 @@ async def get_real_portfolio_positions():
         }
     
     try:
-        response = requests.get(
+        response = await http_client.get(
             f"{ALPACA_BASE_URL}/v2/positions",
             headers=get_alpaca_headers(),
             timeout=10
@@ -322,7 +387,7 @@ async def get_real_portfolio_performance():
         }
     
     try:
-        response = requests.get(
+        response = await http_client.get(
             f"{ALPACA_BASE_URL}/v2/account",
             headers=get_alpaca_headers(),
             timeout=10
@@ -336,6 +401,7 @@ async def get_real_portfolio_performance():
                 "dayPL": float(account.get("unrealized_pl", 0)),
                 "totalPL": float(account["equity"]) - float(account.get("last_equity", account["equity"])),
                 "buyingPower": float(account["buying_power"]),
+                "risk": await get_portfolio_risk_metrics(),
                 "lastUpdated": datetime.now().isoformat(),
                 "source": "Alpaca Live API - Real Data"
             }
@@ -358,19 +424,63 @@ async def get_real_portfolio_performance():
             "lastUpdated": datetime.now().isoformat()
         }
 
+async def get_portfolio_risk_metrics():
+    """Risk metrics for the current Alpaca holdings, weighted by market value (cached per day)"""
+    try:
+        response = await http_client.get(
+            f"{ALPACA_BASE_URL}/v2/positions",
+            headers=get_alpaca_headers(),
+            timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        
+        holdings = [(pos["symbol"], abs(float(pos["market_value"]))) for pos in response.json()]
+        holdings = [(symbol, value) for symbol, value in holdings if value > 0]
+        if not holdings:
+            return None
+        
+        symbols = [symbol for symbol, _ in holdings]
+        weights = [value for _, value in holdings]
+        return await asyncio.to_thread(risk_engine.get_portfolio_risk, symbols, weights)
+    except Exception as e:
+        logger.warning(f"Error calculating portfolio risk metrics: {e}")
+        return None
+
+def format_collaborative_result(symbol, context, conversation_result, log_filename=None):
+    """Convert a collaborative conversation into the /api/ai-analysis response format"""
+    agents = []
+    for step in conversation_result['conversation_flow']:
+        agent_data = step['analysis']
+        agents.append({
+            "name": agent_data['agent'],
+            "model": agent_data.get('model', 'collaborative'),
+            "confidence": agent_data['confidence'],
+            "reasoning": agent_data['reasoning'],
+            "timestamp": agent_data['timestamp'],
+            "source": agent_data['source']
+        })
+    
+    return {
+        "agents": agents,
+        "symbol": symbol,
+        "context": context,
+        "conversation_flow": conversation_result['conversation_flow'],
+        "final_recommendation": conversation_result['final_recommendation'],
+        "partial": bool(conversation_result.get('partial')),  # Some steps missed their deadline
+        "lastUpdated": datetime.now().isoformat(),
+        "source": "Collaborative AI Analysis - Claude, ChatGPT, Grok Discussion",
+        "conversation_log": log_filename,
+        "message": f"AI models had {len(agents)} discussion steps about explosive opportunities"
+    }
+
 @app.post("/api/ai-analysis")
 async def get_real_ai_analysis(request_data: dict):
     """Get COLLABORATIVE AI analysis - Claude, ChatGPT, Grok discussing explosive opportunities"""
     symbol = request_data.get('symbol', 'UNKNOWN')
     context = request_data.get('context', '')
     
-    try:
-        # Check cache first
-        cached_result = ai_cache.get_analysis(symbol, 'collaborative')
-        if cached_result and not ai_cache.should_refresh_analysis(symbol, 'collaborative'):
-            print(f"🎯 Returning cached collaborative analysis for {symbol}")
-            return cached_result
-        
+    async def run_collaborative_discussion():
         # Import collaborative AI system
         import sys
         sys.path.append('./core')
@@ -382,38 +492,16 @@ async def get_real_ai_analysis(request_data: dict):
         collaborative_system = CollaborativeAISystem()
         conversation_result = await collaborative_system.run_collaborative_analysis(symbol, context)
         
-        # Convert to expected format for frontend
-        agents = []
-        for step in conversation_result['conversation_flow']:
-            agent_data = step['analysis']
-            agents.append({
-                "name": agent_data['agent'],
-                "model": agent_data.get('model', 'collaborative'),
-                "confidence": agent_data['confidence'],
-                "reasoning": agent_data['reasoning'],
-                "timestamp": agent_data['timestamp'],
-                "source": agent_data['source']
-            })
-        
         # Save conversation log
         log_filename = collaborative_system.save_conversation_log()
         
-        result = {
-            "agents": agents,
-            "symbol": symbol,
-            "context": context,
-            "conversation_flow": conversation_result['conversation_flow'],
-            "final_recommendation": conversation_result['final_recommendation'],
-            "lastUpdated": datetime.now().isoformat(),
-            "source": "Collaborative AI Analysis - Claude, ChatGPT, Grok Discussion",
-            "conversation_log": log_filename,
-            "message": f"AI models had {len(agents)} discussion steps about explosive opportunities"
-        }
-        
-        # Cache the result
-        ai_cache.set_analysis(symbol, 'collaborative', result)
-        
-        return result
+        return format_collaborative_result(symbol, context, conversation_result, log_filename)
+    
+    try:
+        # Cached, stale-while-revalidate, or one shared discussion for concurrent callers;
+        # partial discussions (steps filled with placeholders) are returned but not cached
+        return await ai_cache.get_or_compute(symbol, 'collaborative', run_collaborative_discussion,
+                                             cache_if=lambda result: not result.get('partial'))
         
     except Exception as e:
         print(f"❌ Collaborative AI failed: {e}")
@@ -600,7 +688,7 @@ Focus on data accuracy for high-risk/high-reward plays.
                     'temperature': 0.3
                 }
                 
-                response = requests.post(
+                response = await http_client.post(
                     'https://openrouter.ai/api/v1/chat/completions',
                     headers=headers,
                     json=payload,
@@ -658,7 +746,7 @@ def create_enhanced_ai_analysis_without_openrouter(symbol: str, context: str):
         # Get comprehensive market data
         stock = yf.Ticker(symbol)
         hist = stock.history(period="90d")
-        info = stock.info
+        info = fundamentals_cache.get_info(symbol)
         
         if hist.empty:
             return {
@@ -987,7 +1075,7 @@ async def create_multi_model_ai_analysis(symbol: str, context: str):
                 "temperature": 0.7
             }
             
-            response = requests.post(
+            response = await http_client.post(
                 "https://openrouter.ai/api/v1/chat/completions",
                 headers=headers,
                 json=payload,
@@ -1048,22 +1136,99 @@ async def create_multi_model_ai_analysis(symbol: str, context: str):
         ]
     }
 
+# Batch request limits; packed prompts are capped at 3500 response tokens (700 per symbol)
+MAX_SYMBOLS_PER_PROMPT = 5
+MAX_BATCH_CONCURRENCY = 6
+
+@app.post("/api/ai-analysis/batch")
+async def get_batch_ai_analysis(request_data: dict):
+    """
+    Collaborative AI analysis for many symbols in one request
+    
+    Body: {"symbols": [...], "context": "...", "symbol_contexts": {symbol: note},
+           "symbols_per_prompt": 4, "concurrency": 3, "stream": true}
+    
+    Cached symbols are returned first; the rest are packed several per prompt
+    and analysed with bounded concurrency. With stream=true the response is
+    NDJSON, one /api/ai-analysis-shaped result per line as each finishes.
+    """
+    raw_symbols = request_data.get('symbols', [])
+    if not isinstance(raw_symbols, list):
+        raise HTTPException(status_code=400, detail="symbols must be a list")
+    symbols = [str(s).upper() for s in raw_symbols if s]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    
+    context = request_data.get('context', '')
+    symbol_contexts = {k.upper(): v for k, v in (request_data.get('symbol_contexts') or {}).items()}
+    try:
+        symbols_per_prompt = int(request_data.get('symbols_per_prompt', 4))
+        concurrency = int(request_data.get('concurrency', 3))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="symbols_per_prompt and concurrency must be integers")
+    symbols_per_prompt = min(max(symbols_per_prompt, 1), MAX_SYMBOLS_PER_PROMPT)
+    concurrency = min(max(concurrency, 1), MAX_BATCH_CONCURRENCY)
+    
+    from collaborative_ai_system import CollaborativeAISystem
+    
+    async def analyze(pending):
+        print(f"🎯 Starting batched collaborative AI discussion for {len(pending)} symbols")
+        collaborative_system = CollaborativeAISystem()
+        try:
+            async for conversation_result in collaborative_system.stream_batch_collaborative_analysis(
+                pending, context, symbol_contexts=symbol_contexts,
+                symbols_per_prompt=symbols_per_prompt, concurrency=concurrency
+            ):
+                yield conversation_result['symbol'], format_collaborative_result(
+                    conversation_result['symbol'], conversation_result['context'], conversation_result
+                )
+        finally:
+            if collaborative_system.conversation_history:
+                collaborative_system.save_conversation_log()
+    
+    def results():
+        # Shares the cache and in-flight discussions with /api/ai-analysis, so a
+        # symbol requested both ways concurrently is discussed once
+        return ai_cache.get_or_compute_many(
+            symbols, 'collaborative', analyze,
+            cache_if=lambda result: result is not None and not result.get('partial')
+        )
+    
+    if request_data.get('stream', False):
+        async def ndjson():
+            async for result in results():
+                yield json.dumps(result, default=str) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    analyses = [result async for result in results()]
+    return {
+        "results": {result['symbol']: result for result in analyses},
+        "symbols_requested": len(symbols),
+        "symbols_analyzed": len(analyses),
+        "lastUpdated": datetime.now().isoformat(),
+        "source": "Batched Collaborative AI Analysis"
+    }
+
 @app.get("/api/ai-analysis/full/{symbol}")
 async def get_full_ai_thesis(symbol: str, purchase_price: float = None):
     """Get complete AI thesis with bull/bear case and detailed analysis"""
+    # Cached, stale-while-revalidate, or one shared build for concurrent callers;
+    # only complete theses (which carry analysis_timestamp) are cached
+    return await ai_cache.get_or_compute(
+        symbol, 'full', lambda: build_full_ai_thesis(symbol, purchase_price),
+        purchase_price=purchase_price,
+        cache_if=lambda result: 'analysis_timestamp' in result
+    )
+
+async def build_full_ai_thesis(symbol: str, purchase_price: float = None):
+    """Build the full AI thesis from market data"""
     try:
-        # Check cache first
-        cached_result = ai_cache.get_analysis(symbol, 'full', purchase_price)
-        if cached_result and not ai_cache.should_refresh_analysis(symbol, 'full', purchase_price):
-            print(f"🎯 Returning cached full analysis for {symbol}")
-            return cached_result
-        
         import yfinance as yf
         
         # Get comprehensive market data
         stock = yf.Ticker(symbol)
         hist = stock.history(period="90d")
-        info = stock.info
+        info = await fundamentals_cache.get_info_async(symbol)
         
         if hist.empty:
             return {
@@ -1194,9 +1359,6 @@ async def get_full_ai_thesis(symbol: str, purchase_price: float = None):
             "company_name": company_name
         }
         
-        # Cache the successful result
-        ai_cache.set_analysis(symbol, 'full', result, purchase_price)
-        
         return result
         
     except Exception as e:
@@ -1229,7 +1391,7 @@ async def execute_real_trade(order_data: dict):
             "time_in_force": order_data.get('time_in_force', 'day')
         }
         
-        response = requests.post(
+        response = await http_client.post(
             f"{ALPACA_BASE_URL}/v2/orders",
             headers=get_alpaca_headers(),
             json=trade_payload,
@@ -1284,7 +1446,7 @@ async def get_discovery_explanation(discovery_type: str, raw_data: list):
         """
         
         # Call OpenRouter API
-        response = requests.post(
+        response = await http_client.post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -1329,9 +1491,65 @@ async def get_discovery_explanation(discovery_type: str, raw_data: list):
             "discovery_type": discovery_type
         }
 
+async def serve_discovery_snapshot(name: str, request: Request):
+    """Serve the latest discovery snapshot with its age, honouring If-None-Match"""
+    snapshot = await discovery_snapshots.get(name)
+    headers = {
+        "ETag": snapshot['etag'],
+        "Cache-Control": "no-cache",
+        "X-Snapshot-Version": str(snapshot['version']),
+        "X-Snapshot-Age": str(discovery_snapshots.snapshot_age(snapshot))
+    }
+    if request.headers.get("if-none-match") == snapshot['etag']:
+        return Response(status_code=304, headers=headers)
+    
+    return JSONResponse(content={
+        **snapshot['payload'],
+        "snapshot": {
+            "version": snapshot['version'],
+            "generatedAt": datetime.fromtimestamp(snapshot['generated_at']).isoformat(),
+            "ageSeconds": discovery_snapshots.snapshot_age(snapshot),
+            "scanSeconds": snapshot['scan_seconds']
+        }
+    }, headers=headers)
+
 @app.get("/api/catalyst-discovery")
-async def get_catalyst_discovery():
-    """Get EXPLOSIVE catalyst discovery opportunities - NO LARGE CAPS"""
+async def get_catalyst_discovery(request: Request):
+    """Get EXPLOSIVE catalyst discovery opportunities - served from the latest precomputed snapshot"""
+    return await serve_discovery_snapshot('catalyst', request)
+
+@app.get("/api/alpha-discovery")
+async def get_alpha_discovery(request: Request):
+    """Get explosive opportunity discovery - served from the latest precomputed snapshot"""
+    return await serve_discovery_snapshot('alpha', request)
+
+@app.get("/api/discovery/snapshots")
+async def get_discovery_snapshot_status():
+    """Snapshot versions, ages and refresh status"""
+    return {
+        "snapshots": discovery_snapshots.get_store_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/universe/status")
+async def get_universe_status():
+    """Symbol universe table size, list ages and refresh counters"""
+    return {
+        "universe": universe_service.get_universe_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/api/discovery/refresh")
+async def refresh_discovery_snapshots():
+    """Re-run the discovery scans now (joins any scan already running)"""
+    await discovery_snapshots.refresh_all()
+    return {
+        "snapshots": discovery_snapshots.get_store_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+async def build_catalyst_discovery():
+    """Run EXPLOSIVE catalyst discovery - NO LARGE CAPS"""
     try:
         # Import explosive catalyst discovery system
         import sys
@@ -1386,9 +1604,8 @@ async def get_catalyst_discovery():
             "message": "Failed to connect to real catalyst discovery system"
         }
 
-@app.get("/api/alpha-discovery")
-async def get_alpha_discovery():
-    """Get explosive opportunity discovery - REAL EXPLOSIVE POTENTIAL SCANNER"""
+async def build_alpha_discovery():
+    """Run explosive opportunity discovery - REAL EXPLOSIVE POTENTIAL SCANNER"""
     try:
         # Import explosive opportunity engine for 100%+ potential stocks
         import sys
@@ -1493,6 +1710,9 @@ async def get_alpha_discovery():
             "message": "Failed to connect to explosive opportunity scanner"
         }
 
+discovery_snapshots.register('catalyst', build_catalyst_discovery)
+discovery_snapshots.register('alpha', build_alpha_discovery)
+
 @app.get("/api/stocks/{symbol}")
 async def get_stock_data(symbol: str):
     """Get real-time stock data for a symbol - REAL yfinance API"""
@@ -1502,7 +1722,7 @@ async def get_stock_data(symbol: str):
         # Get real market data from yfinance
         ticker = yf.Ticker(symbol)
         hist = ticker.history(period="2d")
-        info = ticker.info
+        info = await fundamentals_cache.get_info_async(symbol)
         
         if hist.empty or len(hist) < 1:
             return {
@@ -1572,8 +1792,7 @@ async def check_openrouter_status():
     if not OPENROUTER_API_KEY:
         return False
     try:
-        import requests
-        response = requests.get(
+        response = await http_client.get(
             "https://openrouter.ai/api/v1/models",
             headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
             timeout=5
@@ -2497,6 +2716,7 @@ async def get_cache_status():
         return {
             "status": "success",
             "cache_stats": stats,
+            "fundamentals_cache": fundamentals_cache.get_cache_stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -2578,7 +2798,7 @@ async def get_enhanced_position_analysis(ticker: str):
         from enhanced_collaborative_ai import analyze_position_with_learning
         
         # Get position data
-        positions_response = requests.get(
+        positions_response = await http_client.get(
             f"{ALPACA_BASE_URL}/v2/positions/{ticker}",
             headers=get_alpaca_headers(),
             timeout=10
@@ -5,6 +5,8 @@ Based on get_current_positions.json
 
 import logging
 import asyncio
+import sys
+from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
@@ -16,6 +18,10 @@ from ..utils.config import get_config
 from ..utils.logging_system import get_logger
 from ..intelligence.market_data import get_market_data_provider
 
+# Shared risk math lives in core/ next to the other process-wide modules
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'core'))
+from risk_metrics import compute_risk_metrics, returns_from_closes
+
 @dataclass
 class Position:
     """Individual position data"""
@@ -281,32 +287,41 @@ class PositionManager:
             positions = await self.get_current_positions()
             performance_data = {}
             
+            # Get historical data for all positions concurrently
+            histories = await asyncio.gather(*(
+                self.market_data_provider.get_historical_data(position.symbol, period=f"{days}d")
+                for position in positions
+            ))
+            
+            closes = {}
+            for position, historical_data in zip(positions, histories):
+                if historical_data and len(historical_data) > 1:
+                    closes[position.symbol] = pd.Series(
+                        [d.close for d in historical_data],
+                        index=pd.DatetimeIndex([d.timestamp for d in historical_data])
+                    ).groupby(level=0).last()
+            
+            if not closes:
+                return performance_data
+            
+            # One vectorized pass over the (dates x positions) return matrix
+            returns = returns_from_closes(pd.DataFrame(closes))
+            risk = compute_risk_metrics(returns, risk_free_rate=0.02)['positions']
+            
             for position in positions:
-                # Get historical data
-                historical_data = await self.market_data_provider.get_historical_data(
-                    position.symbol,
-                    period=f"{days}d"
-                )
-                
-                if not historical_data:
+                metrics = risk.get(position.symbol)
+                if not metrics:
                     continue
                 
-                # Calculate performance metrics
-                prices = [d.close for d in historical_data]
-                
-                if len(prices) > 1:
-                    # Calculate various performance metrics
-                    returns = pd.Series(prices).pct_change().dropna()
-                    
-                    performance_data[position.symbol] = {
-                        'total_return': ((prices[-1] - prices[0]) / prices[0]) * 100,
-                        'volatility': returns.std() * np.sqrt(252) * 100,  # Annualized
-                        'max_drawdown': self._calculate_max_drawdown(prices),
-                        'sharpe_ratio': self._calculate_sharpe_ratio(returns),
-                        'current_price': position.current_price,
-                        'unrealized_pl': position.unrealized_pl,
-                        'unrealized_pl_percent': position.unrealized_pl_percent
-                    }
+                performance_data[position.symbol] = {
+                    'total_return': metrics['total_return'] * 100,
+                    'volatility': metrics['volatility'] * 100,  # Annualized
+                    'max_drawdown': metrics['max_drawdown'] * 100,
+                    'sharpe_ratio': metrics['sharpe_ratio'],
+                    'current_price': position.current_price,
+                    'unrealized_pl': position.unrealized_pl,
+                    'unrealized_pl_percent': position.unrealized_pl_percent
+                }
             
             return performance_data
             
@@ -314,37 +329,6 @@ class PositionManager:
             self.logger.error(f"Error getting position performance: {e}")
             return {}
     
-    def _calculate_max_drawdown(self, prices: List[float]) -> float:
-        """Calculate maximum drawdown"""
-        try:
-            peak = prices[0]
-            max_dd = 0
-            
-            for price in prices:
-                if price > peak:
-                    peak = price
-                
-                drawdown = (peak - price) / peak
-                if drawdown > max_dd:
-                    max_dd = drawdown
-            
-            return max_dd * 100
-            
-        except:
-            return 0.0
-    
-    def _calculate_sharpe_ratio(self, returns: pd.Series, risk_free_rate: float = 0.02) -> float:
-        """Calculate Sharpe ratio"""
-        try:
-            if len(returns) == 0 or returns.std() == 0:
-                return 0.0
-            
-            excess_returns = returns - (risk_free_rate / 252)  # Daily risk-free rate
-            return (excess_returns.mean() / returns.std()) * np.sqrt(252)
-            
-        except:
-            return 0.0
-    
     async def check_position_limits(self) -> Dict[str, Any]:
         """Check if positions violate risk limits"""
         try:
@@ -6,6 +6,7 @@ from .stock_screener import StockScreener
 from .social_sentiment import SocialSentimentAnalyzer
 from .market_data import MarketDataProvider
 from .ai_models import AIModelInterface, OpenAIClient, ClaudeClient
+from .indicator_engine import IndicatorEngine
 
 __all__ = [
     'StockScreener',
@@ -13,5 +14,6 @@ __all__ = [
     'MarketDataProvider',
     'AIModelInterface',
     'OpenAIClient',
-    'ClaudeClient'
+    'ClaudeClient',
+    'IndicatorEngine'
 ]
\ No newline at end of file
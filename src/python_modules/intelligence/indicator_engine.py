@@ -0,0 +1,202 @@
+"""
+Cross-Sectional Indicator Engine
+Computes technical indicators for a whole universe in one vectorized pass
+"""
+
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDICATOR_COLUMNS = [
+    "price", "volume", "rsi", "macd", "macd_signal", "macd_histogram", "macd_direction",
+    "bb_upper", "bb_middle", "bb_lower", "bb_width", "bb_position",
+    "support", "resistance", "avg_volume_20", "volume_spike", "atr", "volatility_20",
+]
+
+
+class IndicatorEngine:
+    """
+    Vectorized indicator calculations over (time x symbol) blocks
+
+    Every indicator is computed column-wise on 2-D frames, so a 100 symbol
+    universe costs one rolling/EWM pass per indicator instead of one per
+    ticker. Formulas match TechnicalAnalyzer so scores are unchanged.
+    """
+
+    def __init__(self, rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26,
+                 macd_signal: int = 9, bb_period: int = 20, bb_std: int = 2,
+                 sr_window: int = 5, sr_lookback: int = 20, volume_window: int = 20,
+                 atr_period: int = 14):
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.sr_window = sr_window
+        self.sr_lookback = sr_lookback
+        self.volume_window = volume_window
+        self.atr_period = atr_period
+
+    def compute_from_panel(self, panel: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the indicator table from a wide (symbol, field) frame
+
+        Args:
+            panel: Frame with a (symbol, field) column MultiIndex, as returned
+                   by yf.download(group_by="ticker") or MarketBarStore.get_panel
+
+        Returns:
+            DataFrame indexed by symbol with INDICATOR_COLUMNS
+        """
+        if panel is None or panel.empty:
+            return pd.DataFrame(columns=INDICATOR_COLUMNS)
+
+        fields = set(panel.columns.get_level_values(1))
+
+        def block(field: str) -> Optional[pd.DataFrame]:
+            return panel.xs(field, axis=1, level=1) if field in fields else None
+
+        return self.compute(block("Close"), high=block("High"), low=block("Low"), volume=block("Volume"))
+
+    def compute(self, close: pd.DataFrame, high: Optional[pd.DataFrame] = None,
+                low: Optional[pd.DataFrame] = None, volume: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Compute indicators for (time x symbol) price/volume blocks
+
+        Each symbol is computed on its own bars: rows where it has no Close
+        are dropped and its bars right-aligned, so the last row is every
+        symbol's own last bar (as a per-ticker calculation would see it).
+
+        Returns:
+            DataFrame indexed by symbol with INDICATOR_COLUMNS
+        """
+        close = close.sort_index()
+        has_bar = close.notna()
+        close = self._align_to_last_bar(close, has_bar)
+        last = close.iloc[-1]
+        table = pd.DataFrame(index=close.columns)
+        table["price"] = last
+
+        # RSI (simple rolling average of gains/losses, as TechnicalAnalyzer)
+        delta = close.diff()
+        gain = delta.clip(lower=0).rolling(window=self.rsi_period).mean()
+        loss = (-delta.clip(upper=0)).rolling(window=self.rsi_period).mean()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + gain.iloc[-1] / loss.iloc[-1]))
+        table["rsi"] = rsi.replace([np.inf, -np.inf], np.nan).fillna(50.0)
+
+        # MACD
+        macd_line = close.ewm(span=self.macd_fast).mean() - close.ewm(span=self.macd_slow).mean()
+        signal_line = macd_line.ewm(span=self.macd_signal).mean()
+        histogram = macd_line.iloc[-1] - signal_line.iloc[-1]
+        table["macd"] = macd_line.iloc[-1]
+        table["macd_signal"] = signal_line.iloc[-1]
+        table["macd_histogram"] = histogram
+        table["macd_direction"] = np.where(histogram > 0, "bullish", "bearish")
+
+        # Bollinger Bands
+        sma = close.rolling(window=self.bb_period).mean().iloc[-1]
+        std = close.rolling(window=self.bb_period).std().iloc[-1]
+        upper = sma + std * self.bb_std
+        lower = sma - std * self.bb_std
+        table["bb_upper"] = upper
+        table["bb_middle"] = sma
+        table["bb_lower"] = lower
+        table["bb_width"] = (upper - lower) / sma
+        table["bb_position"] = np.select(
+            [last > upper, last < lower, last > sma],
+            ["above_upper", "below_lower", "above_middle"],
+            default="below_middle",
+        )
+
+        # Support / resistance from rolling extremes over the lookback
+        table["support"] = close.rolling(window=self.sr_window).min().tail(self.sr_lookback).min()
+        table["resistance"] = close.rolling(window=self.sr_window).max().tail(self.sr_lookback).max()
+
+        # Volume
+        if volume is not None:
+            volume = self._align_to_last_bar(volume.reindex(index=has_bar.index, columns=has_bar.columns).fillna(0),
+                                             has_bar)
+            prior_avg = volume.iloc[:-1].tail(self.volume_window).mean()
+            table["volume"] = volume.iloc[-1]
+            table["avg_volume_20"] = volume.tail(self.volume_window).mean()
+            table["volume_spike"] = (volume.iloc[-1] / prior_avg.replace(0, np.nan)).fillna(1.0)
+        else:
+            table["volume"] = np.nan
+            table["avg_volume_20"] = np.nan
+            table["volume_spike"] = 1.0
+
+        # ATR
+        if high is not None and low is not None:
+            high = self._align_to_last_bar(high.reindex(index=has_bar.index, columns=has_bar.columns), has_bar)
+            low = self._align_to_last_bar(low.reindex(index=has_bar.index, columns=has_bar.columns), has_bar)
+            prev_close = close.shift(1)
+            true_range = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+            table["atr"] = true_range.rolling(window=self.atr_period).mean().iloc[-1]
+        else:
+            table["atr"] = np.nan
+
+        # Annualized volatility of the last 20 returns
+        table["volatility_20"] = close.pct_change(fill_method=None).tail(self.volume_window).std() * np.sqrt(252)
+
+        return table[INDICATOR_COLUMNS]
+
+    @staticmethod
+    def _align_to_last_bar(frame: pd.DataFrame, has_bar: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep each column's values on the rows where its symbol has a bar,
+        right-aligned on a positional index (shorter histories are NaN-padded
+        at the top)
+        """
+        columns = {column: frame[column][has_bar[column]].to_numpy(dtype=float) for column in frame.columns}
+        length = max((len(values) for values in columns.values()), default=0)
+        return pd.DataFrame(
+            {column: np.concatenate([np.full(length - len(values), np.nan), values])
+             for column, values in columns.items()},
+            columns=frame.columns,
+        )
+
+
+def technical_snapshot(row: pd.Series) -> Tuple[float, Dict[str, Any], Dict[str, Any], Dict[str, float]]:
+    """
+    Convert one indicator-table row into TechnicalAnalyzer's return formats
+
+    Returns:
+        (rsi, macd, bollinger, support_resistance)
+    """
+    rsi = float(row["rsi"])
+    macd = {
+        "macd": row["macd"],
+        "signal": row["macd_signal"],
+        "histogram": row["macd_histogram"],
+        "signal_direction": row["macd_direction"],
+    }
+    bollinger = {
+        "upper": row["bb_upper"],
+        "middle": row["bb_middle"],
+        "lower": row["bb_lower"],
+        "position": row["bb_position"],
+        "width": row["bb_width"],
+    }
+    support_resistance = {
+        "support": row["support"],
+        "resistance": row["resistance"],
+        "current": row["price"],
+    }
+    return rsi, macd, bollinger, support_resistance
+
+
+# Global instance
+_indicator_engine = None
+
+def get_indicator_engine() -> IndicatorEngine:
+    """Get global indicator engine instance"""
+    global _indicator_engine
+    if _indicator_engine is None:
+        _indicator_engine = IndicatorEngine()
+    return _indicator_engine
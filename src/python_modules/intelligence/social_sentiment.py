@@ -7,6 +7,8 @@ import logging
 import asyncio
 import re
 import json
+import sys
+from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
@@ -23,6 +25,27 @@ from ..utils.config import get_config
 from ..utils.logging_system import get_logger
 from .ai_models import OpenAIClient
 
+# Shared ticker extractor lives in core/ next to the other process-wide caches
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'core'))
+from ticker_extractor import get_ticker_extractor
+from async_scan_pipeline import get_rate_limiter
+from sentiment_score_cache import sentiment_score_cache, content_hash
+
+# Local pre-filter: posts with none of these words are scored neutral without an LLM call
+POSITIVE_WORDS = frozenset({
+    'bull', 'bullish', 'buy', 'buying', 'bought', 'calls', 'long', 'moon', 'mooning', 'rocket', 'squeeze',
+    'breakout', 'rally', 'surge', 'soar', 'soaring', 'beat', 'beats', 'upgrade', 'upgraded', 'strong',
+    'growth', 'undervalued', 'approval', 'approved', 'win', 'winning', 'gain', 'gains', 'profit', 'rip',
+    'ripping', 'green', 'up', 'higher', 'record', 'love', 'great', 'huge', 'tendies', 'print', 'printing',
+})
+NEGATIVE_WORDS = frozenset({
+    'bear', 'bearish', 'sell', 'selling', 'sold', 'puts', 'short', 'shorting', 'dump', 'dumping', 'crash',
+    'tank', 'tanking', 'plunge', 'drop', 'drops', 'miss', 'missed', 'downgrade', 'downgraded', 'weak',
+    'overvalued', 'rejected', 'reject', 'lawsuit', 'fraud', 'dilution', 'offering', 'loss', 'losses', 'bagholder',
+    'bagholding', 'red', 'down', 'lower', 'bankrupt', 'bankruptcy', 'scam', 'hate', 'terrible', 'worst', 'rug',
+})
+_WORD_PATTERN = re.compile(r"[a-z']+")
+
 @dataclass
 class SentimentData:
     """Individual sentiment data point"""
@@ -117,6 +140,98 @@ class SentimentAnalyzer:
                 "confidence": 0.3
             }
 
+    def lexicon_score(self, text: str) -> Optional[Dict[str, Any]]:
+        """Neutral score for text with no sentiment-bearing words, else None (needs the model)"""
+        words = set(_WORD_PATTERN.findall((text or '').lower()))
+        if words & POSITIVE_WORDS or words & NEGATIVE_WORDS:
+            return None
+        return {"sentiment": "neutral", "score": 0.5, "confidence": 0.6}
+    
+    async def analyze_batch(self, texts: List[str], batch_size: int = 20, concurrency: int = 4,
+                            use_lexicon: bool = True, model: str = "gpt-4o-mini") -> List[Dict[str, Any]]:
+        """
+        Score many texts: duplicates are scored once, stored scores are reused,
+        obviously neutral texts skip the model, and the rest are packed
+        batch_size per request with requests running concurrently under the
+        OpenAI rate limit. Returns one score dict per input text.
+        """
+        hashes = [content_hash(text) for text in texts]
+        unique = dict(zip(hashes, texts))
+        scores = sentiment_score_cache.get_many(unique)
+        
+        pending = {h: text for h, text in unique.items() if h not in scores}
+        if use_lexicon:
+            lexicon_scores = {}
+            for h, text in pending.items():
+                score = self.lexicon_score(text)
+                if score:
+                    lexicon_scores[h] = score
+            sentiment_score_cache.store_many(lexicon_scores, scorer="lexicon")
+            scores.update(lexicon_scores)
+            pending = {h: text for h, text in pending.items() if h not in lexicon_scores}
+        
+        items = list(pending.items())
+        batches = [dict(items[i:i + batch_size]) for i in range(0, len(items), batch_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def score_batch(batch: Dict[str, str]):
+            async with semaphore:
+                await get_rate_limiter("openai").acquire()
+                batch_scores = await self._score_batch(batch, model)
+            sentiment_score_cache.store_many(batch_scores, scorer=model)
+            scores.update(batch_scores)
+        
+        await asyncio.gather(*(score_batch(batch) for batch in batches))
+        if items:
+            self.logger.info(f"Sentiment: {len(texts)} texts, {len(unique)} unique, "
+                             f"{len(items)} sent to {model} in {len(batches)} requests")
+        
+        fallback = {"sentiment": "neutral", "score": 0.5, "confidence": 0.3}
+        return [{k: scores[h][k] for k in ("sentiment", "score", "confidence")} if h in scores else dict(fallback)
+                for h in hashes]
+    
+    async def _score_batch(self, batch: Dict[str, str], model: str) -> Dict[str, Dict[str, Any]]:
+        """One structured-output request for a batch; texts the model skips are left unscored"""
+        keys = list(batch)
+        numbered = "\n".join(f'{i}: "{batch[key][:500]}"' for i, key in enumerate(keys))
+        prompt = f"""
+            Analyze the sentiment of each numbered text. Respond with only a JSON object of the form
+            {{"results": [{{"id": <number>, "sentiment": "positive"|"negative"|"neutral", "score": <0-1>, "confidence": <0-1>}}]}}
+            where score is 0=very negative, 0.5=neutral, 1=very positive and confidence is your confidence in the analysis.
+            
+            Texts:
+            {numbered}
+            """
+        try:
+            response = await self.openai_client.chat_completion(
+                messages=[
+                    {"role": "system", "content": "You are a financial sentiment analyst. Respond only with valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                model=model,
+                temperature=0.1,
+                max_tokens=40 * len(keys) + 50,
+                response_format={"type": "json_object"}
+            )
+            results = json.loads(response).get("results", [])
+        except Exception as e:
+            self.logger.debug(f"Error analyzing sentiment batch: {e}")
+            return {}
+        
+        scored = {}
+        for result in results:
+            try:
+                key = keys[int(result["id"])]
+                sentiment = result.get("sentiment", "neutral")
+                scored[key] = {
+                    "sentiment": sentiment if sentiment in ("positive", "negative", "neutral") else "neutral",
+                    "score": min(1.0, max(0.0, float(result.get("score", 0.5)))),
+                    "confidence": min(1.0, max(0.0, float(result.get("confidence", 0.7))))
+                }
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+        return scored
+
 class RedditScraper:
     """Reddit data scraper"""
     
@@ -146,6 +261,7 @@ class RedditScraper:
             
             posts = []
             subreddit = self.reddit.subreddit("wallstreetbets")
+            extractor = get_ticker_extractor(tickers)
             
             # Search for each ticker
             for ticker in tickers:
@@ -160,7 +276,7 @@ class RedditScraper:
                     for submission in search_results:
                         # Extract ticker mentions
                         content = f"{submission.title} {submission.selftext}"
-                        mentioned_tickers = self._extract_tickers(content, tickers)
+                        mentioned_tickers = self._extract_tickers(content, extractor)
                         
                         if mentioned_tickers:
                             posts.append(SocialPost(
@@ -184,28 +300,10 @@ class RedditScraper:
             self.logger.error(f"Error scraping Reddit: {e}")
             return []
     
-    def _extract_tickers(self, text: str, target_tickers: List[str]) -> List[str]:
-        """Extract ticker mentions from text"""
+    def _extract_tickers(self, text: str, extractor) -> List[str]:
+        """Extract ticker mentions from text ($TICKER in any case, bare TICKER in caps)"""
         try:
-            found_tickers = []
-            
-            # Create regex pattern for tickers
-            patterns = []
-            for ticker in target_tickers:
-                patterns.extend([
-                    f"\\${ticker}\\b",  # $TICKER
-                    f"\\b{ticker}\\b"   # TICKER
-                ])
-            
-            pattern = f"({'|'.join(patterns)})"
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            
-            for match in matches:
-                ticker = match.replace('$', '').upper()
-                if ticker in target_tickers and ticker not in found_tickers:
-                    found_tickers.append(ticker)
-            
-            return found_tickers
+            return extractor.extract(text)
             
         except Exception as e:
             self.logger.debug(f"Error extracting tickers: {e}")
@@ -243,6 +341,7 @@ class TwitterScraper:
                 return []
             
             posts = []
+            extractor = get_ticker_extractor(tickers)
             
             # Create search query
             search_query = " OR ".join([f"${ticker}" for ticker in tickers])
@@ -268,7 +367,7 @@ class TwitterScraper:
                     tweet_time = time_element.get_attribute('datetime') if time_element else ""
                     
                     # Extract mentioned tickers
-                    mentioned_tickers = self._extract_tickers(tweet_text, tickers)
+                    mentioned_tickers = self._extract_tickers(tweet_text, extractor)
                     
                     if mentioned_tickers:
                         posts.append(SocialPost(
@@ -295,21 +394,10 @@ class TwitterScraper:
             if self.driver:
                 self.driver.quit()
     
-    def _extract_tickers(self, text: str, target_tickers: List[str]) -> List[str]:
-        """Extract ticker mentions from text"""
+    def _extract_tickers(self, text: str, extractor) -> List[str]:
+        """Extract ticker mentions from text ($TICKER in any case, bare TICKER in caps)"""
         try:
-            found_tickers = []
-            
-            for ticker in target_tickers:
-                patterns = [f"\\${ticker}\\b", f"\\b{ticker}\\b"]
-                
-                for pattern in patterns:
-                    if re.search(pattern, text, re.IGNORECASE):
-                        if ticker not in found_tickers:
-                            found_tickers.append(ticker)
-                        break
-            
-            return found_tickers
+            return extractor.extract(text)
             
         except Exception as e:
             self.logger.debug(f"Error extracting tickers: {e}")
@@ -400,13 +488,16 @@ class SocialSentimentAnalyzer:
             twitter_posts = self.twitter_scraper.scrape_twitter(tickers, max_posts_per_source)
             congress_trades = self.congress_tracker.get_congressional_trades(tickers, max_posts_per_source)
             
-            # Analyze sentiment for social posts
+            # Analyze sentiment for social posts: each distinct post is scored once, in batches
             all_sentiment_data = []
+            social_posts = reddit_posts + twitter_posts
+            post_scores = await self.sentiment_analyzer.analyze_batch([post.content for post in social_posts])
+            reddit_scores = post_scores[:len(reddit_posts)]
+            twitter_scores = post_scores[len(reddit_posts):]
             
             # Process Reddit posts
-            for post in reddit_posts:
+            for post, sentiment in zip(reddit_posts, reddit_scores):
                 for ticker in post.tickers:
-                    sentiment = await self.sentiment_analyzer.analyze_sentiment(post.content)
                     
                     sentiment_data = SentimentData(
                         source="reddit_wsb",
@@ -427,9 +518,8 @@ class SocialSentimentAnalyzer:
                     all_sentiment_data.append(sentiment_data)
             
             # Process Twitter posts
-            for post in twitter_posts:
+            for post, sentiment in zip(twitter_posts, twitter_scores):
                 for ticker in post.tickers:
-                    sentiment = await self.sentiment_analyzer.analyze_sentiment(post.content)
                     
                     sentiment_data = SentimentData(
                         source="twitter",
@@ -3,6 +3,7 @@ SQUEEZE ALPHA - Institutional-Grade Short-Squeeze Detection System
 Recreating the 60% monthly return system with advanced squeeze analytics
 """
 
+import sys
 import logging
 import asyncio
 import yfinance as yf
@@ -12,11 +13,24 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 import requests
 import json
 
 from ..utils.config import get_config
 from ..utils.logging_system import get_logger
+from .indicator_engine import get_indicator_engine
+from .streaming_indicators import get_streaming_indicator_engine
+
+# Shared bar store lives in core/ next to the other process-wide caches
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'core'))
+from market_bar_store import bar_store, get_price_history
+from universe_service import universe_service
+from fundamentals_cache import fundamentals_cache
+
+# .info fields read per candidate (filters, short interest metrics, catalysts)
+SQUEEZE_INFO_FIELDS = ['longName', 'sector', 'marketCap', 'shortPercentOfFloat', 'sharesShort',
+                       'floatShares', 'averageVolume']
 
 @dataclass
 class SqueezeMetrics:
@@ -92,6 +106,7 @@ class SqueezeAlpha:
         self.min_borrow_rate = 5.0           # Minimum 5% borrow cost
         self.max_market_cap = 5000000000     # $5B max market cap
         self.min_daily_volume = 500000       # 500K daily volume minimum
+        self.incremental_indicators = True   # Persist indicator state between intraday rescans
         
         # Squeeze universe - high short interest candidates
         self.squeeze_universe = self._get_squeeze_universe()
@@ -128,14 +143,26 @@ class SqueezeAlpha:
             'BYND', 'PLUG', 'FCEL', 'GEVO', 'KOSS', 'EXPR'
         ]
         
+        # Prefilter on market cap and short interest from the daily reference table
+        # (stored as a fraction of float); candidates without reference data are kept
+        try:
+            universe_service.register_list('squeeze', squeeze_candidates)
+            screened = universe_service.query(
+                lists=['squeeze'], max_market_cap=self.max_market_cap,
+                min_short_percent=self.min_short_interest / 100, include_unknown=True
+            )
+            if screened:
+                squeeze_candidates = screened
+        except Exception as e:
+            self.logger.warning(f"Universe table unavailable, using full squeeze list: {e}")
+        
         self.logger.info(f"Loaded squeeze universe: {len(squeeze_candidates)} candidates")
         return squeeze_candidates
     
     def _get_short_interest_data(self, ticker: str) -> Optional[SqueezeMetrics]:
         """Get comprehensive short interest and borrow data"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = fundamentals_cache.get_info(ticker, fields=SQUEEZE_INFO_FIELDS)
             
             # Extract short interest metrics
             short_percent = info.get('shortPercentOfFloat', 0) * 100 if info.get('shortPercentOfFloat') else 0
@@ -247,7 +274,8 @@ class SqueezeAlpha:
             return None
     
     def _calculate_squeeze_scores(self, ticker: str, squeeze_metrics: SqueezeMetrics, 
-                                catalysts: List[CatalystEvent], price_data: pd.DataFrame) -> Tuple[float, float, float]:
+                                catalysts: List[CatalystEvent], price_data: pd.DataFrame,
+                                indicators: Optional[pd.Series] = None) -> Tuple[float, float, float]:
         """Calculate the three core squeeze scores"""
         
         # 1. QUANTITATIVE SCORE (40% weight) - Short squeeze metrics
@@ -289,7 +317,7 @@ class SqueezeAlpha:
         
         # Liquidity risk
         if len(price_data) > 20:
-            avg_volume = price_data['Volume'].tail(20).mean()
+            avg_volume = indicators['avg_volume_20'] if indicators is not None else price_data['Volume'].tail(20).mean()
             if avg_volume < 100000:
                 risk_score -= 40  # Very low volume
             elif avg_volume < 500000:
@@ -297,8 +325,11 @@ class SqueezeAlpha:
         
         # Price volatility risk
         if len(price_data) > 20:
-            returns = price_data['Close'].pct_change().tail(20)
-            volatility = returns.std() * np.sqrt(252)  # Annualized
+            if indicators is not None:
+                volatility = indicators['volatility_20']
+            else:
+                returns = price_data['Close'].pct_change().tail(20)
+                volatility = returns.std() * np.sqrt(252)  # Annualized
             if volatility > 1.5:  # >150% annual volatility
                 risk_score -= 30
             elif volatility > 1.0:  # >100% annual volatility
@@ -373,10 +404,24 @@ class SqueezeAlpha:
         
         candidates = []
         
+        # Bulk-load bars and compute indicators for the whole universe in one pass
+        indicator_table = None
+        try:
+            panel = bar_store.get_panel(self.squeeze_universe, period="3mo")
+            engine = get_streaming_indicator_engine() if self.incremental_indicators else get_indicator_engine()
+            indicator_table = engine.compute_from_panel(panel)
+        except Exception as e:
+            self.logger.warning(f"Vectorized squeeze indicators unavailable: {e}")
+        
+        def indicators_for(ticker: str) -> Optional[pd.Series]:
+            if indicator_table is not None and ticker in indicator_table.index:
+                return indicator_table.loc[ticker]
+            return None
+        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit all analysis tasks
             future_to_ticker = {
-                executor.submit(self._analyze_squeeze_candidate, ticker): ticker
+                executor.submit(self._analyze_squeeze_candidate, ticker, indicators_for(ticker)): ticker
                 for ticker in self.squeeze_universe
             }
             
@@ -400,13 +445,12 @@ class SqueezeAlpha:
         
         return candidates[:10]  # Return top 10 squeeze opportunities
     
-    def _analyze_squeeze_candidate(self, ticker: str) -> Optional[SqueezeCandidate]:
+    def _analyze_squeeze_candidate(self, ticker: str, indicators: Optional[pd.Series] = None) -> Optional[SqueezeCandidate]:
         """Analyze individual squeeze candidate"""
         try:
             # Get price data
-            stock = yf.Ticker(ticker)
-            data = stock.history(period="3mo")
-            info = stock.info
+            data = get_price_history(ticker, period="3mo")
+            info = fundamentals_cache.get_info(ticker, fields=SQUEEZE_INFO_FIELDS)
             
             if data.empty:
                 return None
@@ -438,7 +482,7 @@ class SqueezeAlpha:
             
             # Calculate scores
             quant_score, catalyst_score, risk_score = self._calculate_squeeze_scores(
-                ticker, squeeze_metrics, catalysts, data
+                ticker, squeeze_metrics, catalysts, data, indicators
             )
             
             # Calculate total weighted score
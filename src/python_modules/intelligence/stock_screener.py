@@ -3,18 +3,32 @@ Multi-Agent Stock Screener
 Based on multi_agent_stock_screener.json
 """
 
+import sys
 import logging
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass, asdict
 import yfinance as yf
 import pandas as pd
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
 from ..utils.config import get_config
 from ..utils.logging_system import get_logger, ScreenerCandidate
+from .indicator_engine import get_indicator_engine, technical_snapshot
+from .streaming_indicators import get_streaming_indicator_engine
+
+# Shared bar store lives in core/ next to the other process-wide caches
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'core'))
+from market_bar_store import bar_store, get_price_history
+from universe_service import universe_service
+from fundamentals_cache import fundamentals_cache
+
+# .info fields the screener reads; lookups only refetch when one of these expires
+SCREENER_INFO_FIELDS = ['longName', 'marketCap', 'sector', 'industry', 'shortPercentOfFloat',
+                        'averageVolume', 'floatShares']
 
 @dataclass
 class ScreeningCriteria:
@@ -51,6 +65,11 @@ class ScreeningCriteria:
     catalyst_weight: float = 4.0        # 4x weight on catalysts  
     volume_weight: float = 2.5          # 2.5x weight on volume
     breakout_weight: float = 3.5        # 3.5x weight on breakouts
+    
+    # DATA FETCHING
+    batch_download: bool = True         # Pull bars for the whole universe in grouped requests
+    batch_size: int = 50                # Symbols per bulk download request
+    incremental_indicators: bool = True # Reuse persisted indicator state, only fold in new bars
 
 @dataclass
 class StockCandidate:
@@ -165,13 +184,19 @@ class TechnicalAnalyzer:
 class StockScreener:
     """Main stock screening engine"""
     
-    def __init__(self, criteria: Optional[ScreeningCriteria] = None):
+    def __init__(self, criteria: Optional[ScreeningCriteria] = None,
+                 panel_provider: Optional[Callable[..., pd.DataFrame]] = None):
         self.config = get_config()
         self.logger = logging.getLogger(__name__)
         self.trading_logger = get_logger()
         self.criteria = criteria or ScreeningCriteria()
         self.technical_analyzer = TechnicalAnalyzer()
         
+        # Bulk bar source for batch mode: (tickers, period, chunk_size) -> wide (symbol, field) frame
+        self.panel_provider = panel_provider or (
+            lambda tickers, period, chunk_size: bar_store.get_panel(tickers, period=period, chunk_size=chunk_size)
+        )
+        
         # S&P 500 universe (simplified - in production this would be more comprehensive)
         self.universe = self._get_stock_universe()
     
@@ -202,6 +227,18 @@ class StockScreener:
                 'JPM', 'BAC', 'WFC', 'GS', 'JNJ', 'PFE', 'UNH', 'HD', 'WMT'
             ]
             
+            # Drop names the daily reference table already knows fail the market cap floor;
+            # names without reference data yet stay in and are filtered after fetching
+            try:
+                universe_service.register_list('screener_quality', quality_universe)
+                screened = universe_service.query(
+                    lists=['screener_quality'], min_market_cap=self.criteria.market_cap_min, include_unknown=True
+                )
+                if screened:
+                    quality_universe = screened
+            except Exception as e:
+                self.logger.warning(f"Universe table unavailable, using full quality list: {e}")
+            
             self.logger.info(f"Loaded quality universe with {len(quality_universe)} candidates")
             return quality_universe
             
@@ -212,8 +249,7 @@ class StockScreener:
     def _get_stock_data(self, ticker: str, period: str = "3mo") -> Optional[pd.DataFrame]:
         """Get stock data for analysis"""
         try:
-            stock = yf.Ticker(ticker)
-            data = stock.history(period=period)
+            data = get_price_history(ticker, period=period)
             
             if data.empty:
                 return None
@@ -227,17 +263,16 @@ class StockScreener:
     def _get_stock_info(self, ticker: str) -> Dict[str, Any]:
         """Get stock fundamental information"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = fundamentals_cache.get_info(ticker, fields=SCREENER_INFO_FIELDS)
             
             return {
-                "company_name": info.get("longName", ticker),
-                "market_cap": info.get("marketCap", 0),
-                "sector": info.get("sector", "Unknown"),
-                "industry": info.get("industry", "Unknown"),
-                "short_interest": info.get("shortPercentFloat", 0) * 100 if info.get("shortPercentFloat") else 0,
-                "avg_volume": info.get("averageVolume", 0),
-                "float_shares": info.get("floatShares", 0)
+                "company_name": info.get("longName") or ticker,
+                "market_cap": info.get("marketCap") or 0,
+                "sector": info.get("sector") or "Unknown",
+                "industry": info.get("industry") or "Unknown",
+                "short_interest": info.get("shortPercentOfFloat", 0) * 100 if info.get("shortPercentOfFloat") else 0,
+                "avg_volume": info.get("averageVolume") or 0,
+                "float_shares": info.get("floatShares") or 0
             }
             
         except Exception as e:
@@ -252,7 +287,20 @@ class StockScreener:
                 "float_shares": 0
             }
     
-    def _calculate_scores(self, ticker: str, data: pd.DataFrame, info: Dict[str, Any]) -> Dict[str, float]:
+    def _get_technicals(self, data: pd.DataFrame, indicators: Optional[pd.Series] = None):
+        """Get (rsi, macd, bollinger, support_resistance), from a precomputed indicator row if given"""
+        if indicators is not None:
+            return technical_snapshot(indicators)
+        
+        return (
+            self.technical_analyzer.calculate_rsi(data['Close']),
+            self.technical_analyzer.calculate_macd(data['Close']),
+            self.technical_analyzer.calculate_bollinger_bands(data['Close']),
+            self.technical_analyzer.find_support_resistance(data['Close'])
+        )
+    
+    def _calculate_scores(self, ticker: str, data: pd.DataFrame, info: Dict[str, Any],
+                          indicators: Optional[pd.Series] = None) -> Dict[str, float]:
         """Calculate various screening scores"""
         try:
             current_price = data['Close'].iloc[-1]
@@ -264,9 +312,7 @@ class StockScreener:
             volume_score = min(100, volume_spike * 25)
             
             # Technical score (0-100)
-            rsi = self.technical_analyzer.calculate_rsi(data['Close'])
-            macd = self.technical_analyzer.calculate_macd(data['Close'])
-            bollinger = self.technical_analyzer.calculate_bollinger_bands(data['Close'])
+            rsi, macd, bollinger, _ = self._get_technicals(data, indicators)
             
             technical_score = 0
             if 45 <= rsi <= 65:  # Neutral RSI
@@ -324,6 +370,16 @@ class StockScreener:
             
             info = self._get_stock_info(ticker)
             
+            return self._evaluate_stock(ticker, data, info)
+            
+        except Exception as e:
+            self.logger.debug(f"Error analyzing {ticker}: {e}")
+            return None
+    
+    def _evaluate_stock(self, ticker: str, data: pd.DataFrame, info: Dict[str, Any],
+                        indicators: Optional[pd.Series] = None) -> Optional[StockCandidate]:
+        """Filter and score a stock from already-fetched bars and fundamentals"""
+        try:
             # Apply basic filters
             current_price = data['Close'].iloc[-1]
             current_volume = data['Volume'].iloc[-1]
@@ -337,13 +393,10 @@ class StockScreener:
                 return None
             
             # Calculate technical indicators
-            rsi = self.technical_analyzer.calculate_rsi(data['Close'])
-            macd = self.technical_analyzer.calculate_macd(data['Close'])
-            bollinger = self.technical_analyzer.calculate_bollinger_bands(data['Close'])
-            support_resistance = self.technical_analyzer.find_support_resistance(data['Close'])
+            rsi, macd, bollinger, support_resistance = self._get_technicals(data, indicators)
             
             # Calculate scores
-            scores = self._calculate_scores(ticker, data, info)
+            scores = self._calculate_scores(ticker, data, info, indicators)
             
             # Generate rationale
             rationale_parts = []
@@ -384,54 +437,100 @@ class StockScreener:
             )
             
         except Exception as e:
-            self.logger.debug(f"Error analyzing {ticker}: {e}")
+            self.logger.debug(f"Error evaluating {ticker}: {e}")
             return None
     
+    def _record_candidate(self, result: StockCandidate):
+        """Log a qualifying candidate to the trading logger"""
+        screener_candidate = ScreenerCandidate(
+            timestamp=datetime.now().isoformat(),
+            ticker=result.ticker,
+            company_name=result.company_name,
+            total_score=result.total_score,
+            volume_score=result.volume_score,
+            technical_score=result.technical_score,
+            squeeze_score=result.squeeze_score,
+            catalyst_score=result.catalyst_score,
+            price=result.price,
+            market_cap=result.market_cap,
+            volume_spike_ratio=result.volume_spike_ratio,
+            short_interest=result.short_interest,
+            rationale=result.rationale,
+            selected_for_analysis=result.total_score > 70
+        )
+        
+        self.trading_logger.log_screener_candidate(screener_candidate)
+    
+    def _screen_per_ticker(self, max_workers: int) -> List[StockCandidate]:
+        """Fetch and analyze each ticker independently in a thread pool"""
+        results = []
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_ticker = {
+                executor.submit(self._analyze_stock, ticker): ticker 
+                for ticker in self.universe
+            }
+            
+            for future in as_completed(future_to_ticker):
+                ticker = future_to_ticker[future]
+                try:
+                    result = future.result()
+                    if result:
+                        results.append(result)
+                except Exception as e:
+                    self.logger.debug(f"Error processing {ticker}: {e}")
+        
+        return results
+    
+    def _screen_batch(self, max_workers: int) -> List[StockCandidate]:
+        """Pull the universe's bars in grouped requests and score from one wide frame"""
+        panel = self.panel_provider(self.universe, "3mo", self.criteria.batch_size)
+        if panel is None or panel.empty:
+            self.logger.warning("Batch download returned no data, falling back to per-ticker screening")
+            return self._screen_per_ticker(max_workers)
+        
+        available = [t for t in self.universe if t in panel.columns.get_level_values(0)]
+        self.logger.info(f"Batch download returned bars for {len(available)}/{len(self.universe)} tickers")
+        
+        # Fundamentals are still per-symbol lookups, so keep those in the pool
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            infos = dict(zip(available, executor.map(self._get_stock_info, available)))
+        
+        # One indicator pass for the whole universe (incremental state makes rescans O(1) per ticker)
+        try:
+            engine = get_streaming_indicator_engine() if self.criteria.incremental_indicators else get_indicator_engine()
+            indicator_table = engine.compute_from_panel(panel)
+        except Exception as e:
+            self.logger.warning(f"Vectorized indicators failed, computing per ticker: {e}")
+            indicator_table = None
+        
+        results = []
+        for ticker in available:
+            data = panel[ticker].dropna(how='all')
+            if data.empty:
+                continue
+            indicators = indicator_table.loc[ticker] if indicator_table is not None and ticker in indicator_table.index else None
+            result = self._evaluate_stock(ticker, data, infos[ticker], indicators)
+            if result:
+                results.append(result)
+        
+        return results
+    
     def screen_stocks(self, max_workers: int = 10) -> List[StockCandidate]:
         """Screen stocks using multiple criteria"""
         try:
             self.logger.info(f"Starting stock screening with {len(self.universe)} candidates")
             
-            candidates = []
+            if self.criteria.batch_download:
+                results = self._screen_batch(max_workers)
+            else:
+                results = self._screen_per_ticker(max_workers)
             
-            # Use ThreadPoolExecutor for parallel processing
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all tasks
-                future_to_ticker = {
-                    executor.submit(self._analyze_stock, ticker): ticker 
-                    for ticker in self.universe
-                }
-                
-                # Collect results
-                for future in as_completed(future_to_ticker):
-                    ticker = future_to_ticker[future]
-                    try:
-                        result = future.result()
-                        if result and result.total_score > 30:  # Minimum score threshold
-                            candidates.append(result)
-                            
-                            # Log candidate
-                            screener_candidate = ScreenerCandidate(
-                                timestamp=datetime.now().isoformat(),
-                                ticker=result.ticker,
-                                company_name=result.company_name,
-                                total_score=result.total_score,
-                                volume_score=result.volume_score,
-                                technical_score=result.technical_score,
-                                squeeze_score=result.squeeze_score,
-                                catalyst_score=result.catalyst_score,
-                                price=result.price,
-                                market_cap=result.market_cap,
-                                volume_spike_ratio=result.volume_spike_ratio,
-                                short_interest=result.short_interest,
-                                rationale=result.rationale,
-                                selected_for_analysis=result.total_score > 70
-                            )
-                            
-                            self.trading_logger.log_screener_candidate(screener_candidate)
-                            
-                    except Exception as e:
-                        self.logger.debug(f"Error processing {ticker}: {e}")
+            candidates = []
+            for result in results:
+                if result.total_score > 30:  # Minimum score threshold
+                    candidates.append(result)
+                    self._record_candidate(result)
             
             # Sort by total score
             candidates.sort(key=lambda x: x.total_score, reverse=True)
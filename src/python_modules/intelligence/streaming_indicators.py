@@ -0,0 +1,358 @@
+"""
+Streaming Indicator State
+Incremental RSI/MACD/Bollinger/volume state so intraday rescans only process new bars
+"""
+
+import copy
+import logging
+import math
+import pickle
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import pandas as pd
+import numpy as np
+
+from .indicator_engine import INDICATOR_COLUMNS
+
+# Relative Close difference on the last committed bar that means the history was rewritten
+# (split/dividend re-adjustment or a corrected bar), so the stored state is stale
+REBUILD_TOLERANCE = 1e-4
+
+logger = logging.getLogger(__name__)
+
+
+class EMA:
+    """Incremental EMA matching pandas ewm(span=..., adjust=True)"""
+
+    def __init__(self, span: int):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def update(self, value: float) -> float:
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.numerator / self.denominator if self.denominator else math.nan
+
+
+class RollingStats:
+    """Fixed-window running mean/sample variance with O(1) updates"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, value: float):
+        if len(self.values) == self.window:
+            dropped = self.values[0]
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else math.nan
+
+    @property
+    def std(self) -> float:
+        n = len(self.values)
+        if n < 2:
+            return math.nan
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class StreamingRSI:
+    """
+    Incremental RSI
+
+    Uses the simple rolling average of gains/losses by default (the same
+    definition as TechnicalAnalyzer.calculate_rsi); wilder=True switches to
+    Wilder's smoothing.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.gains = RollingStats(period)
+        self.losses = RollingStats(period)
+        self.avg_gain = math.nan
+        self.avg_loss = math.nan
+        self.count = 0
+        self.prev_close: Optional[float] = None
+
+    def update(self, close: float):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.count += 1
+            if self.wilder:
+                if self.count <= self.period:
+                    self.gains.update(gain)
+                    self.losses.update(loss)
+                    if self.count == self.period:
+                        self.avg_gain, self.avg_loss = self.gains.mean, self.losses.mean
+                else:
+                    self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                    self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            else:
+                self.gains.update(gain)
+                self.losses.update(loss)
+                if self.gains.full:
+                    self.avg_gain, self.avg_loss = self.gains.mean, self.losses.mean
+        self.prev_close = close
+
+    @property
+    def value(self) -> float:
+        if math.isnan(self.avg_gain) or math.isnan(self.avg_loss):
+            return 50.0
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+
+class SymbolIndicatorState:
+    """All streaming indicators for one symbol"""
+
+    def __init__(self, rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26,
+                 macd_signal: int = 9, bb_period: int = 20, bb_std: int = 2,
+                 sr_window: int = 5, sr_lookback: int = 20, volume_window: int = 20,
+                 atr_period: int = 14, wilder_rsi: bool = False):
+        self.bb_std = bb_std
+        self.rsi = StreamingRSI(rsi_period, wilder=wilder_rsi)
+        self.ema_fast = EMA(macd_fast)
+        self.ema_slow = EMA(macd_slow)
+        self.ema_signal = EMA(macd_signal)
+        self.bollinger = RollingStats(bb_period)
+        self.volume = RollingStats(volume_window)
+        self.prior_volume = RollingStats(volume_window)
+        self.returns = RollingStats(volume_window)
+        self.true_range = RollingStats(atr_period)
+        self.recent_closes = deque(maxlen=sr_window + sr_lookback - 1)
+        self.sr_window = sr_window
+
+        self.last_close = math.nan
+        self.last_volume = math.nan
+        self.macd = math.nan
+        self.signal = math.nan
+        self.last_timestamp: Optional[pd.Timestamp] = None
+
+    def update(self, timestamp: pd.Timestamp, close: float, high: float = math.nan,
+               low: float = math.nan, volume: float = math.nan):
+        """Fold one completed bar into the state"""
+        prev_close = self.last_close
+
+        self.rsi.update(close)
+        self.macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        self.signal = self.ema_signal.update(self.macd)
+        self.bollinger.update(close)
+        self.recent_closes.append(close)
+
+        if not math.isnan(prev_close) and prev_close:
+            self.returns.update(close / prev_close - 1)
+        if not math.isnan(high) and not math.isnan(low) and not math.isnan(prev_close):
+            self.true_range.update(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+
+        volume = 0.0 if math.isnan(volume) else volume
+        if not math.isnan(self.last_volume):
+            self.prior_volume.update(self.last_volume)
+        self.volume.update(volume)
+
+        self.last_close = close
+        self.last_volume = volume
+        self.last_timestamp = timestamp
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current indicator values, keyed like IndicatorEngine's table"""
+        price = self.last_close
+        histogram = self.macd - self.signal
+
+        if self.bollinger.full:
+            middle, std = self.bollinger.mean, self.bollinger.std
+            upper, lower = middle + std * self.bb_std, middle - std * self.bb_std
+            width = (upper - lower) / middle if middle else math.nan
+        else:
+            middle = upper = lower = width = math.nan
+
+        if price > upper:
+            position = "above_upper"
+        elif price < lower:
+            position = "below_lower"
+        elif price > middle:
+            position = "above_middle"
+        else:
+            position = "below_middle"
+
+        closes = list(self.recent_closes)
+        if len(closes) >= self.sr_window:
+            support, resistance = min(closes), max(closes)
+        else:
+            support = resistance = math.nan
+
+        prior_avg = self.prior_volume.mean
+        volume_spike = self.last_volume / prior_avg if prior_avg and not math.isnan(prior_avg) else 1.0
+
+        return {
+            "price": price,
+            "volume": self.last_volume,
+            "rsi": self.rsi.value,
+            "macd": self.macd,
+            "macd_signal": self.signal,
+            "macd_histogram": histogram,
+            "macd_direction": "bullish" if histogram > 0 else "bearish",
+            "bb_upper": upper,
+            "bb_middle": middle,
+            "bb_lower": lower,
+            "bb_width": width,
+            "bb_position": position,
+            "support": support,
+            "resistance": resistance,
+            "avg_volume_20": self.volume.mean,
+            "volume_spike": volume_spike,
+            "atr": self.true_range.mean if self.true_range.full else math.nan,
+            "volatility_20": self.returns.std * np.sqrt(252),
+        }
+
+
+class StreamingIndicatorEngine:
+    """
+    Per-symbol incremental indicators persisted between runs
+
+    Every bar except the last one in a frame is committed to the symbol's
+    state; the last bar may still be forming, so it is applied to a
+    throwaway copy when producing the snapshot. A rescan therefore only
+    folds in bars newer than the last committed timestamp.
+    """
+
+    def __init__(self, state_file: str = "cache/indicator_state/streaming_state.pkl", **indicator_params):
+        self.state_file = Path(state_file)
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.indicator_params = indicator_params
+        self.lock = threading.Lock()
+        self.states: Dict[str, SymbolIndicatorState] = self._load_states()
+
+    def _load_states(self) -> Dict[str, SymbolIndicatorState]:
+        """Load persisted state from disk"""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, "rb") as f:
+                    return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable indicator state: {e}")
+        return {}
+
+    def save(self):
+        """Persist state to disk"""
+        with self.lock:
+            try:
+                tmp_file = self.state_file.with_suffix(".tmp")
+                with open(tmp_file, "wb") as f:
+                    pickle.dump(self.states, f)
+                tmp_file.replace(self.state_file)
+            except Exception as e:
+                logger.warning(f"Error saving indicator state: {e}")
+
+    def update_symbol(self, symbol: str, bars: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """
+        Fold new bars for one symbol into its state and return its snapshot
+
+        Args:
+            symbol: Stock symbol
+            bars: OHLCV frame sorted by time (at least the bars since the last run)
+
+        Returns:
+            Indicator snapshot dict, or None if there are no bars
+        """
+        bars = bars.dropna(subset=["Close"])
+        if bars.empty:
+            return None
+
+        with self.lock:
+            state = self.states.get(symbol)
+            if state is not None and self._is_stale(state, bars):
+                # Gap or rewritten history since the stored state: rebuild from scratch
+                state = None
+            if state is None:
+                state = SymbolIndicatorState(**self.indicator_params)
+                self.states[symbol] = state
+
+            committed = bars.iloc[:-1]
+            if state.last_timestamp is not None:
+                committed = committed.loc[committed.index > state.last_timestamp]
+            for timestamp, bar in committed.iterrows():
+                state.update(timestamp, *self._bar_values(bar))
+
+            # The newest bar may still be forming; apply it to a copy only
+            latest = bars.iloc[-1]
+            provisional = copy.deepcopy(state)
+            if state.last_timestamp is None or bars.index[-1] > state.last_timestamp:
+                provisional.update(bars.index[-1], *self._bar_values(latest))
+            return provisional.snapshot()
+
+    def compute_from_panel(self, panel: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop-in replacement for IndicatorEngine.compute_from_panel
+
+        Returns:
+            DataFrame indexed by symbol with INDICATOR_COLUMNS
+        """
+        if panel is None or panel.empty:
+            return pd.DataFrame(columns=INDICATOR_COLUMNS)
+
+        rows = {}
+        for symbol in panel.columns.get_level_values(0).unique():
+            try:
+                snapshot = self.update_symbol(symbol, panel[symbol].sort_index())
+                if snapshot is not None:
+                    rows[symbol] = snapshot
+            except Exception as e:
+                logger.debug(f"Streaming indicator update failed for {symbol}: {e}")
+
+        self.save()
+        return pd.DataFrame.from_dict(rows, orient="index", columns=INDICATOR_COLUMNS)
+
+    @staticmethod
+    def _is_stale(state: SymbolIndicatorState, bars: pd.DataFrame) -> bool:
+        """Whether the state can't be continued from these bars"""
+        if state.last_timestamp is None:
+            return False
+        if state.last_timestamp < bars.index[0]:
+            return True
+        if state.last_timestamp not in bars.index:
+            return True
+        # The last committed bar must still have the Close the state folded in
+        close = float(bars.loc[state.last_timestamp, "Close"])
+        return abs(close - state.last_close) > REBUILD_TOLERANCE * max(abs(state.last_close), 1e-9)
+
+    @staticmethod
+    def _bar_values(bar: pd.Series):
+        def field(name: str) -> float:
+            value = bar.get(name, math.nan)
+            return math.nan if pd.isna(value) else float(value)
+        return field("Close"), field("High"), field("Low"), field("Volume")
+
+
+# Global instance
+_streaming_indicator_engine = None
+
+def get_streaming_indicator_engine() -> StreamingIndicatorEngine:
+    """Get global streaming indicator engine instance"""
+    global _streaming_indicator_engine
+    if _streaming_indicator_engine is None:
+        _streaming_indicator_engine = StreamingIndicatorEngine()
+    return _streaming_indicator_engine
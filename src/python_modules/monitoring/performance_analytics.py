@@ -4,6 +4,8 @@ Based on analytics_dashboard.json
 """
 
 import logging
+import sys
+from pathlib import Path
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -14,6 +16,10 @@ from ..utils.config import get_config
 from ..utils.logging_system import get_logger
 from ..execution.position_manager import get_position_manager
 
+# Shared risk math lives in core/ next to the other process-wide modules
+sys.path.append(str(Path(__file__).resolve().parents[3] / 'core'))
+from risk_metrics import max_drawdown
+
 @dataclass
 class PerformanceMetrics:
     """Performance metrics structure"""
@@ -41,7 +47,7 @@ class PerformanceAnalytics:
         """Calculate comprehensive performance metrics"""
         try:
             # Get historical data
-            historical_data = self.trading_logger.get_historical_data(days)
+            historical_data = self.trading_logger.get_historical_data(days, data_types=['trades'])
             
             if not historical_data or 'trades' not in historical_data:
                 return self._default_metrics()
@@ -141,11 +147,7 @@ class PerformanceAnalytics:
         """Calculate maximum drawdown"""
         if not returns:
             return 0.0
-        
-        cumulative = np.cumprod(1 + np.array(returns))
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = (cumulative - running_max) / running_max
-        return abs(np.min(drawdown)) * 100
+        return max_drawdown(returns, is_returns=True) * 100
     
     def _calculate_win_rate(self, trades_df: pd.DataFrame) -> float:
         """Calculate win rate"""
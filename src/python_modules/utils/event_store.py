@@ -0,0 +1,172 @@
+"""
+Trading Event Store
+Append-optimized SQLite (WAL) store for logged trading events, replacing the
+per-day JSON-lines files under logs/
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+from pathlib import Path
+
+import pandas as pd
+
+# Event type -> legacy per-day JSON-lines file prefix (logs/<dir>/<prefix>_YYYYMMDD.json)
+LEGACY_LOG_FILES = {
+    'screening': ('screening', 'screener'),
+    'ai_selections': ('ai_selections', 'ai_selection'),
+    'trades': ('trades', 'trades'),
+    'performance': ('performance', 'performance'),
+}
+
+class TradingEventStore:
+    """
+    Buffered event log with time and ticker indexes
+
+    Writes go to an in-memory buffer and are committed in one transaction
+    when it reaches max_buffer events, every flush_interval seconds, before
+    any read, and at exit. Reads are indexed range queries by event type,
+    time and ticker, so history lookups don't scan anything they don't return.
+    """
+
+    def __init__(self, db_path: str = "logs/trading_events.db", max_buffer: int = 200,
+                 flush_interval: float = 2.0, legacy_log_dir: Optional[str] = "logs"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.lock = threading.Lock()
+        self._buffer: List[tuple] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        self.stats = {'appended': 0, 'flushes': 0, 'queries': 0}
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._setup_database()
+        if legacy_log_dir:
+            self._import_legacy_logs(Path(legacy_log_dir))
+        atexit.register(self.flush)
+
+    def _setup_database(self) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                ts REAL NOT NULL,
+                ticker TEXT,
+                payload TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events(event_type, ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_type_ticker_ts ON events(event_type, ticker, ts)')
+        cursor.execute('CREATE TABLE IF NOT EXISTS imported_files (path TEXT PRIMARY KEY)')
+        self.conn.commit()
+
+    def append(self, event_type: str, record: Dict[str, Any], ts: Optional[float] = None) -> None:
+        """Buffer one event; it's durable after the next flush"""
+        row = (event_type, ts if ts is not None else time.time(), record.get('ticker'),
+               json.dumps(record, default=str))
+        with self.lock:
+            self._buffer.append(row)
+            self.stats['appended'] += 1
+            should_flush = len(self._buffer) >= self.max_buffer
+            if not should_flush and self._flush_timer is None and self.flush_interval:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit buffered events in a single transaction"""
+        with self.lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            try:
+                self.conn.executemany(
+                    'INSERT INTO events (event_type, ts, ticker, payload) VALUES (?, ?, ?, ?)', rows)
+                self.conn.commit()
+                self.stats['flushes'] += 1
+            except Exception as e:
+                # Keep the events for the next attempt rather than dropping them
+                self._buffer = rows + self._buffer
+                self.logger.error(f"Error flushing trading events: {e}")
+
+    def query(self, event_type: str, start: Optional[float] = None, end: Optional[float] = None,
+              tickers: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events of one type within [start, end) (epoch seconds), oldest first"""
+        self.flush()
+        sql = 'SELECT payload FROM events WHERE event_type = ?'
+        params: List[Any] = [event_type]
+        if start is not None:
+            sql += ' AND ts >= ?'
+            params.append(start)
+        if end is not None:
+            sql += ' AND ts < ?'
+            params.append(end)
+        if tickers:
+            tickers = list(tickers)
+            sql += f" AND ticker IN ({','.join('?' * len(tickers))})"
+            params.extend(tickers)
+        sql += ' ORDER BY ts'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        with self.lock:
+            self.stats['queries'] += 1
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def query_frame(self, event_type: str, **kwargs) -> pd.DataFrame:
+        """query() as a DataFrame"""
+        return pd.DataFrame(self.query(event_type, **kwargs))
+
+    def _import_legacy_logs(self, log_dir: Path) -> None:
+        """One-time import of the old per-day JSON-lines files (each file is imported once)"""
+        try:
+            imported = {row[0] for row in self.conn.execute('SELECT path FROM imported_files')}
+            for event_type, (subdir, prefix) in LEGACY_LOG_FILES.items():
+                for path in sorted((log_dir / subdir).glob(f"{prefix}_*.json")):
+                    if str(path) in imported:
+                        continue
+                    try:
+                        day_ts = datetime.strptime(path.stem.rsplit('_', 1)[1], '%Y%m%d').timestamp()
+                    except ValueError:
+                        continue
+                    rows = []
+                    with open(path) as f:
+                        for line in f:
+                            if line.strip():
+                                record = json.loads(line)
+                                rows.append((event_type, day_ts, record.get('ticker'),
+                                             json.dumps(record, default=str)))
+                    with self.lock:
+                        self.conn.executemany(
+                            'INSERT INTO events (event_type, ts, ticker, payload) VALUES (?, ?, ?, ?)', rows)
+                        self.conn.execute('INSERT INTO imported_files (path) VALUES (?)', (str(path),))
+                        self.conn.commit()
+                    self.logger.info(f"Imported {len(rows)} {event_type} events from {path}")
+        except Exception as e:
+            self.logger.warning(f"Error importing legacy trading logs: {e}")
+
+    def get_store_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            counts = dict(self.conn.execute('SELECT event_type, COUNT(*) FROM events GROUP BY event_type'))
+            buffered = len(self._buffer)
+        return {**self.stats, 'buffered': buffered, 'events': counts,
+                'db_bytes': os.path.getsize(self.db_path) if self.db_path.exists() else 0}
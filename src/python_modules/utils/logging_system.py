@@ -15,6 +15,7 @@ import pandas as pd
 from google.oauth2.service_account import Credentials
 
 from .config import get_config
+from .event_store import TradingEventStore
 
 @dataclass
 class ScreenerCandidate:
@@ -215,6 +216,9 @@ class TradingLogger:
         
         # Ensure log directories exist
         self._setup_log_directories()
+        
+        # Screening, AI selection, trade and performance events (buffered, indexed by time/ticker)
+        self.event_store = TradingEventStore()
     
     def _setup_log_directories(self) -> None:
         """Create log directories if they don't exist"""
@@ -237,11 +241,8 @@ class TradingLogger:
                 data = list(asdict(candidate).values())
                 self.sheets_logger.append_row("Screener_Candidates", data)
             
-            # Log to local file
-            log_file = f"logs/screening/screener_{datetime.now().strftime('%Y%m%d')}.json"
-            with open(log_file, 'a') as f:
-                json.dump(asdict(candidate), f)
-                f.write('\n')
+            # Log to local event store
+            self.event_store.append('screening', asdict(candidate))
             
             self.logger.info(f"Logged screener candidate: {candidate.ticker}")
             
@@ -256,11 +257,8 @@ class TradingLogger:
                 data = list(asdict(selection).values())
                 self.sheets_logger.append_row("AI_Selections", data)
             
-            # Log to local file
-            log_file = f"logs/ai_selections/ai_selection_{datetime.now().strftime('%Y%m%d')}.json"
-            with open(log_file, 'a') as f:
-                json.dump(asdict(selection), f)
-                f.write('\n')
+            # Log to local event store
+            self.event_store.append('ai_selections', asdict(selection))
             
             self.logger.info(f"Logged AI selection: {selection.ticker} - {selection.decision}")
             
@@ -275,11 +273,8 @@ class TradingLogger:
                 data = list(asdict(trade).values())
                 self.sheets_logger.append_row("Trade_History", data)
             
-            # Log to local file
-            log_file = f"logs/trades/trades_{datetime.now().strftime('%Y%m%d')}.json"
-            with open(log_file, 'a') as f:
-                json.dump(asdict(trade), f)
-                f.write('\n')
+            # Log to local event store
+            self.event_store.append('trades', asdict(trade))
             
             self.logger.info(f"Logged trade execution: {trade.ticker} {trade.action} - {trade.status}")
             
@@ -302,11 +297,8 @@ class TradingLogger:
                 data = list(data_dict.values())
                 self.sheets_logger.append_row("Performance_Metrics", data)
             
-            # Log to local file
-            log_file = f"logs/performance/performance_{datetime.now().strftime('%Y%m%d')}.json"
-            with open(log_file, 'a') as f:
-                json.dump(asdict(metrics), f)
-                f.write('\n')
+            # Log to local event store
+            self.event_store.append('performance', asdict(metrics))
             
             self.logger.info(f"Logged performance metrics: {metrics.ticker}")
             
@@ -342,36 +334,16 @@ class TradingLogger:
         except Exception as e:
             self.logger.error(f"Error updating position performance: {e}")
     
-    def get_historical_data(self, lookback_days: int = 30) -> Dict[str, pd.DataFrame]:
-        """Load historical data for analysis"""
+    def get_historical_data(self, lookback_days: int = 30, data_types: Optional[List[str]] = None,
+                            tickers: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Load historical data for analysis (only types with events in the window are returned)"""
         try:
             historical_data = {}
             
-            # Load from local files
-            end_date = datetime.now()
-            for i in range(lookback_days):
-                date = end_date - pd.Timedelta(days=i)
-                date_str = date.strftime('%Y%m%d')
-                
-                # Load different data types
-                data_types = {
-                    'screening': f"logs/screening/screener_{date_str}.json",
-                    'ai_selections': f"logs/ai_selections/ai_selection_{date_str}.json",
-                    'trades': f"logs/trades/trades_{date_str}.json",
-                    'performance': f"logs/performance/performance_{date_str}.json"
-                }
-                
-                for data_type, file_path in data_types.items():
-                    if os.path.exists(file_path):
-                        with open(file_path, 'r') as f:
-                            data = [json.loads(line) for line in f]
-                            
-                        if data_type not in historical_data:
-                            historical_data[data_type] = []
-                        historical_data[data_type].extend(data)
-            
-            # Convert to DataFrames
-            for data_type, data in historical_data.items():
+            # Indexed range query per data type
+            start = (datetime.now() - pd.Timedelta(days=lookback_days)).timestamp()
+            for data_type in data_types or ['screening', 'ai_selections', 'trades', 'performance']:
+                data = self.event_store.query(data_type, start=start, tickers=tickers)
                 if data:
                     historical_data[data_type] = pd.DataFrame(data)
             
@@ -384,7 +356,7 @@ class TradingLogger:
     def analyze_ai_accuracy(self, days: int = 30) -> Dict[str, float]:
         """Analyze AI recommendation accuracy"""
         try:
-            historical_data = self.get_historical_data(days)
+            historical_data = self.get_historical_data(days, data_types=['ai_selections', 'performance'])
             
             if 'ai_selections' not in historical_data or 'performance' not in historical_data:
                 return {}
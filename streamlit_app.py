@@ -37,6 +37,11 @@ except ImportError:
     logger.warning("ai_analysis_page not found")
     display_ai_analysis_page = None
 
+from dashboard_data import (
+    fragment, get_backend_json, get_backend_many, get_symbol_history, get_sector,
+    prefetch_dashboard, clear_dashboard_cache
+)
+
 # Backend URL configuration - no circular reference
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000')
 logger.info(f"Using backend URL: {BACKEND_URL}")
@@ -227,12 +232,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@fragment(run_every=60)
 def display_api_cost_tracker():
-    """Display API cost tracking at the top of pages"""
+    """Display API cost tracking at the top of pages (refreshes on its own every minute)"""
     try:
-        response = requests.get(f"{BACKEND_URL}/api/costs/summary", timeout=2)
-        if response.status_code == 200:
-            cost_data = response.json()
+        cost_data = get_backend_json("/api/costs/summary", timeout=2)
+        if cost_data is not None:
             
             # Display cost metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -735,9 +740,8 @@ def get_time_until_market():
 def check_backend_status():
     """Check if the real AI backend is running"""
     try:
-        response = requests.get(f"{BACKEND_URL}/", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
+        data = get_backend_json("/", timeout=5)
+        if data is not None:
             return {
                 'status': 'online',
                 'alpaca_configured': data.get('alpaca_configured', False),
@@ -785,15 +789,15 @@ def load_portfolio_data():
 def load_opportunities():
     """Load real opportunity data from existing discovery engines"""
     try:
-        # Call the real discovery endpoints
-        catalyst_response = requests.get(f"{BACKEND_URL}/api/catalyst-discovery", timeout=60)
-        alpha_response = requests.get(f"{BACKEND_URL}/api/alpha-discovery", timeout=60)
+        # Call the real discovery endpoints (concurrently, cached for a few minutes)
+        responses = get_backend_many(["/api/catalyst-discovery", "/api/alpha-discovery"], timeout=60)
+        catalyst_data = responses.get("/api/catalyst-discovery")
+        alpha_data = responses.get("/api/alpha-discovery")
         
         opportunities = []
         
         # Add catalyst opportunities
-        if catalyst_response.status_code == 200:
-            catalyst_data = catalyst_response.json()
+        if catalyst_data is not None:
             for catalyst in catalyst_data.get('catalysts', []):
                 opportunities.append({
                     'ticker': catalyst.get('ticker', 'Unknown'),
@@ -807,8 +811,7 @@ def load_opportunities():
                 })
         
         # Add alpha opportunities  
-        if alpha_response.status_code == 200:
-            alpha_data = alpha_response.json()
+        if alpha_data is not None:
             for alpha in alpha_data.get('opportunities', []):
                 opportunities.append({
                     'ticker': alpha.get('ticker', 'Unknown'),
@@ -913,6 +916,7 @@ def display_portfolio_summary(portfolio_data):
     # Analysis info
     st.caption(f"📊 Analysis: {portfolio_data.get('source', 'AI Portfolio Intelligence')} | 🕒 Updated: {portfolio_data.get('last_updated', 'Real-time')}")
 
+@fragment
 def display_overall_portfolio_ai_analysis(portfolio_data, opportunities):
     """Display overall AI portfolio analysis with actionable recommendations"""
     if not portfolio_data or not portfolio_data.get('positions'):
@@ -1003,10 +1007,7 @@ def analyze_sector_diversification(positions):
     
     for pos in positions:
         try:
-            import yfinance as yf
-            stock = yf.Ticker(pos['symbol'])
-            info = stock.info
-            sector = info.get('sector', 'Unknown')
+            sector = get_sector(pos['symbol'])
             
             if sector not in sector_exposure:
                 sector_exposure[sector] = {
@@ -1048,9 +1049,7 @@ def generate_ai_portfolio_recommendations(positions, opportunities, concentratio
         
         # Get recent momentum using real market data
         try:
-            import yfinance as yf
-            stock = yf.Ticker(pos['symbol'])
-            hist = stock.history(period="30d")
+            hist = get_symbol_history(pos['symbol'], period="30d")
             
             if not hist.empty and len(hist) >= 5:
                 recent_momentum = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-5]) / hist['Close'].iloc[-5]) * 100
@@ -1608,6 +1607,7 @@ def display_portfolio_positions(portfolio_data):
     
     with col2:
         if st.button("🔄 Refresh All Data"):
+            clear_dashboard_cache()
             st.session_state.portfolio_data = load_portfolio_data()
             st.rerun()
     
@@ -1863,9 +1863,7 @@ def get_ai_recommendation_for_position(position):
         market_value = position['market_value']
         
         # Use real market data to determine recommendation
-        import yfinance as yf
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="30d")
+        hist = get_symbol_history(symbol, period="30d")
         
         if hist.empty:
             return "HOLD"
@@ -2086,9 +2084,7 @@ def display_performance_deep_dive(symbol, position):
     
     # Get real market data for comparison
     try:
-        import yfinance as yf
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="30d")
+        hist = get_symbol_history(symbol, period="30d")
         
         if not hist.empty:
             # Calculate recent performance
@@ -2224,6 +2220,7 @@ def display_opportunities(opportunities):
         
         st.divider()
 
+@fragment
 def display_ai_system_status(portfolio_data):
     """Display comprehensive AI system status with memory integration"""
     st.subheader("🧠 AI System Status & Recommendations")
@@ -2262,10 +2259,9 @@ def get_ai_system_status(portfolio_data):
         positions = portfolio_data.get('positions', [])
         
         # Get AI portfolio analysis with optimized performance
-        portfolio_baseline_response = requests.get(f"{BACKEND_URL}/api/baselines/portfolio", timeout=10)
+        baseline_data = get_backend_json("/api/baselines/portfolio", timeout=10)
         portfolio_baseline = {}
-        if portfolio_baseline_response.status_code == 200:
-            baseline_data = portfolio_baseline_response.json()
+        if baseline_data is not None:
             if baseline_data.get('cached') and baseline_data.get('baseline'):
                 portfolio_baseline = baseline_data['baseline']
         
@@ -2642,17 +2638,11 @@ def display_system_quick_actions(system_status, portfolio_data):
 def main_dashboard():
     """Main dashboard display"""
     
-    # Display API cost tracking at the top of main dashboard
-    display_api_cost_tracker()
-    
-    # Check backend status
-    backend_status = check_backend_status()
-    st.session_state.backend_status = backend_status['status']
-    
     # Auto-refresh logic during market hours
     if st.session_state.auto_refresh and check_market_hours():
         time_since_refresh = (datetime.now() - st.session_state.last_refresh).total_seconds()
         if time_since_refresh > 180:
+            clear_dashboard_cache()
             st.session_state.portfolio_data = load_portfolio_data()
             st.session_state.opportunities = load_opportunities()
             st.session_state.last_refresh = datetime.now()
@@ -2663,6 +2653,17 @@ def main_dashboard():
         with st.spinner("Loading real portfolio data..."):
             st.session_state.portfolio_data = load_portfolio_data()
     
+    # Fetch everything the sections below read in one concurrent pass (cached between reruns)
+    positions = (st.session_state.portfolio_data or {}).get('positions', [])
+    prefetch_dashboard([pos['symbol'] for pos in positions])
+    
+    # Display API cost tracking at the top of main dashboard
+    display_api_cost_tracker()
+    
+    # Check backend status
+    backend_status = check_backend_status()
+    st.session_state.backend_status = backend_status['status']
+    
     if not st.session_state.opportunities:
         with st.spinner("Discovering opportunities..."):
             st.session_state.opportunities = load_opportunities()
@@ -2766,6 +2767,7 @@ def display_sidebar():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🔄 Refresh", use_container_width=True):
+                clear_dashboard_cache()
                 st.session_state.portfolio_data = load_portfolio_data()
                 st.session_state.opportunities = load_opportunities()
                 st.session_state.last_refresh = datetime.now()
@@ -2787,10 +2789,9 @@ def display_learning_dashboard():
     
     try:
         # Get learning data
-        response = requests.get(f"{BACKEND_URL}/api/learning-summary", timeout=10)
+        data = get_backend_json("/api/learning-summary", timeout=10)
         
-        if response.status_code == 200:
-            data = response.json()
+        if data is not None:
             performance = data.get('performance', {})
             learning = data.get('learning', {})
             
@@ -2843,6 +2844,7 @@ def display_learning_dashboard():
     except Exception as e:
         st.error(f"Learning metrics unavailable: {e}")
 
+@fragment
 def display_daily_recommendation_center():
     """Daily recommendation center based on 63.8% success method"""
     
@@ -2880,6 +2882,7 @@ def display_daily_recommendation_center():
                 except Exception as e:
                     st.error(f"❌ Error: {e}")
 
+@fragment
 def display_thesis_snapshot_status():
     """Display thesis snapshot system status"""
     